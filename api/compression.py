@@ -0,0 +1,79 @@
+import gzip
+import threading
+from collections import OrderedDict
+
+try:
+    import brotli
+except ImportError:
+    # brotli is optional, without it only gzip is offered
+    brotli = None
+
+
+MIN_COMPRESS_SIZE = 1024
+
+# Compressed bodies by (ETag, encoding), so an unchanged cached page is only compressed once
+_compressed_bodies = OrderedDict()
+_compressed_bodies_lock = threading.Lock()
+_MAX_COMPRESSED_BODIES = 256
+
+
+def compress_response(response, accept_encodings, min_size=MIN_COMPRESS_SIZE):
+    """
+    Compresses a response body with brotli or gzip if the client accepts it.
+
+    Only complete 200 responses of at least min_size bytes are compressed, streamed responses are
+    sent as they are. The ETag is made weak, since the compressed body is the same resource in
+    another encoding, so If-None-Match still matches the ETag of the uncompressed page.
+
+    Args:
+        response (flask.Response): The response to compress.
+        accept_encodings (werkzeug.datastructures.MIMEAccept): The Accept-Encoding header of the request.
+        min_size (int): Smaller bodies are sent uncompressed.
+
+    Returns:
+        flask.Response: The same response, compressed if it was worth it.
+    """
+    response.vary.add("Accept-Encoding")
+    if response.status_code != 200 or response.direct_passthrough or response.is_streamed \
+            or "Content-Encoding" in response.headers:
+        return response
+    if brotli is not None and accept_encodings["br"]:
+        encoding = "br"
+    elif accept_encodings["gzip"]:
+        encoding = "gzip"
+    else:
+        return response
+    body = response.get_data()
+    if len(body) < min_size:
+        return response
+
+    etag, _ = response.get_etag()
+    compressed = _cached_body(etag, encoding)
+    if compressed is None:
+        compressed = brotli.compress(body, quality=5) if encoding == "br" else gzip.compress(body, compresslevel=6)
+        if etag:
+            _store_body(etag, encoding, compressed)
+    response.set_data(compressed)
+    response.headers["Content-Encoding"] = encoding
+    if etag:
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def _cached_body(etag, encoding):
+    """Returns the compressed body stored for the ETag and encoding, or None."""
+    if not etag:
+        return None
+    with _compressed_bodies_lock:
+        compressed = _compressed_bodies.get((etag, encoding))
+        if compressed is not None:
+            _compressed_bodies.move_to_end((etag, encoding))
+        return compressed
+
+
+def _store_body(etag, encoding, compressed):
+    """Stores a compressed body, evicting the least recently used ones."""
+    with _compressed_bodies_lock:
+        _compressed_bodies[(etag, encoding)] = compressed
+        while len(_compressed_bodies) > _MAX_COMPRESSED_BODIES:
+            _compressed_bodies.popitem(last=False)
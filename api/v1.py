@@ -0,0 +1,351 @@
+from flask import Blueprint, Response, abort, current_app, jsonify, request, stream_with_context
+from werkzeug.exceptions import HTTPException
+from api.compression import compress_response
+from datamanager.favourites_io import EXPORT_FORMATS, read_records, write_records
+from pagecache.page_cache import cached_response
+
+
+# Fields a client may request with ?fields=, "id" is always part of the answer
+USER_FIELDS = ("id", "name")
+MOVIE_FIELDS = ("id", "title", "director", "publication_year", "rating", "poster_url", "lookup_status")
+
+
+def create_api_blueprint(data_manager, page_cache=None):
+    """
+    Creates the versioned JSON API, to be registered under /api/v1.
+
+    The API mirrors the DataManagerInterface operations. Lists use the same keyset cursors as the
+    HTML pages, ?fields= loads and returns only the requested columns, GET answers carry an ETag
+    (If-None-Match gives a 304) and bodies over 1 KB are compressed with brotli or gzip.
+
+    Args:
+        data_manager (DataManagerInterface): The data manager serving the data.
+        page_cache (MemoryPageCache | SQLitePageCache): Cache for list answers, or None.
+
+    Returns:
+        Blueprint: The API blueprint.
+    """
+    api = Blueprint("api_v1", __name__)
+
+    def cached_json(group, render):
+        """Serves a GET answer through the page cache, see cached_response."""
+        variant = "api:v1:" + request.path + "?" + request.query_string.decode("utf-8")
+        return cached_response(page_cache, group, variant,
+                               lambda: (current_app.json.dumps(render()), 200), "application/json")
+
+    @api.route("/users", methods=["GET"])
+    def get_users():
+        """
+        Returns a page of users sorted by name.
+
+        Query args:
+            cursor (str): Cursor of the requested page, first page if missing.
+            page_size (int): Number of users per page (max 200).
+            fields (str): Comma separated user fields, e.g. "name".
+        """
+        fields = _requested_fields(USER_FIELDS)
+
+        def render():
+            users_page = _call_or_400(data_manager.get_users_page, request.args.get("cursor"),
+                                      request.args.get("page_size", 50, type=int), fields)
+            return _page_to_dict(users_page, USER_FIELDS, fields)
+
+        return cached_json("users", render)
+
+    @api.route("/users", methods=["POST"])
+    def add_user():
+        """Creates a user from a JSON body {"name": "..."}."""
+        name = _json_body().get("name")
+        if not isinstance(name, str) or not name.strip():
+            abort(400, description="The field 'name' must be a non-empty string.")
+        user_used = data_manager.add_user(name)
+        if user_used:
+            abort(409, description=user_used)
+        return jsonify({"name": name}), 201
+
+    @api.route("/users/<int:user_id>", methods=["GET"])
+    def get_user(user_id):
+        """Returns a single user."""
+        def render():
+            user = data_manager.get_user(user_id)
+            if user == "error":
+                abort(404, description=f"User with ID {user_id} not found.")
+            return _to_dict(user, USER_FIELDS)
+
+        return cached_json("users", render)
+
+    @api.route("/users/<int:user_id>/movies", methods=["GET"])
+    def get_user_movies(user_id):
+        """
+        Returns a page of the movies of a user.
+
+        Query args:
+            sort (str): "title", "year" or "rating".
+            cursor (str): Cursor of the requested page, first page if missing.
+            page_size (int): Number of movies per page (max 200).
+            fields (str): Comma separated movie fields, e.g. "title,rating".
+        """
+        fields = _requested_fields(MOVIE_FIELDS)
+
+        def render():
+            if data_manager.get_user(user_id) == "error":
+                abort(404, description=f"User with ID {user_id} not found.")
+            movies_page = _call_or_400(data_manager.get_user_movies_page, user_id,
+                                       request.args.get("sort", "title"), request.args.get("cursor"),
+                                       request.args.get("page_size", 24, type=int), fields)
+            return _page_to_dict(movies_page, MOVIE_FIELDS, fields)
+
+        return cached_json(f"user:{user_id}", render)
+
+    @api.route("/users/<int:user_id>/movies", methods=["POST"])
+    def add_user_movies(user_id):
+        """
+        Adds movies to a user's list.
+
+        A JSON body {"title": "..."} adds a single movie and returns its result message,
+        {"titles": [...]} imports many movies at once and returns one report entry per title.
+        """
+        if data_manager.get_user(user_id) == "error":
+            abort(404, description=f"User with ID {user_id} not found.")
+        body = _json_body()
+        if "titles" in body:
+            titles = body["titles"]
+            if not isinstance(titles, list) or not all(isinstance(title, str) for title in titles):
+                abort(400, description="The field 'titles' must be a list of strings.")
+            report = data_manager.add_movies_to_user(user_id, titles)
+            if report == "error":
+                abort(500, description="The movies could not be imported.")
+            return jsonify({"results": report}), 200
+
+        title = body.get("title")
+        if not isinstance(title, str) or not title.strip():
+            abort(400, description="The field 'title' must be a non-empty string.")
+        action_result = data_manager.add_movie_to_user(user_id, title)
+        if action_result is None:
+            abort(500, description="The movie could not be added.")
+        return jsonify({"message": action_result}), 200
+
+    @api.route("/users/<int:user_id>/movies/<int:movie_id>", methods=["PUT", "PATCH"])
+    def update_user_movie(user_id, movie_id):
+        """
+        Updates a movie in a user's list, other users keep the original movie.
+
+        PUT expects all of title, director, publication_year and rating in the JSON body,
+        PATCH only the changed ones.
+        """
+        movie = data_manager.get_movie(movie_id, user_id=user_id)
+        if data_manager.get_user(user_id) == "error" or movie == "error":
+            abort(404, description=f"Movie with ID {movie_id} not found.")
+        body = _json_body()
+        changes = {}
+        for field in ("title", "director", "publication_year", "rating"):
+            if field in body:
+                changes[field] = body[field]
+            elif request.method == "PUT":
+                abort(400, description=f"The field '{field}' is missing.")
+            else:
+                changes[field] = getattr(movie, field)
+        action_result = data_manager.update_movie(user_id, movie_id, changes["title"], changes["director"],
+                                                  changes["publication_year"], changes["rating"])
+        if action_result is None:
+            abort(400, description="The movie could not be updated, check the field types.")
+        return jsonify({"message": action_result}), 200
+
+    @api.route("/users/<int:user_id>/movies/<int:movie_id>", methods=["DELETE"])
+    def remove_user_movie(user_id, movie_id):
+        """Removes a movie from a user's list."""
+        action_result = data_manager.remove_movie_from_favourites(movie_id, user_id)
+        if action_result is None:
+            abort(404, description=f"Movie with ID {movie_id} not found in the list of user {user_id}.")
+        return jsonify({"message": action_result}), 200
+
+    @api.route("/users/<int:user_id>/movies/export", methods=["GET"])
+    def export_user_movies(user_id):
+        """
+        Streams the movies of a user as CSV or JSON lines, with chunked transfer encoding.
+
+        Query args:
+            format (str): "jsonl" (default) or "csv".
+        """
+        file_format = request.args.get("format", "jsonl")
+        if file_format not in EXPORT_FORMATS:
+            abort(400, description=f"Unknown format: {file_format}")
+        rows = data_manager.stream_user_movies(user_id)
+        if rows == "error":
+            abort(404, description=f"User with ID {user_id} not found.")
+        mimetype, extension = EXPORT_FORMATS[file_format]
+        return Response(stream_with_context(write_records(rows, file_format)), mimetype=mimetype,
+                        headers={"Content-Disposition": f"attachment; filename=movies-user-{user_id}.{extension}"})
+
+    @api.route("/users/<int:user_id>/movies/import", methods=["POST"])
+    def import_user_movies(user_id):
+        """
+        Imports an exported list sent as the request body, parsed while it is read.
+
+        Query args:
+            format (str): "jsonl" or "csv", taken from the Content-Type if missing.
+        """
+        file_format = request.args.get("format") or ("csv" if request.mimetype == "text/csv" else "jsonl")
+        if file_format not in EXPORT_FORMATS:
+            abort(400, description=f"Unknown format: {file_format}")
+        summary = data_manager.import_user_movies(user_id, read_records(request.stream, file_format))
+        if summary == "error":
+            abort(404, description=f"User with ID {user_id} not found.")
+        return jsonify(summary), 200
+
+    @api.route("/users/<int:user_id>/stats", methods=["GET"])
+    def get_user_stats(user_id):
+        """Returns a user's movie count, average rating and favourite directors and decades."""
+        def render():
+            stats = data_manager.get_user_stats(user_id, request.args.get("top", 5, type=int))
+            if stats == "error":
+                abort(404, description=f"User with ID {user_id} not found.")
+            if stats is None:
+                abort(500, description="The statistics could not be loaded.")
+            return stats
+
+        return cached_json(f"user:{user_id}", render)
+
+    @api.route("/users/<int:user_id>/recommendations", methods=["GET"])
+    def get_recommendations(user_id):
+        """
+        Returns the movies most similar to a user's list that are not in it yet, with their scores.
+
+        Query args:
+            limit (int): Number of movies (max 200).
+            fields (str): Comma separated movie fields.
+        """
+        fields = _requested_fields(MOVIE_FIELDS)
+        movies = data_manager.get_recommendations(user_id, request.args.get("limit", 10, type=int))
+        if movies == "error":
+            abort(404, description=f"User with ID {user_id} not found.")
+        return {"items": [{**_to_dict(movie, MOVIE_FIELDS, fields), "score": round(movie.score, 4)}
+                          for movie in movies]}
+
+    @api.route("/stats/movies", methods=["GET"])
+    def get_most_favourited_movies():
+        """
+        Returns the movies that are in the most users' lists.
+
+        Query args:
+            limit (int): Number of movies (max 200).
+            fields (str): Comma separated movie fields.
+        """
+        fields = _requested_fields(MOVIE_FIELDS)
+
+        def render():
+            movies = data_manager.get_most_favourited_movies(request.args.get("limit", 10, type=int))
+            return {"items": [{**_to_dict(movie, MOVIE_FIELDS, fields), "user_count": movie.user_count}
+                              for movie in movies]}
+
+        return cached_json("stats", render)
+
+    @api.route("/movies/search", methods=["GET"])
+    def search_movies():
+        """
+        Searches titles and directors, best matches first, with prefix and typo-tolerant matching.
+
+        Query args:
+            q (str): The search query.
+            user_id (int): Only search the movies of this user.
+            limit (int): Maximum number of results (max 200).
+            fields (str): Comma separated movie fields.
+        """
+        fields = _requested_fields(MOVIE_FIELDS)
+        search_query = request.args.get("q", "").strip()
+        if not search_query:
+            abort(400, description="The query arg 'q' is missing.")
+        user_id = request.args.get("user_id", type=int)
+
+        def render():
+            movies = data_manager.search_movies(search_query, user_id, request.args.get("limit", 20, type=int))
+            return {"items": [_to_dict(movie, MOVIE_FIELDS, fields) for movie in movies]}
+
+        if user_id is not None:
+            return cached_json(f"user:{user_id}", render)
+        return cached_response(None, None, None, lambda: (current_app.json.dumps(render()), 200),
+                               "application/json")
+
+    @api.route("/movies/<int:movie_id>", methods=["GET"])
+    def get_movie(movie_id):
+        """
+        Returns a single movie.
+
+        Query args:
+            fields (str): Comma separated movie fields, e.g. "title,poster_url".
+        """
+        fields = _requested_fields(MOVIE_FIELDS)
+
+        def render():
+            movie = data_manager.get_movie(movie_id, fields)
+            if movie == "error":
+                abort(404, description=f"Movie with ID {movie_id} not found.")
+            return _to_dict(movie, MOVIE_FIELDS, fields)
+
+        # Movies are not grouped in the page cache, the answer still gets an ETag
+        return cached_response(None, None, None, lambda: (current_app.json.dumps(render()), 200),
+                               "application/json")
+
+    @api.after_request
+    def _compress(response):
+        return compress_response(response, request.accept_encodings)
+
+    def _json_error(e):
+        return jsonify({"error": e.description}), e.code
+
+    # The codes are registered one by one, the app's own 400/404/500 handlers would render HTML first
+    api.register_error_handler(HTTPException, _json_error)
+    for code in (400, 404, 405, 409, 500):
+        api.register_error_handler(code, _json_error)
+
+    return api
+
+
+def _requested_fields(allowed_fields):
+    """
+    Reads the ?fields= query arg.
+
+    Returns:
+        list: The requested fields, or None if all fields are requested.
+    """
+    fields = request.args.get("fields")
+    if not fields:
+        return None
+    fields = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown_fields = [field for field in fields if field not in allowed_fields]
+    if unknown_fields:
+        abort(400, description=f"Unknown fields: {', '.join(unknown_fields)}")
+    return fields
+
+
+def _call_or_400(method, *args):
+    """Calls a data manager method, answering an invalid cursor or sort order with a 400."""
+    try:
+        result = method(*args)
+    except ValueError as e:
+        abort(400, description=str(e))
+    if result is None:
+        abort(500, description="A database error occurred.")
+    return result
+
+
+def _to_dict(item, allowed_fields, fields=None):
+    """Converts a user or movie to a dict with its ID and the requested fields."""
+    return {field: getattr(item, field) for field in allowed_fields if field == "id" or fields is None or field in fields}
+
+
+def _page_to_dict(page, allowed_fields, fields):
+    """Converts a page returned by the data manager to the JSON answer."""
+    return {
+        "items": [_to_dict(item, allowed_fields, fields) for item in page["items"]],
+        "next_cursor": page["next_cursor"],
+        "prev_cursor": page["prev_cursor"],
+    }
+
+
+def _json_body():
+    """Returns the JSON object of the request body, or answers with a 400."""
+    body = request.get_json(silent=True)
+    if not isinstance(body, dict):
+        abort(400, description="The request body must be a JSON object.")
+    return body
@@ -1,73 +1,508 @@
+import atexit
 import os
-from flask import Flask, render_template, request, redirect, url_for
+import threading
+import time
+import click
+from dotenv import load_dotenv
+from flask import Flask, Response, abort, current_app, jsonify, render_template, request, redirect, send_file, stream_with_context, url_for
+from flask.cli import with_appcontext
 from flask_cors import CORS
+from jinja2 import FileSystemBytecodeCache
+from werkzeug.local import LocalProxy
+from api.v1 import create_api_blueprint
 from datamanager.data_models import db
+from datamanager.favourites_io import EXPORT_FORMATS, read_records, write_records
+from datamanager.lookup_queue import MovieLookupQueue
+from datamanager.migrations import apply_migrations
+from datamanager.read_model import CatalogReadModel
+from datamanager.sqlite_tuning import apply_sqlite_pragmas, pool_options_from_env, sqlite_pragmas_from_env
+from monitoring.instrumentation import init_instrumentation
+from omdbapi.API_Movies import get_omdb_client
+from omdbapi.poster_urls import is_poster_url
+from pagecache.page_cache import MemoryPageCache, SQLitePageCache, cached_response
 from datamanager.SQLite_data_manager import SQLiteDataManager
 
-# Initialize Flask and CORS
-app = Flask(__name__)
-CORS(app)
 
-# Configuration function
-def configure_app(app):
+# Configuration function, values in config replace the ones from the environment
+def configure_app(app, config=None):
     current_directory = os.path.abspath(os.path.dirname(__file__))
     app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URI', f'sqlite:///{os.path.join(current_directory, "data", "library.sqlite")}')
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-
-# Initialize the database function
+    # The data manager follows the database: SQLite, or PostgreSQL (postgresql+psycopg://...) with an optional read replica
+    app.config['DATABASE_REPLICA_URI'] = os.getenv('DATABASE_REPLICA_URI', '')
+    # Seconds after a write during which the written user's reads stay on the primary
+    app.config['REPLICA_LAG_WINDOW'] = float(os.getenv('REPLICA_LAG_WINDOW', 5.0))
+    app.config['POSTER_CACHE_DIR'] = os.getenv('POSTER_CACHE_DIR', os.path.join(current_directory, "data", "posters"))
+    app.config['POSTER_CACHE_MAX_MB'] = int(os.getenv('POSTER_CACHE_MAX_MB', 200))
+    # "background" queues the OMDb lookup of added movies instead of waiting for it
+    app.config['OMDB_LOOKUP_MODE'] = os.getenv('OMDB_LOOKUP_MODE', 'sync')
+    app.config['OMDB_LOOKUP_WORKERS'] = int(os.getenv('OMDB_LOOKUP_WORKERS', 2))
+    # Adds a Server-Timing header with db/omdb/template times to every response
+    app.config['SERVER_TIMING'] = os.getenv('SERVER_TIMING', '0').lower() in ('1', 'true', 'yes', 'on')
+    # Cache of rendered user pages: "memory" (single worker), "sqlite" (shared by all workers) or "off"
+    app.config['PAGE_CACHE'] = os.getenv('PAGE_CACHE', 'memory')
+    app.config['PAGE_CACHE_PATH'] = os.getenv('PAGE_CACHE_PATH', os.path.join(current_directory, "data", "page_cache.sqlite"))
+    # In-memory copy of users, movies and lists for the read routes: "memory" or "off"
+    app.config['READ_MODEL'] = os.getenv('READ_MODEL', 'off')
+    app.config['READ_MODEL_SNAPSHOT'] = os.getenv('READ_MODEL_SNAPSHOT', os.path.join(current_directory, "data", "read_model.snapshot"))
+    app.config['READ_MODEL_CHECK_INTERVAL'] = float(os.getenv('READ_MODEL_CHECK_INTERVAL', 1.0))
+    # Production profile for SQLite: WAL, pragmas on every connection and a sized pool
+    app.config['SQLITE_TUNING'] = os.getenv('SQLITE_TUNING', '0').lower() in ('1', 'true', 'yes', 'on')
+    # Directory of compiled templates shared by all workers and restarts, empty compiles them in every process
+    app.config['JINJA_BYTECODE_CACHE'] = os.getenv('JINJA_BYTECODE_CACHE', '')
+    # Builds the services and compiles the templates on ASGI startup instead of on the first requests
+    app.config['WARMUP'] = os.getenv('WARMUP', '0').lower() in ('1', 'true', 'yes', 'on')
+    app.config.update(config or {})
+    if app.config['DATABASE_REPLICA_URI']:
+        app.config['SQLALCHEMY_BINDS'] = {'replica': app.config['DATABASE_REPLICA_URI']}
+    if app.config['SQLITE_TUNING']:
+        app.config.setdefault('SQLITE_PRAGMAS', sqlite_pragmas_from_env())
+    if app.config['SQLITE_TUNING'] or app.config['SQLALCHEMY_DATABASE_URI'].startswith('postgresql'):
+        app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', pool_options_from_env())
+
+# Initialize the database function, brings the schema up to date with the versioned migrations
 def initialize_database(app, db):
-    db.init_app(app)
     with app.app_context():
-        db.create_all()
+        if app.config.get('SQLITE_TUNING') and db.engine.dialect.name == 'sqlite':
+            apply_sqlite_pragmas(db.engine, app.config['SQLITE_PRAGMAS'])
+        apply_migrations(db.engine)
+        return db.engine.dialect.name
+
+
+class AppServices:
+    """
+    The data manager, caches and OMDb client of an app, each built on first use.
+
+    Creating the app only reads its configuration, so importing it and booting a worker is quick and
+    nothing touches the database before the first request that needs it. warmup() builds everything
+    ahead, e.g. before a worker accepts requests.
+    """
+
+    def __init__(self, app):
+        """
+        Args:
+            app: The Flask app, configured and initialized with db.
+        """
+        self.app = app
+        self.metrics_registry = None
+        self._services = {}
+        self._lock = threading.RLock()
+
+
+    @property
+    def database_backend(self):
+        """The dialect name of the database, "sqlite" or "postgresql", once its schema is up to date."""
+        return self._get('database_backend', lambda: initialize_database(self.app, db))
+
+
+    @property
+    def page_cache(self):
+        """The cache of rendered pages, None if PAGE_CACHE is "off"."""
+        return self._get('page_cache', self._build_page_cache)
+
+
+    @property
+    def data_manager(self):
+        """The data manager, with the lookup workers started in background lookup mode."""
+        return self._get('data_manager', self._build_data_manager)
+
+
+    @property
+    def lookup_queue(self):
+        """The background lookup queue, None unless OMDB_LOOKUP_MODE is "background"."""
+        return self.data_manager.lookup_queue
+
+
+    @property
+    def read_model(self):
+        """The in-memory read model, None unless READ_MODEL is "memory"."""
+        return self.data_manager.read_model
+
+
+    @property
+    def poster_cache(self):
+        """The cache of posters and their thumbnails."""
+        return self._get('poster_cache', self._build_poster_cache)
+
+
+    @property
+    def omdb_client(self):
+        """The OMDb client shared by the process, see get_omdb_client."""
+        return get_omdb_client()
+
+
+    def warmup(self):
+        """
+        Builds all services and compiles all templates, instead of leaving it to the first requests.
+
+        With JINJA_BYTECODE_CACHE set the compiled templates are written to the cache, so the next
+        processes load them instead of compiling.
+
+        Returns:
+            dict: The seconds spent per step: "data_manager" (includes the schema check), "page_cache",
+                  "poster_cache", "omdb_client" and "templates".
+        """
+        timings = {}
+        for name in ('data_manager', 'page_cache', 'poster_cache', 'omdb_client'):
+            started_at = time.perf_counter()
+            getattr(self, name)
+            timings[name] = time.perf_counter() - started_at
+        started_at = time.perf_counter()
+        for template_name in self.app.jinja_env.list_templates():
+            self.app.jinja_env.get_template(template_name)
+        timings['templates'] = time.perf_counter() - started_at
+        return timings
+
+
+    def _get(self, name, build):
+        """Returns a service, building it on the first call. Threads asking meanwhile wait for the build."""
+        if name not in self._services:
+            with self._lock:
+                if name not in self._services:
+                    self._services[name] = build()
+        return self._services[name]
+
+    def _build_page_cache(self):
+        """Builds the page cache configured with PAGE_CACHE."""
+        if self.app.config['PAGE_CACHE'] == 'memory':
+            return MemoryPageCache()
+        if self.app.config['PAGE_CACHE'] == 'sqlite':
+            return SQLitePageCache(self.app.config['PAGE_CACHE_PATH'])
+        return None
+
+    def _build_data_manager(self):
+        """Checks the schema and builds the data manager of the database, with its queue, page cache and read model."""
+        app = self.app
+        database_backend = self.database_backend
+        lookup_queue = None
+        if app.config['OMDB_LOOKUP_MODE'] == 'background':
+            lookup_queue = MovieLookupQueue(app, db, worker_count=app.config['OMDB_LOOKUP_WORKERS'])
+        if database_backend == 'postgresql':
+            # Imported here, loading the PostgreSQL dialect would slow down every SQLite start
+            from datamanager.PostgreSQL_data_manager import PostgreSQLDataManager
+            with app.app_context():
+                replica_engine = db.engines['replica'] if app.config['DATABASE_REPLICA_URI'] else None
+            data_manager = PostgreSQLDataManager(db, replica_engine=replica_engine,
+                                                 replica_lag_window=app.config['REPLICA_LAG_WINDOW'],
+                                                 lookup_queue=lookup_queue, page_cache=self.page_cache)
+        else:
+            data_manager = SQLiteDataManager(db, lookup_queue=lookup_queue, page_cache=self.page_cache,
+                                             read_model=self._load_read_model(database_backend))
+        if lookup_queue is not None:
+            lookup_queue.start(data_manager.apply_movie_lookup)
+        return data_manager
+
+    def _load_read_model(self, database_backend):
+        """Loads the read model if READ_MODEL is "memory" and saves its snapshot on exit, None otherwise."""
+        if self.app.config['READ_MODEL'] != 'memory':
+            return None
+        if database_backend != 'sqlite':
+            print("READ_MODEL=memory only works with SQLite, the read model is off.")
+            return None
+        with self.app.app_context():
+            read_model = CatalogReadModel(db.engine, self.app.config['READ_MODEL_SNAPSHOT'] or None,
+                                          check_interval=self.app.config['READ_MODEL_CHECK_INTERVAL'])
+        read_model.load()
+        atexit.register(read_model.save_snapshot)
+        return read_model
+
+    def _build_poster_cache(self):
+        """Builds the poster cache, Pillow is only imported here."""
+        from omdbapi.poster_cache import PosterCache
+        return PosterCache(self.app.config['POSTER_CACHE_DIR'], self.app.config['POSTER_CACHE_MAX_MB'] * 1024 * 1024)
+
+
+def create_app(config=None):
+    """
+    Creates and configures the app, used by flask --app app, asgi.py and the benchmarks.
 
-# Set configuration and initialize database/
-configure_app(app)
-initialize_database(app, db)
-data_manager = SQLiteDataManager(db)
+    Nothing is connected or opened here: the schema check, the data manager, the caches and the OMDb
+    client are built on first use (see AppServices) and the templates are compiled on first render.
+    app.extensions['movieweb'].warmup(), the warmup command or WARMUP=1 with the ASGI server build them ahead.
+
+    Args:
+        config (dict): Config values that replace the ones from the environment, e.g. a DATABASE_URI.
+
+    Returns:
+        Flask: The app, its services in app.extensions['movieweb'].
+    """
+    load_dotenv()
+    app = Flask(__name__)
+    CORS(app)
+    configure_app(app, config)
+    if app.config['JINJA_BYTECODE_CACHE']:
+        # Has to be set before the first render creates the Jinja environment
+        os.makedirs(app.config['JINJA_BYTECODE_CACHE'], exist_ok=True)
+        app.jinja_options = {**app.jinja_options,
+                             'bytecode_cache': FileSystemBytecodeCache(app.config['JINJA_BYTECODE_CACHE'])}
+    db.init_app(app)
+    app_services = AppServices(app)
+    app.extensions['movieweb'] = app_services
+
+    # The API only needs to know whether there is a page cache, the cache itself is built on first use
+    api_page_cache = page_cache if app.config['PAGE_CACHE'] in ('memory', 'sqlite') else None
+    app.register_blueprint(create_api_blueprint(data_manager, api_page_cache), url_prefix='/api/v1')
+    for rule, view_function, options in ROUTES:
+        app.add_url_rule(rule, view_func=view_function, **options)
+    for code, handler in ERROR_HANDLERS:
+        app.register_error_handler(code, handler)
+    for command in CLI_COMMANDS:
+        app.cli.add_command(command)
+
+    metrics_registry = init_instrumentation(app, db, server_timing=app.config['SERVER_TIMING'])
+    metrics_registry.gauge('movieweb_omdb_cache_hits', 'OMDb lookups answered from the response cache.',
+                           lambda: sum(_omdb_stats('cache', 'memory_hits', 'disk_hits')))
+    metrics_registry.gauge('movieweb_omdb_cache_misses', 'OMDb lookups that had to go upstream.',
+                           lambda: sum(_omdb_stats('cache', 'misses')))
+    metrics_registry.gauge('movieweb_omdb_cache_evictions', 'Entries evicted from the in-process OMDb cache.',
+                           lambda: sum(_omdb_stats('cache', 'evictions')))
+    metrics_registry.gauge('movieweb_omdb_coalesced_lookups', 'OMDb lookups that shared a concurrent request.',
+                           lambda: sum(_omdb_stats('single_flight', 'coalesced')))
+    metrics_registry.gauge('movieweb_omdb_lease_waits', 'OMDb lookups that waited for another worker.',
+                           lambda: sum(_omdb_stats('single_flight', 'waited_for_worker')))
+    metrics_registry.gauge('movieweb_omdb_shared_failures', "OMDb lookups answered with another worker's failed lookup.",
+                           lambda: sum(_omdb_stats('single_flight', 'shared_failures')))
+    metrics_registry.gauge('movieweb_omdb_catalog_hits', 'OMDb lookups resolved from the local catalog.',
+                           lambda: sum(_omdb_stats('catalog', 'hits')))
+    metrics_registry.gauge('movieweb_omdb_catalog_misses', 'OMDb lookups the local catalog did not know.',
+                           lambda: sum(_omdb_stats('catalog', 'misses')))
+    if app.config['OMDB_LOOKUP_MODE'] == 'background':
+        metrics_registry.gauge('movieweb_lookup_queue_depth', 'Queued background OMDb lookups.',
+                               lambda: app_services.lookup_queue.get_metrics()['depth'])
+        metrics_registry.gauge('movieweb_lookup_queue_oldest_age_seconds', 'Age of the oldest queued lookup.',
+                               lambda: app_services.lookup_queue.get_metrics()['oldest_queued_age_seconds'])
+    app_services.metrics_registry = metrics_registry
+    return app
+
+
+def _omdb_stats(part, *counters):
+    """Returns counters of the OMDb client's cache, catalog or single flight, zeros if the part is disabled."""
+    component = getattr(get_omdb_client(), part)
+    if component is None:
+        return [0 for _ in counters]
+    stats = component.get_stats()
+    return [stats[counter] for counter in counters]
+
+
+# The services of the current app, for the routes and commands below
+services = LocalProxy(lambda: current_app.extensions['movieweb'])
+data_manager = LocalProxy(lambda: services.data_manager)
+page_cache = LocalProxy(lambda: services.page_cache)
+
+# Routes, error handlers and CLI commands, registered on every app by create_app
+ROUTES = []
+ERROR_HANDLERS = []
+CLI_COMMANDS = []
+
+
+def route(rule, **options):
+    """Registers a view function for every app of create_app, takes the arguments of Flask.route."""
+    def decorator(view_function):
+        ROUTES.append((rule, view_function, options))
+        return view_function
+    return decorator
+
+
+def errorhandler(code):
+    """Registers an error handler for every app of create_app, like Flask.errorhandler."""
+    def decorator(handler):
+        ERROR_HANDLERS.append((code, handler))
+        return handler
+    return decorator
+
+
+def cli_command(name):
+    """Registers a command running in an app context for every app of create_app, like Flask's app.cli.command."""
+    def decorator(function):
+        command = click.command(name)(with_appcontext(function))
+        CLI_COMMANDS.append(command)
+        return command
+    return decorator
+
+
+def cached_page(group, render_page):
+    """
+    Serves a page from the page cache, rendering and storing it on a miss.
+
+    Responses carry an ETag and Last-Modified, so browsers revalidate with a cheap 304.
+    Pages showing an action_result message are never cached. The path is part of the variant,
+    so pages of the same group (e.g. a user's list and statistics) are cached separately.
+
+    Args:
+        group (str): The invalidation group of the page, e.g. "users" or "user:3".
+        render_page (callable): Renders the page, returns (html, status code).
+    """
+    if services.page_cache is None or request.args.get('action_result'):
+        return render_page()
+    return cached_response(page_cache, group, request.path + '?' + request.query_string.decode('utf-8'), render_page)
 
 
 # Flask Routes
-@app.route('/')
+@route('/')
 def home():
     """Renders the home page of the application."""
     return render_template('home.html'), 200
 
 
-@app.route('/users')
+@route('/users')
 def list_users():
     """
-    Renders a list of all users.
+    Renders a page of users.
 
-    This route fetches all users from the data manager and passes them to
+    This route fetches one page of users from the data manager and passes them to
     the 'users.html' template. The users are displayed in
-    a list format.
+    a list format with links to the previous and next page.
+
+    Query args:
+        cursor (str): Opaque cursor of the page to show, first page if missing.
+        page_size (int): Number of users per page.
     """
-    users = data_manager.get_all_users()
-    return render_template('users.html', users=users), 200
+    def render_page():
+        try:
+            users_page = data_manager.get_users_page(request.args.get('cursor'),
+                                                     request.args.get('page_size', 50, type=int))
+        except ValueError as e:
+            abort(400, description=str(e))
+        return render_template('users.html', users=users_page['items'], page=users_page), 200
+
+    return cached_page('users', render_page)
 
 
-@app.route('/users/<int:user_id>')
+@route('/users/<int:user_id>')
 def list_user_movies(user_id):
     """
-    Renders a list of movies for a specific user.
+    Renders a page of movies for a specific user.
 
-    This route retrieves the movies associated with the user (identified by
+    This route retrieves one page of the movies associated with the user (identified by
     user_id) and displays them in the 'user_favourites.html' template. It shows
     the movie title, director, publication year, and rating (if available).
     Users can also delete or update movies with buttons.
 
+    Args:
+        user_id (int): The ID of the user.
+
+    Query args:
+        sort (str): "title", "year" or "rating".
+        cursor (str): Opaque cursor of the page to show, first page if missing.
+        page_size (int): Number of movies per page.
+        q (str): Search query, shows the best matching movies of the user instead of a page.
+    """
+    def render_page():
+        user = data_manager.get_user(user_id)
+        action_result = request.args.get('action_result')
+        if user == "error":
+            return render_template('404.html'), 404
+        sort = request.args.get('sort', 'title')
+        search_query = request.args.get('q', '').strip()
+        if search_query:
+            movies = data_manager.search_movies(search_query, user_id=user_id,
+                                                limit=request.args.get('page_size', 24, type=int))
+            movies_page = {'items': movies, 'next_cursor': None, 'prev_cursor': None}
+        else:
+            try:
+                movies_page = data_manager.get_user_movies_page(user_id, sort, request.args.get('cursor'),
+                                                                request.args.get('page_size', 24, type=int))
+            except ValueError as e:
+                abort(400, description=str(e))
+        return render_template('user_favourites.html', user_movies=movies_page['items'], page=movies_page,
+                               sort=sort, user=user, user_id=user_id, action_result=action_result,
+                               search_query=search_query), 200
+
+    return cached_page(f'user:{user_id}', render_page)
+
+
+@route('/users/<int:user_id>/stats')
+def user_stats(user_id):
+    """
+    Renders a user's statistics: movie count, average rating and favourite directors and decades.
+
+    The numbers come from the precomputed summary tables, not from aggregating the user's list.
+
+    Args:
+        user_id (int): The ID of the user.
+    """
+    def render_page():
+        user = data_manager.get_user(user_id)
+        stats = data_manager.get_user_stats(user_id)
+        if user == "error" or stats in ("error", None):
+            return render_template('404.html'), 404
+        return render_template('user_stats.html', user=user, stats=stats), 200
+
+    return cached_page(f'user:{user_id}', render_page)
+
+
+@route('/users/<int:user_id>/recommendations')
+def user_recommendations(user_id):
+    """
+    Renders the movies most similar to a user's list that are not in it yet.
+
+    Not page cached: the page is a lookup of the precomputed neighbours and changes with every
+    refresh of the recommendations, not only with the user's list.
+
     Args:
         user_id (int): The ID of the user.
     """
     user = data_manager.get_user(user_id)
-    action_result = request.args.get('action_result')
-    user_movies = data_manager.get_user_movies(user_id)
-    if user_movies == "error":
+    movies = data_manager.get_recommendations(user_id, request.args.get('limit', 10, type=int))
+    if user == "error" or movies == "error":
         return render_template('404.html'), 404
-    return render_template('user_favourites.html', user_movies=user_movies, user=user, user_id=user_id, action_result=action_result), 200
+    return render_template('recommendations.html', user=user, movies=movies), 200
+
+
+@route('/stats')
+def movie_stats():
+    """Renders the movies that are in the most users' lists."""
+    def render_page():
+        movies = data_manager.get_most_favourited_movies(request.args.get('limit', 10, type=int))
+        return render_template('stats.html', movies=movies), 200
+
+    return cached_page('stats', render_page)
+
+
+@route('/posters/<int:movie_id>')
+def poster(movie_id):
+    """
+    Serves a resized thumbnail of a movie's poster from the local poster cache.
+
+    The poster is downloaded once, later requests are answered from disk. WebP is served
+    to browsers that accept it, JPEG otherwise. Responses carry an ETag and a long-lived
+    Cache-Control header.
 
+    Args:
+        movie_id (int): The ID of the movie.
 
-@app.route('/add_user', methods=['GET', 'POST']) # add_user 4
+    Query args:
+        w (int): Requested width in pixels, snapped to the available thumbnail widths.
+    """
+    movie = data_manager.get_movie(movie_id)
+    if movie == "error" or not is_poster_url(movie.poster_url):
+        abort(404)
+    poster_cache = services.poster_cache
+    image_format = 'webp' if 'image/webp' in request.headers.get('Accept', '') and poster_cache.supports('webp') else 'jpeg'
+    thumbnail = poster_cache.get_thumbnail(movie.poster_url, request.args.get('w', 200, type=int), image_format)
+    if thumbnail is None:
+        abort(404)
+    path, mimetype, etag = thumbnail
+    response = send_file(path, mimetype=mimetype, etag=etag, max_age=30 * 24 * 3600, conditional=True)
+    response.vary.add('Accept')
+    return response
+
+
+@route('/metrics')
+def metrics():
+    """Returns request, SQL, OMDb and template metrics in the Prometheus text format."""
+    return Response(services.metrics_registry.render(), mimetype='text/plain; version=0.0.4'), 200
+
+
+@route('/lookup_queue/metrics')
+def lookup_queue_metrics():
+    """Returns depth and latency metrics of the background OMDb lookup queue as JSON."""
+    if services.lookup_queue is None:
+        abort(404)
+    return jsonify(services.lookup_queue.get_metrics()), 200
+
+
+@route('/add_user', methods=['GET', 'POST']) # add_user 4
 def add_user():
     """
     Renders a form to add a new user.
@@ -91,7 +526,7 @@ def add_user():
         return render_template('home.html', success_message=success_message), 201
 
 
-@app.route('/users/<int:user_id>/add_movie', methods=['GET', 'POST']) # add_movie_to_user 5
+@route('/users/<int:user_id>/add_movie', methods=['GET', 'POST']) # add_movie_to_user 5
 def add_movie_to_user(user_id):
     """
     Renders a form to add a new movie to a user's movie list and handles the form.
@@ -112,7 +547,82 @@ def add_movie_to_user(user_id):
         return redirect(url_for('list_user_movies', action_result=action_result, user_id=user_id))
 
 
-@app.route('/users/<int:user_id>/remove_movie/<int:movie_id>', methods=['POST'])
+@route('/users/<int:user_id>/import_movies', methods=['GET', 'POST'])
+def import_movies_to_user(user_id):
+    """
+    Renders a form to import many movies at once and shows a per-title result report.
+
+    - GET request: Displays the import form ('import_movies.html').
+    - POST request: Reads the titles (one per line) from the text field and/or an uploaded
+      text file, imports them in one go and renders the report.
+
+    Args:
+        user_id (int): The ID of the user to which the movies will be added.
+    """
+    user = data_manager.get_user(user_id)
+    if user == "error":
+        return render_template('404.html'), 404
+    if request.method == 'GET':
+        return render_template('import_movies.html', user=user), 200
+
+    if request.method == 'POST':
+        movie_names = request.form.get('movie_names', '').splitlines()
+        movie_file = request.files.get('movie_file')
+        if movie_file and movie_file.filename:
+            movie_names.extend(movie_file.read().decode('utf-8', errors='replace').splitlines())
+        report = data_manager.add_movies_to_user(user_id, movie_names)
+        if report == "error":
+            return render_template('500.html'), 500
+        return render_template('import_movies.html', user=user, report=report), 200
+
+
+@route('/users/<int:user_id>/import_list', methods=['POST'])
+def import_user_list(user_id):
+    """
+    Restores a list exported with export_user_movies into the user's collection.
+
+    The uploaded file is parsed line by line and written in batches, without OMDb lookups.
+    The format is taken from the file name, .csv or .jsonl/.ndjson.
+
+    Args:
+        user_id (int): The ID of the user to which the movies will be added.
+    """
+    user = data_manager.get_user(user_id)
+    if user == "error":
+        return render_template('404.html'), 404
+    list_file = request.files.get('list_file')
+    if not list_file or not list_file.filename:
+        return render_template('import_movies.html', user=user), 400
+    file_format = 'csv' if list_file.filename.lower().endswith('.csv') else 'jsonl'
+    summary = data_manager.import_user_movies(user_id, read_records(list_file.stream, file_format))
+    if summary == "error":
+        return render_template('500.html'), 500
+    return render_template('import_movies.html', user=user, summary=summary), 200
+
+
+@route('/users/<int:user_id>/export')
+def export_user_movies(user_id):
+    """
+    Downloads the user's movie list as CSV or JSON lines.
+
+    The rows are read from the database while the response is sent (chunked), so memory use
+    does not depend on the length of the list.
+
+    Query args:
+        format (str): "csv" (default) or "jsonl".
+    """
+    file_format = request.args.get('format', 'csv')
+    if file_format not in EXPORT_FORMATS:
+        abort(400)
+    rows = data_manager.stream_user_movies(user_id)
+    if rows == "error":
+        return render_template('404.html'), 404
+    mimetype, extension = EXPORT_FORMATS[file_format]
+    return Response(stream_with_context(write_records(rows, file_format)), mimetype=mimetype,
+                    headers={'Content-Disposition': f'attachment; filename=movies-user-{user_id}.{extension}'})
+
+
+@route('/users/<int:user_id>/remove_movie/<int:movie_id>', methods=['POST'])
 def remove_movie_from_user(movie_id, user_id):
     """
     Removes a movie from a user's favourites and redirects to the user's movie list.
@@ -129,7 +639,7 @@ def remove_movie_from_user(movie_id, user_id):
     return redirect(url_for('list_user_movies', action_result=action_result, user_id=user_id))
 
 
-@app.route('/users/<int:user_id>/update_movie/<int:movie_id>', methods=['GET', 'POST']) # update_movie 6
+@route('/users/<int:user_id>/update_movie/<int:movie_id>', methods=['GET', 'POST']) # update_movie 6
 def update_movie(movie_id, user_id):
     """
     Updates the details of a specific movie for a user.
@@ -144,7 +654,7 @@ def update_movie(movie_id, user_id):
     """
     if request.method == 'GET':
         user = data_manager.get_user(user_id)
-        movie = data_manager.get_movie(movie_id)
+        movie = data_manager.get_movie(movie_id, user_id=user_id)
         if user == "error" or movie == "error":
             return render_template('404.html'), 404
 
@@ -159,23 +669,103 @@ def update_movie(movie_id, user_id):
         return redirect(url_for('list_user_movies', action_result=action_result, user_id=user_id))
 
 
-@app.errorhandler(400)
+@cli_command('import-catalog')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'file_format', type=click.Choice(['jsonl', 'csv', 'tsv']),
+              help='Format of the dump, taken from the file name by default.')
+@click.option('--batch-size', default=5000, show_default=True, help='Rows per insert batch.')
+def import_catalog(path, file_format, batch_size):
+    """
+    Bulk-loads an OMDb/IMDb-style dump (JSONL, CSV or TSV, optionally .gz) into the local catalog.
+
+    Reports the import throughput and how many titles of the current library the catalog resolves.
+    """
+    catalog = services.omdb_client.catalog
+    if catalog is None:
+        raise click.ClickException('The catalog is disabled, set OMDB_CATALOG_PATH.')
+    try:
+        result = catalog.import_file(path, file_format, batch_size,
+                                     progress=lambda imported: click.echo(f'{imported} rows imported...'))
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    click.echo(f"Imported {result['imported']} rows ({result['skipped']} skipped) in {result['seconds']:.1f}s, "
+               f"{result['rows_per_second']:.0f} rows/s. The catalog holds {catalog.count()} movies.")
+    titles = [movie.title for movie in data_manager.get_all_movies() or [] if movie.lookup_status == 'ready']
+    if titles:
+        known, total = catalog.count_known_titles(titles)
+        click.echo(f'Catalog hit rate for the current library: {known}/{total} titles '
+                   f'({known / total:.0%}) resolve without OMDb.')
+
+
+@cli_command('rebuild-stats')
+def rebuild_stats():
+    """Recomputes the statistics summary tables from all lists, e.g. to backfill them after a bulk load."""
+    result = data_manager.rebuild_stats()
+    if result == "error":
+        raise click.ClickException('The statistics could not be rebuilt.')
+    click.echo(f"Rebuilt the statistics: {result['user_stats']} users, {result['user_director_stats']} "
+               f"user/director and {result['user_decade_stats']} user/decade counts, "
+               f"{result['movie_favourite_counts']} movies.")
+
+
+@cli_command('compact-movies')
+def compact_movies():
+    """
+    Folds the movie copies that editing created before per-user overrides existed back into canonical movies.
+
+    Every user keeps seeing the same data, their edits become overrides of the canonical movie.
+    """
+    result = data_manager.compact_movies()
+    if result == "error":
+        raise click.ClickException('The movies could not be compacted, nothing was changed.')
+    click.echo(f"Folded {result['removed']} duplicated movies into {result['groups']} canonical movies, "
+               f"{result['overrides']} user overrides created.")
+
+
+@cli_command('refresh-recommendations')
+@click.option('--full', is_flag=True, help='Recompute the neighbours of all movies, not only of the changed ones.')
+def refresh_recommendations(full):
+    """
+    Recomputes the neighbours of the recommendations from the lists changed since the last refresh.
+
+    Run it on a schedule, e.g. every few minutes from cron, with --full once a night.
+    """
+    result = data_manager.refresh_recommendations(full)
+    if result == "error":
+        raise click.ClickException('The recommendations could not be refreshed.')
+    click.echo(f"Recomputed the neighbours of {result['movies']} movies{' (full)' if result['full'] else ''}: "
+               f"{result['neighbours']} neighbours from {result['favourites']} favourites in {result['seconds']:.1f}s, "
+               f"matrix {result['matrix_bytes'] / 1024 / 1024:.1f} MB.")
+
+
+@cli_command('warmup')
+def warmup_app():
+    """
+    Builds the data manager, caches and OMDb client and compiles all templates, then reports the time of each step.
+
+    With JINJA_BYTECODE_CACHE set, run it once per deploy so the workers load compiled templates instead of compiling.
+    """
+    timings = services.warmup()
+    click.echo('Warmed up in ' + ', '.join(f'{name} {seconds * 1000:.0f} ms' for name, seconds in timings.items()) + '.')
+
+
+@errorhandler(400)
 def internal_server_error(e):
     return render_template('400.html', e=e), 400
 
 
-@app.errorhandler(404)
+@errorhandler(404)
 def page_not_found(e):
     return render_template('404.html', e=e), 404
 
 
-@app.errorhandler(500)
+@errorhandler(500)
 def internal_server_error(e):
     return render_template('500.html', e=e), 500
 
 
 if __name__ == '__main__':
-    app.run(host="127.0.0.1", port=5000, debug=True)
+    create_app().run(host="127.0.0.1", port=5000, debug=True)
 
 
 
@@ -0,0 +1,302 @@
+import asyncio
+import io
+import itertools
+import json
+import os
+import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlencode
+from werkzeug.local import LocalProxy
+from app import create_app
+from omdbapi.async_client import AsyncOMDbClient
+
+
+def _path_info(scope):
+    """Returns the request path below the root path the app is mounted at."""
+    root_path = scope.get("root_path", "")
+    if root_path and scope["path"].startswith(root_path):
+        return scope["path"][len(root_path):]
+    return scope["path"]
+
+
+class WSGIBridge:
+    """
+    Serves ASGI HTTP requests with a WSGI app, running it in a thread pool.
+
+    The response is streamed: every chunk of the WSGI body is sent as soon as the app yields it.
+    """
+
+    def __init__(self, wsgi_app, executor):
+        """
+        Args:
+            wsgi_app: The WSGI callable, e.g. app.wsgi_app.
+            executor (ThreadPoolExecutor): The threads running the WSGI app.
+        """
+        self.wsgi_app = wsgi_app
+        self.executor = executor
+
+
+    async def __call__(self, scope, body, send):
+        """Runs the WSGI app for the request and sends its response."""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self.executor, self._run, self._environ(scope, body), send, loop)
+
+
+    def _run(self, environ, send, loop):
+        """Calls the WSGI app in a worker thread and passes the response to the event loop."""
+        def send_message(message):
+            asyncio.run_coroutine_threadsafe(send(message), loop).result()
+
+        response_start = {}
+        written = []
+
+        def start_response(status, headers, exc_info=None):
+            response_start["status"] = int(status.split(" ", 1)[0])
+            response_start["headers"] = [(name.lower().encode("latin-1"), value.encode("latin-1"))
+                                         for name, value in headers]
+            return written.append
+
+        result = self.wsgi_app(environ, start_response)
+        started = False
+        try:
+            for chunk in itertools.chain(written, result):
+                if not started:
+                    send_message({"type": "http.response.start", **response_start})
+                    started = True
+                if chunk:
+                    send_message({"type": "http.response.body", "body": chunk, "more_body": True})
+            if not started:
+                send_message({"type": "http.response.start", **response_start})
+            send_message({"type": "http.response.body", "body": b"", "more_body": False})
+        finally:
+            if hasattr(result, "close"):
+                result.close()
+
+
+    def _environ(self, scope, body):
+        """Builds the WSGI environ of an ASGI HTTP scope."""
+        root_path = scope.get("root_path", "")
+        path = _path_info(scope)
+        server_name, server_port = scope.get("server") or ("localhost", 80)
+        environ = {
+            "REQUEST_METHOD": scope["method"],
+            "SCRIPT_NAME": root_path.encode("utf-8").decode("latin-1"),
+            "PATH_INFO": path.encode("utf-8").decode("latin-1"),
+            "QUERY_STRING": scope["query_string"].decode("latin-1"),
+            "SERVER_NAME": server_name,
+            "SERVER_PORT": str(server_port),
+            "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+            "REMOTE_ADDR": scope["client"][0] if scope.get("client") else "",
+            "wsgi.version": (1, 0),
+            "wsgi.url_scheme": scope.get("scheme", "http"),
+            "wsgi.input": io.BytesIO(body),
+            "wsgi.errors": sys.stderr,
+            "wsgi.multithread": True,
+            "wsgi.multiprocess": True,
+            "wsgi.run_once": False,
+        }
+        for name, value in scope["headers"]:
+            name, value = name.decode("latin-1"), value.decode("latin-1")
+            if name == "content-type":
+                key = "CONTENT_TYPE"
+            elif name == "content-length":
+                key = "CONTENT_LENGTH"
+            else:
+                key = "HTTP_" + name.upper().replace("-", "_")
+            environ[key] = f"{environ[key]},{value}" if key in environ else value
+        return environ
+
+
+class MovieWebASGI:
+    """
+    ASGI application of the MovieWeb app.
+
+    Adding a single movie, the only request that waits on OMDb, is handled natively: the OMDb
+    lookup runs on the event loop and the database work in a small thread pool. All other
+    routes are served by the Flask app through the WSGI bridge.
+    """
+
+    ADD_MOVIE_FORM = re.compile(r"^/users/(\d+)/add_movie$")
+    ADD_MOVIE_API = re.compile(r"^/api/v1/users/(\d+)/movies$")
+
+    def __init__(self, flask_app, data_manager, omdb_client, wsgi_threads=32, db_threads=8, max_connections=200,
+                 warmup=None):
+        """
+        Args:
+            flask_app: The Flask app.
+            data_manager (DataManagerInterface): The data manager of the app.
+            omdb_client (OMDbClient): The synchronous OMDb client whose configuration and caches are shared.
+            wsgi_threads (int): Threads serving the Flask routes.
+            db_threads (int): Threads running the database work of the native routes.
+            max_connections (int): Maximum number of concurrent connections to OMDb.
+            warmup (callable): Run in a thread on lifespan startup, before requests are accepted, or None.
+        """
+        self.flask_app = flask_app
+        self.data_manager = data_manager
+        self.omdb_client = omdb_client
+        self.warmup = warmup
+        self.max_connections = max_connections
+        self.async_omdb = None
+        self.db_executor = ThreadPoolExecutor(max_workers=db_threads, thread_name_prefix="asgi-db")
+        self.wsgi = WSGIBridge(flask_app.wsgi_app, ThreadPoolExecutor(max_workers=wsgi_threads,
+                                                                      thread_name_prefix="asgi-wsgi"))
+
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+        body = await self._read_body(receive)
+        if body is None:
+            return
+
+        path = _path_info(scope)
+        if scope["method"] == "POST":
+            form_route = self.ADD_MOVIE_FORM.match(path)
+            api_route = self.ADD_MOVIE_API.match(path)
+            if form_route and await self._add_movie_form(scope, body, send, int(form_route.group(1))):
+                return
+            if api_route and await self._add_movie_api(scope, body, send, int(api_route.group(1))):
+                return
+        await self.wsgi(scope, body, send)
+
+
+    async def _add_movie_form(self, scope, body, send, user_id):
+        """
+        Handles the form of /users/<user_id>/add_movie like the Flask route.
+
+        Returns:
+            bool: False if the request has to be served by the Flask route instead.
+        """
+        if not self._header(scope, "content-type").startswith("application/x-www-form-urlencoded"):
+            return False
+        movie_name = parse_qs(body.decode("utf-8", errors="replace")).get("movie_name")
+        if not movie_name:
+            return False
+        action_result = await self._add_movie(user_id, movie_name[0])
+        location = f"{scope.get('root_path', '')}/users/{user_id}"
+        if action_result is not None:
+            location += "?" + urlencode({"action_result": action_result})
+        await self._send_response(send, 302, b"", "text/html; charset=utf-8", [(b"location", location.encode("utf-8"))])
+        return True
+
+
+    async def _add_movie_api(self, scope, body, send, user_id):
+        """
+        Handles POST /api/v1/users/<user_id>/movies with a single title like the API blueprint.
+
+        Returns:
+            bool: False if the request has to be served by the Flask route instead.
+        """
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            return False
+        if not isinstance(payload, dict) or "titles" in payload:
+            return False
+        title = payload.get("title")
+        if not isinstance(title, str) or not title.strip():
+            return False
+        if await self._run_db(self.data_manager.get_user, user_id) == "error":
+            status, answer = 404, {"error": f"User with ID {user_id} not found."}
+        else:
+            action_result = await self._add_movie(user_id, title)
+            if action_result is None:
+                status, answer = 500, {"error": "The movie could not be added."}
+            else:
+                status, answer = 200, {"message": action_result}
+        await self._send_response(send, status, json.dumps(answer).encode("utf-8"), "application/json")
+        return True
+
+
+    async def _add_movie(self, user_id, movie_name):
+        """Adds a movie, looking it up on OMDb without blocking the event loop if needed."""
+        action_result = await self._run_db(self.data_manager.add_local_movie_to_user, user_id, movie_name)
+        if action_result is not None:
+            return action_result
+        if self.async_omdb is None:
+            self.async_omdb = AsyncOMDbClient(self.omdb_client, self.max_connections)
+        api_data = await self.async_omdb.fetch_movie(movie_name.strip())
+        return await self._run_db(self.data_manager.add_movie_to_user, user_id, movie_name, api_data)
+
+
+    async def _run_db(self, function, *args):
+        """Runs database work in the database thread pool inside a Flask app context."""
+        def run():
+            with self.flask_app.app_context():
+                return function(*args)
+
+        return await asyncio.get_running_loop().run_in_executor(self.db_executor, run)
+
+
+    async def _lifespan(self, receive, send):
+        """Warms up the app and opens the async OMDb client on startup, closes the client on shutdown."""
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                if self.warmup is not None:
+                    await asyncio.get_running_loop().run_in_executor(self.db_executor, self.warmup)
+                self.async_omdb = AsyncOMDbClient(self.omdb_client, self.max_connections)
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                if self.async_omdb is not None:
+                    await self.async_omdb.close()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+
+    async def _read_body(self, receive):
+        """Reads the complete request body, or returns None if the client disconnected."""
+        chunks = []
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return None
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                return b"".join(chunks)
+
+
+    async def _send_response(self, send, status, body, content_type, headers=()):
+        """Sends a complete response."""
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-type", content_type.encode("latin-1")),
+                        (b"content-length", str(len(body)).encode("latin-1")), *headers],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+    def _header(self, scope, name):
+        """Returns a request header as str, or an empty string."""
+        for header_name, value in scope["headers"]:
+            if header_name.decode("latin-1") == name:
+                return value.decode("latin-1")
+        return ""
+
+
+def create_asgi_app(flask_app):
+    """
+    Wraps an app of create_app, its data manager and OMDb client are still built on first use.
+
+    With WARMUP set, they are built and the templates compiled during lifespan startup instead.
+
+    Returns:
+        MovieWebASGI: The ASGI application.
+    """
+    services = flask_app.extensions["movieweb"]
+    return MovieWebASGI(
+        flask_app, LocalProxy(lambda: services.data_manager), LocalProxy(lambda: services.omdb_client),
+        wsgi_threads=int(os.getenv("ASGI_WSGI_THREADS", 32)),
+        db_threads=int(os.getenv("ASGI_DB_THREADS", 8)),
+        max_connections=int(os.getenv("OMDB_ASYNC_MAX_CONNECTIONS", 200)),
+        warmup=services.warmup if flask_app.config["WARMUP"] else None
+    )
+
+
+# The ASGI application, served by serve.py (or any ASGI server: uvicorn asgi:application)
+application = create_asgi_app(create_app())
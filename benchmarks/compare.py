@@ -0,0 +1,67 @@
+"""
+Compares two benchmark result files of benchmarks/run.py.
+
+Usage:
+    python -m benchmarks.compare baseline.json candidate.json [--threshold 10]
+"""
+import argparse
+import json
+import sys
+
+
+METRICS = ("p50_ms", "p95_ms", "p99_ms", "throughput_per_s", "queries_per_call")
+# For these metrics a higher value is better
+HIGHER_IS_BETTER = {"throughput_per_s"}
+
+
+def compare(baseline, candidate, threshold):
+    """
+    Prints the change of every metric per section and benchmark.
+
+    Args:
+        baseline (dict): The older results.
+        candidate (dict): The newer results.
+        threshold (float): Changes for the worse by more than this percentage count as regressions.
+
+    Returns:
+        list: (section, benchmark, metric, percent change) of every regression.
+    """
+    regressions = []
+    for section in ("data_manager", "http"):
+        old_section, new_section = baseline.get(section, {}), candidate.get(section, {})
+        for name in sorted(set(old_section) & set(new_section)):
+            changes = []
+            for metric in METRICS:
+                old_value, new_value = old_section[name].get(metric), new_section[name].get(metric)
+                if old_value is None or new_value is None:
+                    continue
+                change = (new_value - old_value) / old_value * 100 if old_value else 0.0
+                worse = -change if metric in HIGHER_IS_BETTER else change
+                marker = " !" if worse > threshold else ""
+                if worse > threshold:
+                    regressions.append((section, name, metric, change))
+                changes.append(f"{metric} {old_value:.2f} -> {new_value:.2f} ({change:+.1f}%){marker}")
+            print(f"{section}/{name}: " + ", ".join(changes))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compares two MovieWeb benchmark runs.")
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Regression threshold in percent.")
+    args = parser.parse_args(argv)
+    with open(args.baseline, encoding="utf-8") as baseline_file, open(args.candidate, encoding="utf-8") as candidate_file:
+        baseline, candidate = json.load(baseline_file), json.load(candidate_file)
+    if baseline["meta"]["scale"] != candidate["meta"]["scale"]:
+        print(f"Warning: comparing scale {baseline['meta']['scale']} with {candidate['meta']['scale']}")
+    if baseline["meta"].get("backend", "sqlite") != candidate["meta"].get("backend", "sqlite"):
+        print(f"Warning: comparing backend {baseline['meta'].get('backend', 'sqlite')} "
+              f"with {candidate['meta'].get('backend', 'sqlite')}")
+    regressions = compare(baseline, candidate, args.threshold)
+    print(f"{len(regressions)} regressions over {args.threshold}%")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,78 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+class FakeOMDbServer:
+    """
+    Local stand-in for the OMDb API with a configurable latency.
+
+    Every title is found, except titles starting with "missing", which get OMDb's "not found"
+    answer. Use it as a context manager; base_url is the URL to pass to OMDbClient.
+    """
+
+    def __init__(self, latency=0.05, host="127.0.0.1", port=0):
+        """
+        Args:
+            latency (float): Seconds every answer is delayed.
+            host (str): The interface to listen on.
+            port (int): The port, 0 picks a free one.
+        """
+        self.latency = latency
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/"
+
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-omdb", daemon=True)
+        self._thread.start()
+        return self
+
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+    def _handler_class(self):
+        """Returns the request handler class bound to this server."""
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                title = parse_qs(urlparse(self.path).query).get("t", [""])[0]
+                with fake._lock:
+                    fake.requests += 1
+                time.sleep(fake.latency)
+                if not title or title.lower().startswith("missing"):
+                    answer = {"Response": "False", "Error": "Movie not found!"}
+                else:
+                    answer = {
+                        "Title": title.title(),
+                        "Year": str(1950 + len(title) % 70),
+                        "Director": "Fake Director",
+                        "Poster": "N/A",
+                        "Ratings": [{"Source": "Internet Movie Database", "Value": f"{len(title) % 10}.5/10"}],
+                    }
+                body = json.dumps(answer).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
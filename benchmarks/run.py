@@ -0,0 +1,444 @@
+"""
+Benchmark suite of the MovieWeb app.
+
+Seeds a database with synthetic data, stubs OMDb with a local fake server, micro-benchmarks every
+DataManagerInterface method and drives the HTTP routes with a concurrent load generator. The
+results are written as JSON, compare two runs with benchmarks/compare.py.
+
+Usage:
+    python -m benchmarks.run --scale 100k --requests 5000 --concurrency 32
+    python -m benchmarks.run --scale 100k --database-url postgresql+psycopg://localhost/movieweb_benchmark
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import re
+import sqlite3
+import subprocess
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from benchmarks.fake_omdb import FakeOMDbServer
+from benchmarks.seed import SCALES, WORDS, seed_database, seed_postgresql_database
+from benchmarks.stats import summarize
+
+
+PROJECT_DIRECTORY = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+SERVER_TIMING_QUERIES = re.compile(r'desc="(\d+) queries"')
+# Pairs per call of the batch write methods
+BATCH_SIZE = 10
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks the MovieWeb data manager and HTTP routes.")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="1k", help="Size of the seeded database.")
+    parser.add_argument("--database", help="SQLite file to seed, data/benchmark-<scale>.sqlite by default.")
+    parser.add_argument("--database-url", help="PostgreSQL URL to seed and benchmark instead of the SQLite file, "
+                                               "the app's tables in it are replaced.")
+    parser.add_argument("--replica-url", help="PostgreSQL URL of a read replica of --database-url, "
+                                              "may be the same URL as a local stand-in.")
+    parser.add_argument("--reuse-database", action="store_true", help="Use the existing database without seeding.")
+    parser.add_argument("--output", help="JSON result file, benchmarks/results/<time>-<scale>.json by default.")
+    parser.add_argument("--iterations", type=int, default=200, help="Calls per data manager method.")
+    parser.add_argument("--max-seconds", type=float, default=5.0, help="Time limit per data manager method.")
+    parser.add_argument("--requests", type=int, default=2000, help="HTTP requests of the load test.")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent HTTP clients.")
+    parser.add_argument("--server", choices=("wsgi", "asgi"), default="wsgi", help="Server of the load test.")
+    parser.add_argument("--omdb-latency", type=float, default=0.05, help="Latency of the fake OMDb in seconds.")
+    parser.add_argument("--page-cache", choices=("memory", "sqlite", "off"), default="memory")
+    parser.add_argument("--read-model", choices=("memory", "off"), default="off", help="In-memory read model.")
+    parser.add_argument("--skip-recommendations", action="store_true",
+                        help="Skip the refresh of the recommendations (the data manager then measures empty ones).")
+    parser.add_argument("--skip-data-manager", action="store_true", help="Skip the micro-benchmarks.")
+    parser.add_argument("--skip-http", action="store_true", help="Skip the HTTP load test.")
+    parser.add_argument("--seed", type=int, default=42, help="Seed of the data and request generators.")
+    return parser.parse_args(argv)
+
+
+def load_app(database_uri, database_path, page_cache, read_model, replica_uri=None):
+    """Creates and warms up the app configured for the benchmark database, without the OMDb caches."""
+    os.environ.update({
+        "DATABASE_URI": database_uri,
+        "DATABASE_REPLICA_URI": replica_uri or "",
+        "OMDB_CACHE_PATH": "",
+        "OMDB_CATALOG_PATH": "",
+        "OMDB_LOOKUP_MODE": "sync",
+        "API_KEY": os.getenv("API_KEY", "benchmark"),
+        "PAGE_CACHE": page_cache,
+        "PAGE_CACHE_PATH": database_path + ".page_cache",
+        "READ_MODEL": read_model,
+        "READ_MODEL_SNAPSHOT": database_path + ".read_model",
+        "SERVER_TIMING": "1",
+    })
+    from app import create_app, db
+
+    app = create_app()
+    services = app.extensions["movieweb"]
+    warmup = services.warmup()
+    return SimpleNamespace(app=app, db=db, data_manager=services.data_manager, database_backend=services.database_backend,
+                           omdb_client=services.omdb_client, warmup=warmup)
+
+
+def sample_rows(database_uri, query, limit):
+    """Returns up to limit random rows of a query on the benchmark database."""
+    from sqlalchemy import create_engine, text
+
+    engine = create_engine(database_uri)
+    try:
+        with engine.connect() as connection:
+            return connection.execute(text(f"{query} ORDER BY random() LIMIT :limit"), {"limit": limit}).all()
+    finally:
+        engine.dispose()
+
+
+def benchmark_data_manager(movieweb, database_uri, args, generator):
+    """
+    Calls every DataManagerInterface method repeatedly and measures latency and SQL queries.
+
+    Every call runs in a fresh session, like a request, the preparation of its arguments is not measured.
+
+    Returns:
+        dict: The summary per method.
+    """
+    from sqlalchemy import event, insert
+    from datamanager.data_models import Movie, user_movie_association
+
+    app, db, data_manager = movieweb.app, movieweb.db, movieweb.data_manager
+    user_count, movie_count, _ = SCALES[args.scale]
+    sample_size = args.iterations * 2
+    titles = [row[0] for row in sample_rows(database_uri, "SELECT title FROM movies", sample_size)]
+    links = sample_rows(database_uri, "SELECT user_id, movie_id FROM user_movie", sample_size * (2 + 2 * BATCH_SIZE))
+    single_links, batch_links = links[:sample_size * 2], links[sample_size * 2:]
+    update_links, remove_links = single_links[:len(single_links) // 2], single_links[len(single_links) // 2:]
+    batches = [batch_links[start:start + BATCH_SIZE]
+               for start in range(0, len(batch_links) - BATCH_SIZE + 1, BATCH_SIZE)]
+    update_batches, remove_batches = batches[:len(batches) // 2], batches[len(batches) // 2:]
+    run_id = int(time.time())
+    query_count = [0]
+
+    def random_user():
+        return generator.randint(1, user_count)
+
+    def add_pending_movie(index):
+        movie = Movie(title=f"pending benchmark movie {run_id} {index}", director="", publication_year=0,
+                      lookup_status="pending")
+        db.session.add(movie)
+        db.session.flush()
+        db.session.execute(insert(user_movie_association).values(user_id=random_user(), movie_id=movie.id))
+        db.session.commit()
+        return movie.id, (f"Looked Up Movie {run_id} {index}", "2001", "7.5/10", "N/A", "Fake Director")
+
+    def apply_movie_lookup(movie_id, api_data):
+        # The lookup queue commits together with the job status
+        data_manager.apply_movie_lookup(movie_id, api_data)
+        db.session.commit()
+
+    cases = [
+        ("get_all_users", data_manager.get_all_users, lambda i: ()),
+        ("get_users_page", data_manager.get_users_page, lambda i: (None, 50)),
+        ("get_all_movies", data_manager.get_all_movies, lambda i: ()),
+        ("get_user_movies", data_manager.get_user_movies, lambda i: (random_user(),)),
+        ("get_user_movies_page", data_manager.get_user_movies_page,
+         lambda i: (random_user(), generator.choice(("title", "year", "rating")), None, 24)),
+        ("search_movies", data_manager.search_movies,
+         lambda i: (f"{generator.choice(WORDS)} {generator.choice(WORDS)[:3]}", None, 20)),
+        ("get_user", data_manager.get_user, lambda i: (random_user(),)),
+        ("get_movie", data_manager.get_movie, lambda i: (generator.randint(1, movie_count),)),
+        ("get_user_stats", data_manager.get_user_stats, lambda i: (random_user(),)),
+        ("get_most_favourited_movies", data_manager.get_most_favourited_movies, lambda i: (10,)),
+        ("get_recommendations", data_manager.get_recommendations, lambda i: (random_user(), 10)),
+        ("stream_user_movies", lambda user_id: sum(1 for _ in data_manager.stream_user_movies(user_id)),
+         lambda i: (random_user(),)),
+        ("add_user", data_manager.add_user, lambda i: (f"benchmark user {run_id} {i}",)),
+        ("add_local_movie_to_user", data_manager.add_local_movie_to_user,
+         lambda i: (random_user(), titles[i % len(titles)])),
+        ("add_movie_to_user", data_manager.add_movie_to_user,
+         lambda i: (random_user(), f"benchmark movie {run_id} {i}")),
+        ("add_movies_to_user", data_manager.add_movies_to_user,
+         lambda i: (random_user(), [f"benchmark import {run_id} {i} {n}" for n in range(10)])),
+        ("assign_movies_to_users", data_manager.assign_movies_to_users,
+         lambda i: ([(random_user(), generator.randint(1, movie_count)) for _ in range(BATCH_SIZE)],)),
+        ("apply_movie_lookup", apply_movie_lookup, add_pending_movie),
+        ("update_movie", data_manager.update_movie,
+         lambda i: (*update_links[i], "Updated Benchmark Movie", "Fake Director", "2001", "7.5")),
+        ("update_movies", data_manager.update_movies,
+         lambda i: ([{"user_id": user_id, "movie_id": movie_id, "title": "Updated Benchmark Movie",
+                      "director": "Fake Director", "publication_year": "2001", "rating": "7.5"}
+                     for user_id, movie_id in update_batches[i]],)),
+        ("import_user_movies", data_manager.import_user_movies,
+         lambda i: (random_user(), [(n, {"title": f"benchmark restore {run_id} {i} {n}", "director": "Fake Director",
+                                         "publication_year": 2001, "rating": 7.5}) for n in range(BATCH_SIZE)])),
+        ("remove_movie_from_favourites", data_manager.remove_movie_from_favourites,
+         lambda i: tuple(reversed(remove_links[i]))),
+        ("remove_movies_from_favourites", data_manager.remove_movies_from_favourites,
+         lambda i: (remove_batches[i],)),
+    ]
+    limits = {"update_movie": len(update_links), "remove_movie_from_favourites": len(remove_links),
+              "update_movies": len(update_batches), "remove_movies_from_favourites": len(remove_batches)}
+
+    def count_query(connection, cursor, statement, parameters, context, executemany):
+        query_count[0] += 1
+
+    results = {}
+    with app.app_context():
+        # The primary and, if configured, the read replica
+        engines = list(db.engines.values())
+        for engine in engines:
+            event.listen(engine, "before_cursor_execute", count_query)
+        try:
+            for name, method, make_args in cases:
+                latencies, queries, errors = [], [], 0
+                iterations = min(args.iterations, limits.get(name, args.iterations))
+                started_at = time.perf_counter()
+                for index in range(iterations):
+                    if time.perf_counter() - started_at > args.max_seconds:
+                        break
+                    call_args = make_args(index)
+                    query_count[0] = 0
+                    call_started_at = time.perf_counter()
+                    try:
+                        method(*call_args)
+                    except Exception as e:
+                        errors += 1
+                        print(f"{name} failed: {e}")
+                    latencies.append(time.perf_counter() - call_started_at)
+                    queries.append(query_count[0])
+                    db.session.remove()
+                results[name] = summarize(latencies, sum(latencies), queries, errors)
+                print(f"{name:32} p50 {results[name]['p50_ms']:8.2f} ms  p99 {results[name]['p99_ms']:8.2f} ms  "
+                      f"{results[name]['queries_per_call']:5.1f} queries")
+        finally:
+            for engine in engines:
+                event.remove(engine, "before_cursor_execute", count_query)
+    return results
+
+
+def benchmark_recommendations(movieweb, args, generator, changed_lists=100):
+    """
+    Measures a full refresh of the recommendations, its peak memory, and an incremental refresh after
+    changed_lists users added a movie.
+
+    The memory is the peak of the Python and NumPy allocations, traced in a second full refresh so
+    the tracing does not slow down the timed one.
+
+    Returns:
+        dict: The results of refresh_recommendations per run, "peak_memory_bytes" for the full one.
+    """
+    app, db, data_manager = movieweb.app, movieweb.db, movieweb.data_manager
+    user_count, movie_count, _ = SCALES[args.scale]
+    results = {}
+    with app.app_context():
+        results["full"] = data_manager.refresh_recommendations(full=True)
+        tracemalloc.start()
+        data_manager.refresh_recommendations(full=True)
+        results["full"]["peak_memory_bytes"] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        data_manager.assign_movies_to_users([(generator.randint(1, user_count), generator.randint(1, movie_count))
+                                             for _ in range(changed_lists)])
+        results["incremental"] = data_manager.refresh_recommendations()
+        db.session.remove()
+    for name, result in results.items():
+        print(f"refresh_recommendations {name:11} {result['seconds']:8.2f} s  {result['movies']:8} movies  "
+              f"{result['neighbours']:9} neighbours")
+    print(f"refresh_recommendations peak memory {results['full']['peak_memory_bytes'] / 1024 / 1024:.1f} MB, "
+          f"matrix {results['full']['matrix_bytes'] / 1024 / 1024:.1f} MB")
+    return results
+
+
+def start_server(movieweb, server_type):
+    """
+    Serves the app on a free local port in a background thread.
+
+    Returns:
+        tuple: The base URL and a function stopping the server.
+    """
+    if server_type == "asgi":
+        import socket
+        import uvicorn
+        import asgi
+        with socket.socket() as probe:
+            probe.bind(("127.0.0.1", 0))
+            port = probe.getsockname()[1]
+        server = uvicorn.Server(uvicorn.Config(asgi.create_asgi_app(movieweb.app), host="127.0.0.1", port=port,
+                                               log_level="warning", lifespan="on", backlog=2048))
+        threading.Thread(target=server.run, name="benchmark-asgi", daemon=True).start()
+        while not server.started:
+            time.sleep(0.05)
+
+        def stop():
+            server.should_exit = True
+        return f"http://127.0.0.1:{port}", stop
+
+    from werkzeug.serving import make_server
+    # One access log line per request would slow down the load test
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+    server = make_server("127.0.0.1", 0, movieweb.app, threaded=True)
+    threading.Thread(target=server.serve_forever, name="benchmark-wsgi", daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}", server.shutdown
+
+
+def benchmark_http(movieweb, args, generator):
+    """
+    Sends a weighted mix of requests with concurrent clients and measures every route.
+
+    The SQL queries per request are read from the Server-Timing header.
+
+    Returns:
+        dict: The summary per route and for all requests.
+    """
+    import requests
+
+    user_count, movie_count, _ = SCALES[args.scale]
+    lock = threading.Lock()
+    run_id = int(time.time())
+
+    def user_page():
+        return "GET", f"/users/{generator.randint(1, user_count)}?sort={generator.choice(('title', 'year', 'rating'))}", None
+
+    def api_movies():
+        return "GET", f"/api/v1/users/{generator.randint(1, user_count)}/movies?fields=title,rating", None
+
+    def search():
+        return "GET", f"/api/v1/movies/search?q={generator.choice(WORDS)}+{generator.choice(WORDS)[:3]}", None
+
+    def movie_detail():
+        return "GET", f"/api/v1/movies/{generator.randint(1, movie_count)}", None
+
+    def add_movie():
+        return "POST", f"/users/{generator.randint(1, user_count)}/add_movie", \
+            {"movie_name": f"load test movie {run_id} {generator.randint(0, 10 ** 9)}"}
+
+    # Route name: (weight, request factory), the factories are called with the lock held
+    routes = {
+        "GET /users": (2, lambda: ("GET", "/users", None)),
+        "GET /users/<id>": (4, user_page),
+        "GET /api/v1/users/<id>/movies": (3, api_movies),
+        "GET /api/v1/movies/search": (2, search),
+        "GET /api/v1/movies/<id>": (2, movie_detail),
+        "GET /users/<id>/stats": (1, lambda: ("GET", f"/users/{generator.randint(1, user_count)}/stats", None)),
+        "POST /users/<id>/add_movie": (1, add_movie),
+    }
+    route_names = list(routes)
+    weights = [routes[name][0] for name in route_names]
+    measurements = {name: {"latencies": [], "queries": [], "errors": 0} for name in route_names}
+    remaining = [args.requests]
+
+    base_url, stop_server = start_server(movieweb, args.server)
+
+    def client():
+        session = requests.Session()
+        while True:
+            with lock:
+                if remaining[0] <= 0:
+                    return
+                remaining[0] -= 1
+                name = generator.choices(route_names, weights)[0]
+                method, path, form = routes[name][1]()
+            started_at = time.perf_counter()
+            try:
+                response = session.request(method, base_url + path, data=form, allow_redirects=False, timeout=60)
+                failed = response.status_code >= 400
+                match = SERVER_TIMING_QUERIES.search(response.headers.get("Server-Timing", ""))
+            except requests.RequestException:
+                failed, match = True, None
+            latency = time.perf_counter() - started_at
+            with lock:
+                measurement = measurements[name]
+                measurement["latencies"].append(latency)
+                measurement["errors"] += failed
+                if match:
+                    measurement["queries"].append(int(match.group(1)))
+
+    try:
+        # Warm up connections, caches and the SQLite page cache before measuring
+        requests.get(base_url + "/users", timeout=60)
+        started_at = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+            for _ in range(args.concurrency):
+                executor.submit(client)
+        wall_time = time.perf_counter() - started_at
+    finally:
+        stop_server()
+
+    results = {}
+    for name, measurement in measurements.items():
+        if measurement["latencies"]:
+            results[name] = summarize(measurement["latencies"], wall_time, measurement["queries"], measurement["errors"])
+    results["all"] = summarize(
+        [latency for measurement in measurements.values() for latency in measurement["latencies"]], wall_time,
+        [query for measurement in measurements.values() for query in measurement["queries"]],
+        sum(measurement["errors"] for measurement in measurements.values())
+    )
+    for name, summary in results.items():
+        print(f"{name:32} p50 {summary['p50_ms']:8.2f} ms  p99 {summary['p99_ms']:8.2f} ms  "
+              f"{summary['throughput_per_s']:8.1f} req/s  {summary['errors']} errors")
+    return results
+
+
+def git_commit():
+    """Returns the current git commit, or None outside of a git checkout."""
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=PROJECT_DIRECTORY, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    generator = random.Random(args.seed)
+    database_path = os.path.abspath(args.database or os.path.join(PROJECT_DIRECTORY, "data",
+                                                                  f"benchmark-{args.scale}.sqlite"))
+    database_uri = args.database_url or f"sqlite:///{database_path}"
+    if args.reuse_database and (args.database_url or os.path.exists(database_path)):
+        print(f"Reusing {args.database_url or database_path}")
+    else:
+        started_at = time.perf_counter()
+        if args.database_url:
+            counts = seed_postgresql_database(args.database_url, args.scale, args.seed)
+        else:
+            counts = seed_database(database_path, args.scale, args.seed)
+        print(f"Seeded {args.database_url or database_path} with {counts} in {time.perf_counter() - started_at:.1f}s")
+
+    # The page cache and read model files are named after the SQLite file for PostgreSQL runs as well
+    movieweb = load_app(database_uri, database_path, args.page_cache, args.read_model, args.replica_url)
+    results = {
+        "meta": {
+            "scale": args.scale,
+            "rows": dict(zip(("users", "movies", "user_movie"), SCALES[args.scale])),
+            "started_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "git_commit": git_commit(),
+            "python": platform.python_version(),
+            "backend": movieweb.database_backend,
+            "warmup_seconds": movieweb.warmup,
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "arguments": vars(args),
+        }
+    }
+    with FakeOMDbServer(latency=args.omdb_latency) as fake_omdb:
+        movieweb.omdb_client.base_url = fake_omdb.base_url
+        if not args.skip_recommendations:
+            results["recommendations"] = benchmark_recommendations(movieweb, args, generator)
+        if not args.skip_data_manager:
+            results["data_manager"] = benchmark_data_manager(movieweb, database_uri, args, generator)
+        if not args.skip_http:
+            results["http"] = benchmark_http(movieweb, args, generator)
+        results["meta"]["omdb_requests"] = fake_omdb.requests
+
+    output = args.output or os.path.join(PROJECT_DIRECTORY, "benchmarks", "results",
+                                         f"{time.strftime('%Y%m%d-%H%M%S')}-{args.scale}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as result_file:
+        json.dump(results, result_file, indent=2)
+    print(f"Results written to {output}")
+    return results
+
+
+if __name__ == "__main__":
+    main()
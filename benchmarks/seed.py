@@ -0,0 +1,130 @@
+import os
+import random
+import sqlite3
+from sqlalchemy import create_engine
+from datamanager.data_models import db
+from datamanager.migrations import apply_migrations
+from datamanager.stats import rebuild_stats
+from omdbapi.response_cache import normalize_title
+
+
+# Scale name: (users, movies, user_movie rows)
+SCALES = {
+    "1k": (20, 500, 1_000),
+    "100k": (500, 20_000, 100_000),
+    "1m": (5_000, 200_000, 1_000_000),
+}
+
+WORDS = ("alien", "heat", "night", "dark", "river", "star", "ghost", "city", "love", "war", "blue", "last",
+         "king", "road", "storm", "dream", "fire", "shadow", "summer", "winter", "iron", "silent", "golden", "lost")
+DIRECTORS = ("Ridley Scott", "Michael Mann", "Greta Gerwig", "Christopher Nolan", "Agnes Varda", "Akira Kurosawa",
+             "Kathryn Bigelow", "Bong Joon-ho", "Sofia Coppola", "Denis Villeneuve")
+MOVIE_COLUMNS = ("id", "title", "title_normalized", "director", "publication_year", "rating", "poster_url",
+                 "lookup_status")
+
+
+def seed_database(path, scale, seed=42):
+    """
+    Creates a fresh database with synthetic users, movies and associations.
+
+    The schema is created with the app's migrations, so the indexes and the search index match
+    production. Rows are written with executemany in one transaction.
+
+    Args:
+        path (str): Path of the SQLite file, an existing file is replaced.
+        scale (str): One of SCALES, e.g. "100k" for 100,000 user_movie rows.
+        seed (int): Seed of the random generator, the same seed gives the same data.
+
+    Returns:
+        dict: The number of users, movies and associations.
+    """
+    for suffix in ("", "-wal", "-shm", ".read_model"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    engine = create_engine(f"sqlite:///{path}")
+    apply_migrations(engine)
+    engine.dispose()
+
+    users, movies, links = _generate_rows(scale, seed)
+    connection = sqlite3.connect(path)
+    with connection:
+        connection.executemany("INSERT INTO users (id, name) VALUES (?, ?)", users)
+        connection.executemany(
+            f"INSERT INTO movies ({', '.join(MOVIE_COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            movies
+        )
+        connection.executemany("INSERT INTO user_movie (user_id, movie_id) VALUES (?, ?)", links)
+    connection.close()
+
+    # The rows above bypass the data manager, so the summary tables are filled afterwards.
+    # The change logs are dropped, a read model loads a fresh database from the tables anyway
+    # and the first refresh of the recommendations computes all movies.
+    engine = create_engine(f"sqlite:///{path}")
+    with engine.begin() as engine_connection:
+        rebuild_stats(engine_connection)
+        engine_connection.exec_driver_sql("DELETE FROM catalog_changes")
+        engine_connection.exec_driver_sql("DELETE FROM recommendation_changes")
+        engine_connection.exec_driver_sql("ANALYZE")
+    engine.dispose()
+    return {"users": len(users), "movies": len(movies), "user_movie": len(links)}
+
+
+def seed_postgresql_database(url, scale, seed=42):
+    """
+    Creates the same synthetic data as seed_database in a PostgreSQL database, loaded with COPY.
+
+    All tables of the app in the database are dropped first, only point this at a benchmark database.
+
+    Args:
+        url (str): SQLAlchemy URL of the database, e.g. postgresql+psycopg://localhost/movieweb_benchmark.
+        scale (str): One of SCALES.
+        seed (int): Seed of the random generator, the same seed gives the same data as seed_database.
+
+    Returns:
+        dict: The number of users, movies and associations.
+    """
+    engine = create_engine(url)
+    with engine.begin() as connection:
+        for table in ("schema_migrations", *(table.name for table in db.metadata.sorted_tables)):
+            connection.exec_driver_sql(f"DROP TABLE IF EXISTS {table} CASCADE")
+    apply_migrations(engine)
+
+    users, movies, links = _generate_rows(scale, seed)
+    connection = engine.raw_connection()
+    try:
+        with connection.cursor() as cursor:
+            for table, columns, rows in (("users", ("id", "name"), users), ("movies", MOVIE_COLUMNS, movies),
+                                         ("user_movie", ("user_id", "movie_id"), links)):
+                with cursor.copy(f"COPY {table} ({', '.join(columns)}) FROM STDIN") as copy:
+                    for row in rows:
+                        copy.write_row(row)
+            # The IDs were given explicitly, new rows continue after them
+            for table in ("users", "movies"):
+                cursor.execute(f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT max(id) FROM {table}))")
+        connection.commit()
+    finally:
+        connection.close()
+
+    with engine.begin() as engine_connection:
+        rebuild_stats(engine_connection)
+        engine_connection.exec_driver_sql("DELETE FROM recommendation_changes")
+        engine_connection.exec_driver_sql("ANALYZE")
+    engine.dispose()
+    return {"users": len(users), "movies": len(movies), "user_movie": len(links)}
+
+
+def _generate_rows(scale, seed):
+    """Generates the rows of users, movies (MOVIE_COLUMNS) and user_movie, the same for the same scale and seed."""
+    user_count, movie_count, link_count = SCALES[scale]
+    generator = random.Random(seed)
+    users = [(user_id, f"user {user_id:06d}") for user_id in range(1, user_count + 1)]
+    movies = []
+    for movie_id in range(1, movie_count + 1):
+        title = f"{generator.choice(WORDS).title()} {generator.choice(WORDS)} {movie_id}"
+        movies.append((movie_id, title, normalize_title(title), generator.choice(DIRECTORS),
+                       generator.randint(1950, 2024), round(generator.uniform(1, 10), 1),
+                       "N/A", "ready"))
+    links = set()
+    while len(links) < link_count:
+        links.add((generator.randint(1, user_count), generator.randint(1, movie_count)))
+    return users, movies, sorted(links)
@@ -0,0 +1,40 @@
+import math
+
+
+def percentile(sorted_values, fraction):
+    """Returns the value below which the given fraction of the sorted values lies (nearest rank)."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(latencies, wall_time, queries=None, errors=0):
+    """
+    Summarizes the measurements of one benchmark.
+
+    Args:
+        latencies (list): Latency of every call or request in seconds.
+        wall_time (float): Seconds the whole benchmark took, for the throughput.
+        queries (list): SQL queries of every call or request, or None if unknown.
+        errors (int): Number of failed calls or requests.
+
+    Returns:
+        dict: Count, errors, p50/p95/p99/mean/max latency in milliseconds, throughput per second
+              and the average number of SQL queries.
+    """
+    values = sorted(latencies)
+    count = len(values)
+    summary = {
+        "count": count,
+        "errors": errors,
+        "p50_ms": percentile(values, 0.50) * 1000,
+        "p95_ms": percentile(values, 0.95) * 1000,
+        "p99_ms": percentile(values, 0.99) * 1000,
+        "mean_ms": sum(values) / count * 1000 if count else 0.0,
+        "max_ms": values[-1] * 1000 if values else 0.0,
+        "throughput_per_s": count / wall_time if wall_time else 0.0,
+    }
+    if queries:
+        summary["queries_per_call"] = sum(queries) / len(queries)
+    return summary
@@ -0,0 +1,203 @@
+import threading
+import time
+from contextlib import contextmanager
+from sqlalchemy import event, func, select, text
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+from datamanager.data_models import Movie
+from datamanager.SQLite_data_manager import SQLiteDataManager
+from datamanager.search import SEARCH_VECTOR, build_tsquery, search_words, title_tsquery
+
+
+class PostgreSQLDataManager(SQLiteDataManager):
+    """
+    A data manager for PostgreSQL: the SQLite data manager's queries with PostgreSQL upserts, COPY bulk loads,
+    full-text search on a tsvector column and read methods routed to a read replica.
+    """
+
+    # PostgreSQL allows 65535 bound parameters per statement instead of SQLite's 32766
+    WRITE_BATCH_SIZE = 5000
+    # From this many rows a bulk insert is streamed with COPY instead of a multi-row INSERT
+    COPY_MIN_ROWS = 500
+
+    def __init__(self, db, replica_engine=None, replica_lag_window=5.0, **kwargs):
+        """Initializes the PostgreSQLDataManager with the provided SQLAlchemy database session.
+        Args:
+            db: Initialize database connection with db, its engine is the primary.
+            replica_engine: If given, the engine of a read replica that answers get_all_users, get_users_page,
+                            get_all_movies, get_user_movies, get_user_movies_page and get_movie.
+            replica_lag_window (float): Seconds after a commit during which reads of the written users
+                                        and lists still go to the primary, so a user sees their own
+                                        change although the replica lags behind.
+            **kwargs: The options of SQLiteDataManager, e.g. lookup_queue and page_cache."""
+        if kwargs.get("read_model") is not None:
+            raise ValueError("The read model only works with SQLite.")
+        super().__init__(db, **kwargs)
+        self.replica_engine = replica_engine
+        self.replica_lag_window = replica_lag_window
+        self._written_at = {}
+        self._written_lock = threading.Lock()
+        self._written_groups_key = ("written_groups", id(self))
+        if replica_engine is not None:
+            event.listen(self.db.session, "after_commit", self._remember_written_groups)
+            event.listen(self.db.session, "after_rollback", self._discard_written_groups)
+
+
+    def search_movies(self, query, user_id=None, limit=20):
+        """
+        Searches movie titles and directors with the tsvector index, best matches first.
+
+        Words match as prefixes, title matches rank above director matches.
+
+        Args:
+            query (str): The search query.
+            user_id (int): Only search the movies of this user, the whole library if None.
+            limit (int): Maximum number of results.
+
+        Returns:
+            list: The matching Movie objects, for a user rows with their overrides merged in.
+        """
+        limit = max(1, min(limit, self.MAX_PAGE_SIZE))
+        try:
+            tsquery = build_tsquery(query)
+            if tsquery is None:
+                return []
+            statement = select(Movie) if user_id is None else self._select_user_movies(user_id)
+            statement = statement \
+                .where(SEARCH_VECTOR.op("@@")(tsquery)) \
+                .where(Movie.lookup_status != "failed") \
+                .order_by(func.ts_rank(SEARCH_VECTOR, tsquery).desc(), Movie.id) \
+                .limit(limit)
+            if user_id is None:
+                return list(self.db.session.scalars(statement))
+            return self.db.session.execute(statement).all()
+
+        except SQLAlchemyError as e:
+            self.db.session.rollback()
+            print(f"A database error occurred while searching movies: {e}")
+            return []
+
+
+    def _find_local_movie(self, movie_name):
+        """
+        Finds a ready or pending movie whose title consists of the same words as movie_name,
+        ignoring case and punctuation, with the tsvector index.
+
+        Returns:
+            Row: The movie's id and title, or None.
+        """
+        tsquery = title_tsquery(movie_name)
+        if tsquery is None:
+            return None
+        words = search_words(movie_name)
+        candidates = self.db.session.execute(
+            select(Movie.id, Movie.title)
+            .where(SEARCH_VECTOR.op("@@")(tsquery))
+            .where(Movie.lookup_status != "failed")
+            .order_by(Movie.lookup_status.desc(), Movie.id)
+            .limit(20)
+        ).all()
+        for candidate in candidates:
+            if search_words(candidate.title) == words:
+                return candidate
+        return None
+
+    def _insert(self, table):
+        """Returns a PostgreSQL INSERT, which supports ON CONFLICT clauses and RETURNING."""
+        return postgresql_insert(table)
+
+    def _bulk_insert(self, table, rows, returning=(), skip_existing=False):
+        """
+        Inserts rows like SQLiteDataManager._bulk_insert, from COPY_MIN_ROWS rows on they are streamed with COPY
+        into a temporary table and moved over with one INSERT ... SELECT, without committing.
+
+        Returns:
+            list: The returning columns of the inserted rows.
+        """
+        connection = self.db.session.connection()
+        if len(rows) < self.COPY_MIN_ROWS or connection.dialect.driver != "psycopg":
+            # COPY rows needs psycopg 3
+            return super()._bulk_insert(table, rows, returning, skip_existing)
+        driver_connection = connection.connection.driver_connection
+        columns = ", ".join(rows[0])
+        staging_table = f"{table.name}_staging"
+        self.db.session.execute(text(
+            f"CREATE TEMPORARY TABLE {staging_table} AS SELECT {columns} FROM {table.name} WITH NO DATA"
+        ))
+        with driver_connection.cursor() as cursor:
+            with cursor.copy(f"COPY {staging_table} ({columns}) FROM STDIN") as copy:
+                for row in rows:
+                    copy.write_row(tuple(row.values()))
+        statement = f"INSERT INTO {table.name} ({columns}) SELECT {columns} FROM {staging_table}"
+        if skip_existing:
+            statement += " ON CONFLICT DO NOTHING"
+        inserted = []
+        if returning:
+            statement += " RETURNING " + ", ".join(column.name for column in returning)
+            inserted = self.db.session.execute(text(statement)).all()
+        else:
+            self.db.session.execute(text(statement))
+        self.db.session.execute(text(f"DROP TABLE {staging_table}"))
+        return inserted
+
+    def _lock_titles(self, keys):
+        """
+        Takes a transaction level advisory lock per normalized title, ordered by the hash so concurrent
+        transactions cannot deadlock. Movies committed before are visible after it, at read committed.
+        """
+        keys = sorted(set(keys))
+        if keys:
+            self.db.session.execute(text(
+                "SELECT pg_advisory_xact_lock(title_hash) FROM "
+                "(SELECT DISTINCT hashtextextended(key, 0) AS title_hash FROM unnest(CAST(:keys AS text[])) AS key "
+                "ORDER BY title_hash) AS title_hashes"
+            ), {"keys": keys})
+
+    @contextmanager
+    def _read_session(self, *groups):
+        """
+        Yields a session of the replica, which is closed afterwards, or the primary session if there is no replica
+        or one of the groups was written within the last replica_lag_window seconds.
+
+        The User and Movie objects a read on the replica returns are expunged before the session closes: their
+        loaded columns stay readable, but relationships and columns left out with load_only are not loaded
+        later, accessing them raises DetachedInstanceError. The read methods therefore load everything their
+        callers use, get_user(with_movies=True) stays on the primary.
+        """
+        if self.replica_engine is None or self._written_recently(groups):
+            yield self.db.session
+            return
+        with Session(self.replica_engine) as session:
+            yield session
+            session.expunge_all()
+
+    def _mark_pages_changed(self, *groups):
+        """Remembers the changed groups for the page cache and for the reads that have to stay on the primary."""
+        super()._mark_pages_changed(*groups)
+        if self.replica_engine is not None:
+            self.db.session.info.setdefault(self._written_groups_key, set()).update(groups)
+
+    def _remember_written_groups(self, session):
+        """Notes the commit time of the groups the committed transaction wrote."""
+        written_groups = session.info.pop(self._written_groups_key, ())
+        if not written_groups:
+            return
+        now = time.monotonic()
+        with self._written_lock:
+            for group in written_groups:
+                self._written_at[group] = now
+            if len(self._written_at) > 10_000:
+                self._written_at = {group: written_at for group, written_at in self._written_at.items()
+                                    if now - written_at < self.replica_lag_window}
+
+    def _discard_written_groups(self, session):
+        """Forgets the written groups of a rolled back transaction."""
+        session.info.pop(self._written_groups_key, None)
+
+    def _written_recently(self, groups):
+        """Checks whether one of the groups was written within the last replica_lag_window seconds."""
+        now = time.monotonic()
+        with self._written_lock:
+            return any(now - self._written_at.get(group, float("-inf")) < self.replica_lag_window
+                       for group in groups)
@@ -1,17 +1,70 @@
-from sqlalchemy.exc import NoResultFound, SQLAlchemyError
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from sqlalchemy import bindparam, delete, event, exists, func, select, text, tuple_, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import load_only, selectinload
 from datamanager.data_manager_interface import DataManagerInterface
-from datamanager.data_models import User, Movie, db
+from datamanager.favourites_io import EXPORT_FIELDS, parse_record
+from datamanager.data_models import (OVERRIDE_FIELDS, User, Movie, MovieFavouriteCount, MovieLookupJob, MovieNeighbour,
+                                     MovieOverride, RecommendationChange, UserDecadeStats, UserDirectorStats, UserStats,
+                                     db, user_movie_association)
+from datamanager.pagination import keyset_page, sorted_page
+from datamanager.search import RANK, build_match_query, movies_fts, search_words, title_match_query
+from datamanager.stats import apply_stats_changes, rebuild_stats, year_of
 from omdbapi.API_Movies import api_request_data
+from omdbapi.response_cache import normalize_title
 
 
 class SQLiteDataManager(DataManagerInterface):
     """A data manager class that interacts with a SQLite database to manage users and their movie collections."""
 
-    def __init__(self, db):
+    MAX_PAGE_SIZE = 200
+    # Rows per set-based INSERT/DELETE statement of the batch methods, keeps the bound parameters below SQLite's limit
+    WRITE_BATCH_SIZE = 400
+    # Messages of invalid records an import reports, the rest are only counted
+    MAX_IMPORT_ERRORS = 20
+    # Neighbours stored per movie for the recommendations
+    RECOMMENDATION_NEIGHBOURS = 20
+    # From this share of changed movies on, a refresh recomputes all movies, which is not slower then
+    RECOMMENDATION_FULL_REFRESH_SHARE = 0.25
+
+    # Sort orders of the movie lists: key columns (ID last), key values of a movie, descending, sorted attribute.
+    # The lists sort by what the user sees, their overrides merged over the shared movie.
+    MOVIE_SORTS = {
+        "title": ((func.coalesce(MovieOverride.title, Movie.title), Movie.id),
+                  lambda movie: [movie.title, movie.id], False, "title"),
+        "year": ((func.coalesce(MovieOverride.publication_year, Movie.publication_year), Movie.id),
+                 lambda movie: [movie.publication_year, movie.id], True, "publication_year"),
+        "rating": ((func.coalesce(MovieOverride.rating, Movie.rating, -1.0), Movie.id),
+                   lambda movie: [movie.rating if movie.rating is not None else -1.0, movie.id], True, "rating"),
+    }
+
+    def __init__(self, db, import_concurrency=8, lookup_queue=None, page_cache=None, read_model=None):
         """Initializes the SQLiteDataManager with the provided SQLAlchemy database session.
         Args:
-            db: Initialize database connection with db."""
+            db: Initialize database connection with db.
+            import_concurrency (int): Maximum number of parallel OMDb lookups during a bulk import.
+            lookup_queue (MovieLookupQueue): If given, add_movie_to_user queues the OMDb lookup
+                                             instead of waiting for it.
+            page_cache (MemoryPageCache | SQLitePageCache): If given, the cached pages affected by a
+                                                            mutation are invalidated after its commit.
+            read_model (CatalogReadModel): If given, the user and movie reads are answered from it
+                                           and it is synced after every commit."""
         self.db = db
+        self.import_concurrency = import_concurrency
+        self.lookup_queue = lookup_queue
+        self.page_cache = page_cache
+        self.read_model = read_model
+        # db.session is shared by every app built on db, so its listeners fire for all of them:
+        # the changed groups are kept per data manager to invalidate only this app's page cache
+        self._changed_pages_key = ("changed_pages", id(self))
+        if page_cache is not None:
+            event.listen(self.db.session, "after_commit", self._invalidate_pages)
+            event.listen(self.db.session, "after_rollback", self._discard_page_invalidations)
+        if read_model is not None:
+            event.listen(self.db.session, "after_commit", self._sync_read_model)
 
 
     def get_all_users(self):
@@ -21,8 +74,11 @@ class SQLiteDataManager(DataManagerInterface):
         Returns:
             list: List of users as objects.
         """
+        if self.read_model is not None:
+            return self.read_model.get_all_users()
         try:
-            list_of_all_users = self.db.session.query(User).all()
+            with self._read_session("users") as session:
+                list_of_all_users = session.query(User).all()
             return list_of_all_users
 
         except SQLAlchemyError as e:
@@ -30,6 +86,37 @@ class SQLiteDataManager(DataManagerInterface):
             print(f"A database error occurred at getting all users: {e}")
 
 
+    def get_users_page(self, cursor=None, page_size=50, fields=None):
+        """
+        Retrieves one page of users sorted by name using keyset pagination.
+
+        Args:
+            cursor (str): Opaque cursor from a previous page, or None for the first page.
+            page_size (int): Maximum number of users on the page.
+            fields (list): Names of the User columns to load, all columns if None.
+
+        Returns:
+            dict: "items" (list of users), "next_cursor" and "prev_cursor" (str or None).
+
+        Raises:
+            ValueError: If the cursor is invalid.
+        """
+        page_size = max(1, min(page_size, self.MAX_PAGE_SIZE))
+        if self.read_model is not None:
+            self._check_fields(User, fields)
+            keys, users = self.read_model.get_users_by_name()
+            return sorted_page(keys, users, "name", False, cursor, page_size)
+        try:
+            query = self._select_fields(User, fields, "name")
+            with self._read_session("users") as session:
+                return keyset_page(session, query, "name", (User.name, User.id),
+                                   lambda user: [user.name, user.id], False, cursor, page_size)
+
+        except SQLAlchemyError as e:
+            self.db.session.rollback()
+            print(f"A database error occurred at getting a page of users: {e}")
+
+
     def get_all_movies(self):
         """
         Retrieves all movies from the database.
@@ -37,8 +124,11 @@ class SQLiteDataManager(DataManagerInterface):
         Returns:
             list: List of movies as objects.
         """
+        if self.read_model is not None:
+            return self.read_model.get_all_movies()
         try:
-            list_of_all_movies = self.db.session.query(Movie).all()
+            with self._read_session() as session:
+                list_of_all_movies = session.query(Movie).all()
             return list_of_all_movies
 
         except SQLAlchemyError as e:
@@ -54,16 +144,21 @@ class SQLiteDataManager(DataManagerInterface):
             user_id (int): The ID of the user from whom to retrieve movies.
 
         Returns:
-            list: A list of Movie objects associated with the user.
+            list: The user's movies as rows with the Movie columns, the user's overrides merged in.
 
         Raises:
             ValueError: If the user with the given ID does not exist.
         """
         try:
-            user = self.db.session.query(User).get(user_id)
-            if not user:
-                raise ValueError(f"User with ID {user_id} not found.")
-            movies = user.movies
+            if self.read_model is not None:
+                movies = self.read_model.get_user_movies(user_id)
+                if movies is None:
+                    raise ValueError(f"User with ID {user_id} not found.")
+                return movies
+            with self._read_session(f"user:{user_id}") as session:
+                if not self._user_exists(user_id, session):
+                    raise ValueError(f"User with ID {user_id} not found.")
+                movies = session.execute(self._select_user_movies(user_id)).all()
             return movies
 
         except ValueError as e:
@@ -75,6 +170,43 @@ class SQLiteDataManager(DataManagerInterface):
             print(f"A database error occurred getting the assigned movies from a user: {e}")
 
 
+    def get_user_movies_page(self, user_id, sort="title", cursor=None, page_size=24, fields=None):
+        """
+        Retrieves one page of a user's movies using keyset pagination.
+
+        Args:
+            user_id (int): The ID of the user from whom to retrieve movies.
+            sort (str): "title" (A-Z), "year" (newest first) or "rating" (best first).
+            cursor (str): Opaque cursor from a previous page, or None for the first page.
+            page_size (int): Maximum number of movies on the page.
+            fields (list): Names of the Movie columns to load, all columns if None.
+
+        Returns:
+            dict: "items" (list of movie rows, the user's overrides merged in), "next_cursor" and
+                  "prev_cursor" (str or None).
+
+        Raises:
+            ValueError: If the sort order or the cursor is invalid.
+        """
+        if sort not in self.MOVIE_SORTS:
+            raise ValueError(f"Unknown sort order: {sort}")
+        key_columns, key_function, descending, sort_field = self.MOVIE_SORTS[sort]
+        page_size = max(1, min(page_size, self.MAX_PAGE_SIZE))
+        if self.read_model is not None:
+            self._check_fields(Movie, fields)
+            movies = sorted(self.read_model.get_user_movies(user_id) or [], key=key_function)
+            return sorted_page([key_function(movie) for movie in movies], movies, sort, descending, cursor, page_size)
+        query = self._select_user_movies(user_id, fields, sort_field)
+        try:
+            with self._read_session(f"user:{user_id}") as session:
+                return keyset_page(session, query, sort, key_columns, key_function, descending,
+                                   cursor, page_size, as_rows=True)
+
+        except SQLAlchemyError as e:
+            self.db.session.rollback()
+            print(f"A database error occurred getting a page of movies from a user: {e}")
+
+
     def add_user(self, input_username):
         """
         Adds a new user to the database.
@@ -96,6 +228,7 @@ class SQLiteDataManager(DataManagerInterface):
                 name = input_username,
             )
             self.db.session.add(user)
+            self._mark_pages_changed("users")
             self.db.session.commit()
 
         except SQLAlchemyError as e:
@@ -104,48 +237,53 @@ class SQLiteDataManager(DataManagerInterface):
 
 
 
-    def add_movie_to_user(self, user_id, movie_name):
+    def add_movie_to_user(self, user_id, movie_name, api_data=None):
         """
         Adds a movie to the user's collection.
 
         Args:
             user_id (int): The ID of the user to whom the movie should be added.
             movie_name (str): The name of the movie to add.
+            api_data (tuple | False | str): The result of the OMDb lookup of movie_name if the caller
+                                            already did it (the ASGI mode looks titles up asynchronously).
+                                            If None, a local match is searched first and OMDb is asked here.
 
         Returns:
-            str: A success or failure message which will be displayed on user_favourites.html .
+            str: A success or failure message which will be displayed on user_favourites.html ,
+                 the error message of the lookup if it failed.
         """
         try:
-            user = self.db.session.query(User).get(user_id)
-            if not user:
+            if not self._user_exists(user_id):
                 raise ValueError(f"User with ID {user_id} not found.")
             movie_name = movie_name.strip()
-            api_data = api_request_data(movie_name)
-            if api_data:
+            if api_data is None:
+                local_result = self._add_local_movie(user_id, movie_name)
+                if local_result is not None:
+                    return local_result
+                api_data = api_request_data(movie_name)
+            if isinstance(api_data, tuple):
                 title, publication_year, string_rating, poster_url, director = api_data
+            elif api_data:
+                # A network error or an open circuit breaker, the message tells the user to try again
+                return api_data
             else:
                 return f"Title {(movie_name)} was not found in online database"
 
-            existing_movie = self.db.session.query(Movie).filter(Movie.title == title).first()
-            if existing_movie:
-                if existing_movie not in user.movies:
-                    user.movies.append(existing_movie)
-                    self.db.session.commit()
-                    return f"Movie {title} successfully assigned to your list."
-                else:
-                    return f"Movie {title} is already in your list."
-            if string_rating is not None:
-                rating = float(string_rating.split("/")[0])
-            else:
-                rating = None
+            existing_movie_id = self._find_movie_id(title)
+            if existing_movie_id:
+                return self._assign_existing_movie(user_id, existing_movie_id, title)
+            rating = self._parse_rating(string_rating)
             new_movie = Movie(
                 title = title,
                 director = director,
-                publication_year = publication_year,
+                publication_year = year_of(publication_year),
                 rating = rating,
                 poster_url = poster_url
             )
-            user.movies.append(new_movie)
+            twin = self._insert_movies_once([new_movie]).get(new_movie.title_normalized)
+            if twin is not None:
+                return self._assign_existing_movie(user_id, twin.id, twin.title)
+            self._assign_movie(user_id, new_movie.id)
             self.db.session.commit()
             return f"Movie {title} successfully assigned to your list."
 
@@ -157,10 +295,226 @@ class SQLiteDataManager(DataManagerInterface):
             print(f"A database error occurred while assigning movie to user: {e}")
 
 
+    def add_local_movie_to_user(self, user_id, movie_name):
+        """
+        Adds a movie without waiting for OMDb: a matching movie of the library is assigned,
+        in background lookup mode a pending placeholder is queued.
+
+        Args:
+            user_id (int): The ID of the user to whom the movie should be added.
+            movie_name (str): The name of the movie to add.
+
+        Returns:
+            str: A message which will be displayed on user_favourites.html .
+            None: If the movie needs an OMDb lookup, see add_movie_to_user(api_data=...).
+        """
+        try:
+            if not self._user_exists(user_id):
+                raise ValueError(f"User with ID {user_id} not found.")
+            return self._add_local_movie(user_id, movie_name.strip())
+
+        except ValueError as e:
+            self.db.session.rollback()
+            print(e)
+        except SQLAlchemyError as e:
+            self.db.session.rollback()
+            print(f"A database error occurred while assigning movie to user: {e}")
+
+
+    def add_movies_to_user(self, user_id, movie_names):
+        """
+        Imports many movies into the user's collection in a single transaction.
+
+        The titles are looked up concurrently on OMDb, existing movies are found with one IN query
+        and all new movies and assignments are written with one commit.
+
+        Args:
+            user_id (int): The ID of the user to whom the movies should be added.
+            movie_names (list): The names of the movies to add.
+
+        Returns:
+            list: One dict per distinct requested title with the keys "input", "status"
+                  ("added", "assigned", "already_in_list", "not_found" or "error") and "message".
+            str: "error" if the user does not exist.
+        """
+        try:
+            user = self.db.session.get(User, user_id)
+            if not user:
+                raise ValueError(f"User with ID {user_id} not found.")
+
+            requested_names = {}
+            for movie_name in movie_names:
+                movie_name = movie_name.strip()
+                if movie_name:
+                    requested_names.setdefault(normalize_title(movie_name), movie_name)
+            if not requested_names:
+                return []
+            requested_names = list(requested_names.values())
+
+            with ThreadPoolExecutor(max_workers=self.import_concurrency) as executor:
+                api_results = list(executor.map(api_request_data, requested_names))
+
+            report = []
+            found = {}
+            for movie_name, api_data in zip(requested_names, api_results):
+                if isinstance(api_data, tuple):
+                    found.setdefault(api_data[0], api_data)
+                    report.append({"input": movie_name, "title": api_data[0]})
+                elif api_data:
+                    report.append({"input": movie_name, "status": "error", "message": api_data})
+                else:
+                    report.append({"input": movie_name, "status": "not_found",
+                                   "message": f"Title {movie_name} was not found in online database"})
+
+            existing_movies = {}
+            if found:
+                normalized_titles = {normalize_title(title): title for title in found}
+                # Like _find_movie_id: failed placeholders are no match, ready movies win over pending ones
+                for movie in self.db.session.scalars(
+                        select(Movie)
+                        .where(Movie.title_normalized.in_(normalized_titles))
+                        .where(Movie.lookup_status != "failed")
+                        .order_by(Movie.lookup_status.desc(), Movie.id)):
+                    title = normalized_titles[movie.title_normalized]
+                    existing_movies.setdefault(title, movie)
+
+            new_movies = []
+            for title, (_, publication_year, string_rating, poster_url, director) in found.items():
+                if title not in existing_movies:
+                    new_movie = Movie(
+                        title = title,
+                        director = director,
+                        publication_year = year_of(publication_year),
+                        rating = self._parse_rating(string_rating),
+                        poster_url = poster_url
+                    )
+                    new_movies.append(new_movie)
+                    existing_movies[title] = new_movie
+            twins = self._insert_movies_once(new_movies)
+            for new_movie in new_movies:
+                if new_movie.title_normalized in twins:
+                    existing_movies[new_movie.title] = twins[new_movie.title_normalized]
+            new_movies = [movie for movie in new_movies if movie.title_normalized not in twins]
+            assigned = self._assign_movies([(user_id, movie.id) for movie in existing_movies.values()])
+
+            handled_titles = set()
+            for entry in report:
+                title = entry.pop("title", None)
+                if title is None:
+                    continue
+                movie = existing_movies[title]
+                if (user_id, movie.id) not in assigned or title in handled_titles:
+                    entry["status"] = "already_in_list"
+                    entry["message"] = f"Movie {title} is already in your list."
+                    continue
+                handled_titles.add(title)
+                entry["status"] = "added" if movie in new_movies else "assigned"
+                entry["message"] = f"Movie {title} successfully assigned to your list."
+            self.db.session.commit()
+            return report
+
+        except ValueError as e:
+            self.db.session.rollback()
+            print(e)
+            return "error"
+        except SQLAlchemyError as e:
+            self.db.session.rollback()
+            print(f"A database error occurred while importing movies for the user: {e}")
+            return "error"
+
+
+    def assign_movies_to_users(self, assignments):
+        """
+        Assigns many existing movies to users in a single transaction.
+
+        Users and movies are checked with IN queries and the user_movie rows are written with
+        set-based INSERT statements, rows that already exist are skipped.
+
+        Args:
+            assignments (list): (user_id, movie_id) pairs to assign.
+
+        Returns:
+            list: One dict per pair with the keys "user_id", "movie_id", "status"
+                  ("assigned", "already_in_list" or "not_found") and "message".
+            str: "error" if a database error occurred.
+        """
+        try:
+            movies, user_ids = self._find_movies_and_users(assignments)
+            report = self._check_assignments(assignments, movies, user_ids)
+            assigned = self._assign_movies([(entry["user_id"], entry["movie_id"])
+                                            for entry in report if "status" not in entry])
+            self.db.session.commit()
+
+            for entry in report:
+                if "status" in entry:
+                    continue
+                pair = (entry["user_id"], entry["movie_id"])
+                title = movies[entry["movie_id"]].title
+                if pair in assigned:
+                    assigned.discard(pair)
+                    entry["status"] = "assigned"
+                    entry["message"] = f"Movie {title} successfully assigned to your list."
+                else:
+                    entry["status"] = "already_in_list"
+                    entry["message"] = f"Movie {title} is already in your list."
+            return report
+
+        except SQLAlchemyError as e:
+            self.db.session.rollback()
+            print(f"A database error occurred while assigning movies to users: {e}")
+            return "error"
+
+
+    def apply_movie_lookup(self, movie_id, api_data):
+        """
+        Fills in a pending placeholder movie with the result of its background OMDb lookup.
+
+        If the movie already exists, the placeholder's users are moved to it and the placeholder
+        is deleted. Does nothing if the movie is no longer pending. Does not commit, the lookup
+        queue commits together with the job status.
+
+        Args:
+            movie_id (int): The ID of the pending placeholder movie.
+            api_data (tuple | False | str): The result of api_request_data.
+        """
+        movie = self.db.session.get(Movie, movie_id)
+        if not movie or movie.lookup_status != "pending":
+            return
+        user_ids = list(self.db.session.scalars(
+            select(user_movie_association.c.user_id).where(user_movie_association.c.movie_id == movie_id)
+        ))
+        self._mark_pages_changed(*(f"user:{user_id}" for user_id in user_ids))
+        if not isinstance(api_data, tuple):
+            movie.lookup_status = "failed"
+            return
+
+        title, publication_year, string_rating, poster_url, director = api_data
+        self._lock_titles([normalize_title(title)])
+        existing_movie_id = self._find_movie_id(title, exclude_id=movie_id)
+        if existing_movie_id:
+            self._assign_movies([(user_id, existing_movie_id) for user_id in user_ids])
+            self.db.session.execute(
+                update(MovieLookupJob).where(MovieLookupJob.movie_id == movie_id).values(movie_id=existing_movie_id)
+            )
+            self.db.session.execute(delete(user_movie_association).where(user_movie_association.c.movie_id == movie_id))
+            self.db.session.expunge(movie)
+            self._delete_movies([movie_id])
+            return
+
+        movie.title = title
+        movie.director = director
+        movie.publication_year = year_of(publication_year)
+        movie.rating = self._parse_rating(string_rating)
+        movie.poster_url = poster_url
+        movie.lookup_status = "ready"
+        # Pending movies are not counted in the stats, now the movie counts for its users
+        self._update_stats(added=self._load_favourites([(user_id, movie_id) for user_id in user_ids]).values())
+
+
     def update_movie(self, user_id, movie_id, new_title, new_director, new_publication_year, new_rating):
         """
         Updates the details of a movie in the user's collection, does not affect the same movie of other users,
-        because a new movie with the new data will be created
+        because the changed fields are stored as the user's override of the shared movie
 
         Args:
             user_id (int): The ID of the user.
@@ -171,46 +525,69 @@ class SQLiteDataManager(DataManagerInterface):
             new_rating (string): The new rating of the movie. Later changed to (float).
 
         Returns:
-            str: A success or failure message.
+            str: A success message, or None if the movie could not be updated.
+        """
+        report = self.update_movies([{
+            "user_id": user_id,
+            "movie_id": movie_id,
+            "title": new_title,
+            "director": new_director,
+            "publication_year": new_publication_year,
+            "rating": new_rating,
+        }])
+        return self._report_message(report, "updated")
+
+
+    def update_movies(self, updates):
+        """
+        Updates many movies in users' collections in a single transaction.
 
-        Raises:
-            TypeError: If the input data is not of the expected type.
+        Like update_movie, only the user sees the new data: the fields that differ from the shared movie
+        are upserted as the user's override, an update back to the movie's own values removes the override.
+
+        Args:
+            updates (list): One dict per movie with the keys "user_id", "movie_id", "title", "director",
+                            "publication_year" and "rating".
+
+        Returns:
+            list: One dict per update with the keys "user_id", "movie_id", "status"
+                  ("updated", "invalid", "not_in_list" or "not_found") and "message".
+            str: "error" if a database error occurred.
         """
         try:
-            movie = self.get_movie(movie_id)
-            user = self.db.session.query(User).get(user_id)
-            poster_url = movie.poster_url
-            new_rating = float(new_rating)
-            new_publication_year = int(new_publication_year)
-            if self._input_not_string(new_title):
-                raise TypeError("Title must be a string.")
-            if self._input_not_string(new_director):
-                raise TypeError("Director must be a string.")
-            if self._input_not_int(new_publication_year):
-                raise TypeError("Publication year must be an integer.")
-            if self._input_not_float_or_None(new_rating):
-                raise TypeError("Rating must be a float.")
-
-            self.remove_movie_from_favourites(movie_id, user_id)
-            new_movie = Movie(
-                title=new_title,
-                director=new_director,
-                publication_year=new_publication_year,
-                rating=new_rating,
-                poster_url=poster_url
-            )
-            user.movies.append(new_movie)
+            assignments = [(update_data["user_id"], update_data["movie_id"]) for update_data in updates]
+            movies, user_ids = self._find_movies_and_users(assignments)
+            report = self._check_assignments(assignments, movies, user_ids)
+            changes = []
+            for entry, update_data in zip(report, updates):
+                if "status" in entry:
+                    continue
+                try:
+                    changes.append((entry, self._parse_movie_update(update_data)))
+                except (TypeError, ValueError) as e:
+                    entry["status"] = "invalid"
+                    entry["message"] = f"Movie with ID {entry['movie_id']} could not be updated: {e}"
+
+            favourites = self._load_favourites([(entry["user_id"], entry["movie_id"]) for entry, _ in changes])
+            # Keyed by user and movie, a later update of the same movie wins
+            new_values = {}
+            for entry, values in changes:
+                pair = (entry["user_id"], entry["movie_id"])
+                if pair not in favourites:
+                    entry["status"] = "not_in_list"
+                    entry["message"] = f"Movie {movies[entry['movie_id']].title} is not in your list."
+                    continue
+                new_values[pair] = values
+                entry["status"] = "updated"
+                entry["message"] = f"Movie {values[0]} successfully updated in your list."
+            self._override_movies(movies, new_values, favourites)
             self.db.session.commit()
-            return f"Movie {movie.title} successfully updated in your list."
+            return report
 
-        except TypeError as e:
-            print(f"Type error: {e}")
-        except NoResultFound:
-            self.db.session.rollback()
-            print(f"Movie with ID {movie_id} not found.")
         except SQLAlchemyError as e:
             self.db.session.rollback()
-            print(f"A database error occurred while updating the movie: {e}")
+            print(f"A database error occurred while updating the movies: {e}")
+            return "error"
 
 
     def remove_movie_from_favourites(self, movie_id, user_id):
@@ -222,45 +599,460 @@ class SQLiteDataManager(DataManagerInterface):
             user_id (int): The ID of the user from whose collection the movie should be removed.
 
         Returns:
-            str: A success or failure message.
+            str: A success message, or None if the movie could not be removed.
+        """
+        report = self.remove_movies_from_favourites([(user_id, movie_id)])
+        return self._report_message(report, "removed")
+
+
+    def remove_movies_from_favourites(self, assignments):
+        """
+        Removes many movies from users' collections in a single transaction.
+
+        The user_movie rows are deleted with set-based DELETE statements, movies no user is left with
+        are deleted as well.
+
+        Args:
+            assignments (list): (user_id, movie_id) pairs to remove.
+
+        Returns:
+            list: One dict per pair with the keys "user_id", "movie_id", "status"
+                  ("removed", "not_in_list" or "not_found") and "message".
+            str: "error" if a database error occurred.
         """
         try:
-            movie = self.db.session.query(Movie).get(movie_id)
-            if not movie:
-                raise ValueError(f"Movie with ID {movie_id} not found.")
-            user = self.db.session.query(User).get(user_id)
-            if not user:
-                raise ValueError(f"User with ID {user_id} not found.")
+            movies, user_ids = self._find_movies_and_users(assignments)
+            report = self._check_assignments(assignments, movies, user_ids)
+            removed = self._unassign_movies([(entry["user_id"], entry["movie_id"])
+                                             for entry in report if "status" not in entry])
+            self.db.session.commit()
 
-            if movie in user.movies:
-                user.movies.remove(movie)
-                self.db.session.commit()
-            if len(movie.users) == 0:
-                db.session.delete(movie)
-                db.session.commit()
-            return f"The movie '{movie.title}' has been removed from your list."
+            for entry in report:
+                if "status" in entry:
+                    continue
+                pair = (entry["user_id"], entry["movie_id"])
+                title = movies[entry["movie_id"]].title
+                if pair in removed:
+                    removed.discard(pair)
+                    entry["status"] = "removed"
+                    entry["message"] = f"The movie '{title}' has been removed from your list."
+                else:
+                    entry["status"] = "not_in_list"
+                    entry["message"] = f"Movie {title} is not in your list."
+            return report
+
+        except SQLAlchemyError as e:
+            self.db.session.rollback()
+            print(f"A database error occurred while removing the movies: {e}")
+            return "error"
+
+
+    def stream_user_movies(self, user_id, batch_size=500):
+        """
+        Streams the ready movies of a user, as they see them, from a server-side cursor for an export.
+
+        The rows are fetched batch_size at a time while the returned generator is consumed, e.g. by a
+        streamed response, so memory use does not grow with the length of the list.
+
+        Args:
+            user_id (int): The ID of the user.
+            batch_size (int): Rows fetched from the cursor at a time.
+
+        Returns:
+            generator: Rows with the EXPORT_FIELDS in the order the movies were added to the library.
+            str: "error" if the user does not exist or a database error occurred.
+        """
+        try:
+            if not self._user_exists(user_id):
+                return "error"
+        except SQLAlchemyError as e:
+            self.db.session.rollback()
+            print(f"A database error occurred while exporting the movies of a user: {e}")
+            return "error"
+        statement = self._select_user_movies(user_id, EXPORT_FIELDS) \
+            .where(Movie.lookup_status == "ready") \
+            .order_by(Movie.id) \
+            .execution_options(yield_per=batch_size)
+
+        def rows():
+            try:
+                yield from self.db.session.execute(statement)
+            except SQLAlchemyError as e:
+                self.db.session.rollback()
+                print(f"A database error occurred while exporting the movies of a user: {e}")
+
+        return rows()
+
+
+    def import_user_movies(self, user_id, records, batch_size=500):
+        """
+        Imports an exported list into a user's collection batch by batch, without asking OMDb.
+
+        Library movies with the same title are assigned, the others are inserted with the values of
+        the file. Where the file's values differ from a library movie, they are stored as the user's
+        override, like an edit. Every batch is written with set-based statements and committed on its
+        own, so memory use does not grow with the size of the file.
+
+        Args:
+            user_id (int): The ID of the user.
+            records (iterable): (line number, record) pairs as yielded by favourites_io.read_records,
+                                consumed lazily.
+            batch_size (int): Records per batch and transaction.
+
+        Returns:
+            dict: The number of "added" (new to the library), "assigned", "already_in_list" and "invalid"
+                  records, and "errors", the messages of the first MAX_IMPORT_ERRORS invalid records.
+            str: "error" if the user does not exist or a database error occurred.
+        """
+        summary = {"added": 0, "assigned": 0, "already_in_list": 0, "invalid": 0, "errors": []}
+        try:
+            if not self._user_exists(user_id):
+                raise ValueError(f"User with ID {user_id} not found.")
+            batch = []
+            for line_number, record in records:
+                try:
+                    batch.append(parse_record(record))
+                except ValueError as e:
+                    summary["invalid"] += 1
+                    if len(summary["errors"]) < self.MAX_IMPORT_ERRORS:
+                        summary["errors"].append(f"Line {line_number}: {e}")
+                    continue
+                if len(batch) >= batch_size:
+                    self._import_batch(user_id, batch, summary)
+                    batch = []
+            if batch:
+                self._import_batch(user_id, batch, summary)
+            return summary
 
         except ValueError as e:
             self.db.session.rollback()
             print(e)
+            return "error"
+        except SQLAlchemyError as e:
+            self.db.session.rollback()
+            print(f"A database error occurred while importing a list: {e}")
+            return "error"
+
+
+    def compact_movies(self):
+        """
+        Folds the duplicated movies that editing created before there were overrides back into canonical movies.
+
+        Edited copies kept the poster of the original, so ready movies with the same poster are one movie,
+        movies without a poster only when title, director and year are the same. The oldest movie of a
+        group stays, the users of the others are moved to it, with an override of every field they
+        see differently. Users that already have the canonical movie keep it as it is.
+
+        Returns:
+            dict: "groups" (duplicated movies found), "removed" (deleted movies) and "overrides" (created overrides).
+            str: "error" if a database error occurred.
+        """
+        try:
+            groups = {}
+            for movie in self.db.session.execute(
+                    select(Movie.id, Movie.title_normalized, Movie.director, Movie.publication_year, Movie.poster_url,
+                           *(getattr(Movie, field) for field in OVERRIDE_FIELDS))
+                    .where(Movie.lookup_status == "ready")
+                    .order_by(Movie.id)):
+                if movie.poster_url and movie.poster_url.startswith(("http://", "https://")):
+                    key = ("poster", movie.poster_url)
+                else:
+                    key = ("movie", movie.title_normalized, movie.director, movie.publication_year)
+                groups.setdefault(key, []).append(movie)
+            groups = [group for group in groups.values() if len(group) > 1]
+
+            duplicate_ids = [movie.id for group in groups for movie in group[1:]]
+            seen = {}
+            for chunk in self._chunks(duplicate_ids):
+                for row in self.db.session.execute(
+                        select(user_movie_association.c.user_id, user_movie_association.c.movie_id,
+                               *(getattr(MovieOverride, field) for field in OVERRIDE_FIELDS))
+                        .outerjoin(MovieOverride,
+                                   (MovieOverride.user_id == user_movie_association.c.user_id)
+                                   & (MovieOverride.movie_id == user_movie_association.c.movie_id))
+                        .where(user_movie_association.c.movie_id.in_(chunk))):
+                    seen.setdefault(row.movie_id, []).append(row)
+            assigned = set()
+            for chunk in self._chunks([group[0].id for group in groups]):
+                assigned.update(self.db.session.execute(
+                    select(user_movie_association.c.user_id, user_movie_association.c.movie_id)
+                    .where(user_movie_association.c.movie_id.in_(chunk))
+                ).tuples())
+
+            moves, overrides = [], {}
+            for canonical, *duplicates in groups:
+                for duplicate in duplicates:
+                    for link in seen.get(duplicate.id, ()):
+                        pair = (link.user_id, canonical.id)
+                        if pair in assigned:
+                            continue
+                        assigned.add(pair)
+                        moves.append(pair)
+                        # What the user saw: their override, else the values of the duplicate
+                        seen_values = {field: getattr(link, field) if getattr(link, field) is not None
+                                       else getattr(duplicate, field) for field in OVERRIDE_FIELDS}
+                        overrides[pair] = {field: value if value != getattr(canonical, field) else None
+                                           for field, value in seen_values.items()}
+
+            self._mark_pages_changed(*{f"user:{link.user_id}" for links in seen.values() for link in links})
+            if duplicate_ids:
+                jobs = MovieLookupJob.__table__
+                self.db.session.execute(
+                    update(jobs).where(jobs.c.movie_id == bindparam("duplicate_id")).values(movie_id=bindparam("canonical_id")),
+                    [{"duplicate_id": duplicate.id, "canonical_id": canonical.id}
+                     for canonical, *duplicates in groups for duplicate in duplicates]
+                )
+            for chunk in self._chunks(duplicate_ids):
+                self.db.session.execute(delete(user_movie_association).where(user_movie_association.c.movie_id.in_(chunk)))
+            self._delete_movies(duplicate_ids)
+            self._assign_movies(moves)
+            self._save_overrides(overrides)
+            # The moved users now see their old values through overrides, recount instead of tracking every step
+            rebuild_stats(self.db.session)
+            self._mark_pages_changed("stats")
+            self.db.session.commit()
+            return {"groups": len(groups), "removed": len(duplicate_ids),
+                    "overrides": sum(1 for values in overrides.values() if any(value is not None for value in values.values()))}
+
+        except SQLAlchemyError as e:
+            self.db.session.rollback()
+            print(f"A database error occurred while compacting the movies: {e}")
+            return "error"
+
+
+    def rebuild_stats(self):
+        """
+        Recomputes the statistics summary tables from all lists, for a backfill or after a manual change.
+
+        Returns:
+            dict: The number of rows of every summary table.
+            str: "error" if a database error occurred.
+        """
+        try:
+            result = rebuild_stats(self.db.session)
+            self._mark_pages_changed("stats", *(f"user:{user_id}" for user_id in self.db.session.scalars(select(User.id))))
+            self.db.session.commit()
+            return result
+
+        except SQLAlchemyError as e:
+            self.db.session.rollback()
+            print(f"A database error occurred while rebuilding the statistics: {e}")
+            return "error"
+
+
+    def get_user_stats(self, user_id, top=5):
+        """
+        Retrieves a user's statistics from the summary tables, with primary key and index lookups only.
+
+        Only movies whose OMDb lookup is done count, with the values the user sees.
+
+        Args:
+            user_id (int): The ID of the user.
+            top (int): Number of favourite directors and decades.
+
+        Returns:
+            dict: "movie_count", "average_rating" (None without rated movies), "favourite_directors" and
+                  "favourite_decades" (lists of dicts with the director or decade and its "movie_count").
+            str: "error" if the user does not exist.
+        """
+        try:
+            totals = self.db.session.get(UserStats, user_id)
+            if totals is None and not self._user_exists(user_id):
+                return "error"
+            directors = self.db.session.execute(
+                select(UserDirectorStats.director, UserDirectorStats.movie_count)
+                .where(UserDirectorStats.user_id == user_id)
+                .where(UserDirectorStats.movie_count > 0)
+                .order_by(UserDirectorStats.movie_count.desc(), UserDirectorStats.director)
+                .limit(top)
+            ).all()
+            decades = self.db.session.execute(
+                select(UserDecadeStats.decade, UserDecadeStats.movie_count)
+                .where(UserDecadeStats.user_id == user_id)
+                .where(UserDecadeStats.movie_count > 0)
+                .order_by(UserDecadeStats.movie_count.desc(), UserDecadeStats.decade)
+                .limit(top)
+            ).all()
+            rated_count = totals.rated_count if totals else 0
+            return {
+                "movie_count": totals.movie_count if totals else 0,
+                "average_rating": round(totals.rating_sum / rated_count, 2) if rated_count else None,
+                "favourite_directors": [{"director": director, "movie_count": count} for director, count in directors],
+                "favourite_decades": [{"decade": decade, "movie_count": count} for decade, count in decades],
+            }
+
+        except SQLAlchemyError as e:
+            self.db.session.rollback()
+            print(f"A database error occurred while getting the statistics of a user: {e}")
+
+
+    def get_most_favourited_movies(self, limit=10):
+        """
+        Retrieves the movies that are in the most lists, from the summary table.
+
+        Args:
+            limit (int): Maximum number of movies.
+
+        Returns:
+            list: Rows with the Movie columns and "user_count", most favourited first.
+        """
+        limit = max(1, min(limit, self.MAX_PAGE_SIZE))
+        try:
+            return self.db.session.execute(
+                select(*Movie.__table__.columns, MovieFavouriteCount.user_count)
+                .join(Movie, Movie.id == MovieFavouriteCount.movie_id)
+                .where(MovieFavouriteCount.user_count > 0)
+                .order_by(MovieFavouriteCount.user_count.desc(), MovieFavouriteCount.movie_id)
+                .limit(limit)
+            ).all()
+
+        except SQLAlchemyError as e:
+            self.db.session.rollback()
+            print(f"A database error occurred while getting the most favourited movies: {e}")
+            return []
+
+
+    def refresh_recommendations(self, full=False):
+        """
+        Recomputes the stored neighbours of the movies that share a user with a list change since the last refresh.
+
+        The favourites are loaded into a sparse users x movies matrix and the neighbours are computed
+        with sparse products in blocks, see recommendations.compute_neighbours. Every block replaces the
+        neighbours of its movies and commits, so the write lock is only held briefly and the pages
+        always find neighbours. A full refresh also removes the neighbours of movies nobody has anymore.
+
+        Args:
+            full (bool): Recompute all movies, e.g. on a nightly schedule. Done automatically the first
+                         time and when many movies changed.
+
+        Returns:
+            dict: "full" (whether all movies were recomputed), "movies" (recomputed movies), "neighbours"
+                  (stored neighbours), "favourites" (entries of the matrix), "matrix_bytes" (memory of the
+                  matrix) and "seconds".
+            str: "error" if a database error occurred.
+        """
+        # NumPy and SciPy take longer to import than the rest of the app, only the refresh needs them
+        from datamanager.recommendations import compute_neighbours, load_favourites_matrix, movies_of_users
+
+        started_at = time.perf_counter()
+        try:
+            last_change_id = self.db.session.scalar(select(func.max(RecommendationChange.id)))
+            if not full and not self.db.session.scalar(select(select(MovieNeighbour.movie_id).exists())):
+                full = True
+            if not full and last_change_id is None:
+                return {"full": False, "movies": 0, "neighbours": 0, "favourites": 0, "matrix_bytes": 0,
+                        "seconds": time.perf_counter() - started_at}
+
+            favourites = load_favourites_matrix(self.db.session)
+            stale_movie_ids = None
+            if not full:
+                changes = self.db.session.execute(
+                    select(RecommendationChange.user_id, RecommendationChange.movie_id)
+                    .where(RecommendationChange.id <= last_change_id)
+                ).all()
+                stale_movie_ids = {movie_id for _, movie_id in changes if movie_id is not None}
+                stale_movie_ids.update(movies_of_users(
+                    favourites, {user_id for user_id, _ in changes if user_id is not None}
+                ).tolist())
+                if len(stale_movie_ids) > self.RECOMMENDATION_FULL_REFRESH_SHARE * len(favourites.movie_ids):
+                    full, stale_movie_ids = True, None
+
+            movie_count, neighbour_count = 0, 0
+            for block_ids, movie_ids, neighbour_ids, scores in compute_neighbours(
+                    favourites, stale_movie_ids, self.RECOMMENDATION_NEIGHBOURS):
+                for chunk in self._chunks(block_ids.tolist()):
+                    self.db.session.execute(delete(MovieNeighbour).where(MovieNeighbour.movie_id.in_(chunk)))
+                self._bulk_insert(MovieNeighbour.__table__, [
+                    {"movie_id": movie_id, "neighbour_id": neighbour_id, "score": score}
+                    for movie_id, neighbour_id, score in zip(movie_ids.tolist(), neighbour_ids.tolist(), scores.tolist())
+                ])
+                self.db.session.commit()
+                movie_count += len(block_ids)
+                neighbour_count += len(movie_ids)
+
+            # Movies that left every list keep no neighbours
+            if full:
+                self.db.session.execute(delete(MovieNeighbour).where(MovieNeighbour.movie_id.not_in(
+                    select(user_movie_association.c.movie_id)
+                    .join(Movie, Movie.id == user_movie_association.c.movie_id)
+                    .where(Movie.lookup_status == "ready")
+                )))
+            else:
+                for chunk in self._chunks(sorted(set(stale_movie_ids) - set(favourites.movie_ids.tolist()))):
+                    self.db.session.execute(delete(MovieNeighbour).where(MovieNeighbour.movie_id.in_(chunk)))
+            if last_change_id is not None:
+                self.db.session.execute(delete(RecommendationChange).where(RecommendationChange.id <= last_change_id))
+            self.db.session.commit()
+            matrix = favourites.matrix
+            return {"full": full, "movies": movie_count, "neighbours": neighbour_count, "favourites": matrix.nnz,
+                    "matrix_bytes": matrix.data.nbytes + matrix.indices.nbytes + matrix.indptr.nbytes,
+                    "seconds": time.perf_counter() - started_at}
+
         except SQLAlchemyError as e:
             self.db.session.rollback()
-            print(f"A database error occurred while updating the movie: {e}")
+            print(f"A database error occurred while refreshing the recommendations: {e}")
+            return "error"
 
 
-    def get_user(self, user_id):
+    def get_recommendations(self, user_id, limit=10):
+        """
+        Retrieves the movies most similar to a user's list that are not in it yet, from the stored neighbours.
+
+        A movie's score is the sum of its similarities to the movies of the list, so a movie close to many
+        of them ranks first. Reads only the neighbours of the user's movies through the primary key.
+
+        Args:
+            user_id (int): The ID of the user.
+            limit (int): Maximum number of movies.
+
+        Returns:
+            list: Rows with the Movie columns and "score", best first.
+            str: "error" if the user does not exist.
+        """
+        limit = max(1, min(limit, self.MAX_PAGE_SIZE))
+        try:
+            with self._read_session(f"user:{user_id}") as session:
+                if not self._user_exists(user_id, session):
+                    return "error"
+                user_movie_ids = select(user_movie_association.c.movie_id) \
+                    .where(user_movie_association.c.user_id == user_id)
+                score = func.sum(MovieNeighbour.score).label("score")
+                return session.execute(
+                    select(*Movie.__table__.columns, score)
+                    .join(Movie, Movie.id == MovieNeighbour.neighbour_id)
+                    .where(MovieNeighbour.movie_id.in_(user_movie_ids))
+                    .where(MovieNeighbour.neighbour_id.not_in(user_movie_ids))
+                    .where(Movie.lookup_status == "ready")
+                    .group_by(Movie.id)
+                    .order_by(score.desc(), Movie.id)
+                    .limit(limit)
+                ).all()
+
+        except SQLAlchemyError as e:
+            self.db.session.rollback()
+            print(f"A database error occurred while getting the recommendations of a user: {e}")
+            return []
+
+
+    def get_user(self, user_id, with_movies=False):
         """
         Retrieves a user by their ID.
 
         Args:
             user_id (int): The ID of the user to retrieve.
+            with_movies (bool): Also load the user's movies with one additional query.
 
         Returns:
             User: The User object if found, otherwise "Unknown".
         """
+        if self.read_model is not None and not with_movies:
+            user = self.read_model.get_user(user_id)
+            return user if user is not None else "error"
         try:
-            user = self.db.session.query(User) \
-            .filter(User.id == user_id).first()
+            query = self.db.session.query(User)
+            if with_movies:
+                query = query.options(selectinload(User.movies))
+            user = query.filter(User.id == user_id).first()
             if not user:
                 return "error"
             return user
@@ -270,19 +1062,34 @@ class SQLiteDataManager(DataManagerInterface):
             print(f"A database error occurred at getting all users: {e}")
 
 
-    def get_movie(self, movie_id):
+    def get_movie(self, movie_id, fields=None, user_id=None):
         """
         Retrieves a movie by its ID.
 
         Args:
             movie_id (int): The ID of the movie to retrieve.
+            fields (list): Names of the Movie columns to load, all columns if None.
+            user_id (int): If given, the movie as this user sees it, with their overrides merged in.
+                           Movies that are not in the user's list are not found.
 
         Returns:
-            Movie: The Movie object if found, otherwise "Unknown".
+            Movie: The Movie object (a row for a user) if found, otherwise "Unknown".
         """
+        if self.read_model is not None:
+            self._check_fields(Movie, fields)
+            movie = self.read_model.get_movie(movie_id, user_id)
+            return movie if movie is not None else "error"
+        groups = (f"user:{user_id}",) if user_id is not None else ()
         try:
-            movie = self.db.session.query(Movie) \
-            .filter(Movie.id == movie_id).first()
+            with self._read_session(*groups) as session:
+                if user_id is not None:
+                    movie = session.execute(
+                        self._select_user_movies(user_id, fields).where(Movie.id == movie_id)
+                    ).first()
+                else:
+                    movie = session.scalars(
+                        self._select_fields(Movie, fields).where(Movie.id == movie_id)
+                    ).first()
             if not movie:
                 return "error"
             return movie
@@ -292,6 +1099,525 @@ class SQLiteDataManager(DataManagerInterface):
             print(f"A database error occurred at getting all movies: {e}")
 
 
+    def search_movies(self, query, user_id=None, limit=20):
+        """
+        Searches movie titles and directors with the full-text index, best matches first.
+
+        Words match as prefixes and misspelled words are matched against similar indexed words.
+
+        Args:
+            query (str): The search query.
+            user_id (int): Only search the movies of this user, the whole library if None.
+            limit (int): Maximum number of results.
+
+        Returns:
+            list: The matching Movie objects, for a user rows with their overrides merged in.
+        """
+        limit = max(1, min(limit, self.MAX_PAGE_SIZE))
+        try:
+            match = build_match_query(self.db.session, query)
+            if match is None:
+                return []
+            statement = select(Movie) if user_id is None else self._select_user_movies(user_id)
+            statement = statement \
+                .join(movies_fts, movies_fts.c.rowid == Movie.id) \
+                .where(text("movies_fts MATCH :match").bindparams(match=match)) \
+                .where(Movie.lookup_status != "failed") \
+                .order_by(RANK, Movie.id).limit(limit)
+            if user_id is None:
+                return list(self.db.session.scalars(statement))
+            return self.db.session.execute(statement).all()
+
+        except SQLAlchemyError as e:
+            self.db.session.rollback()
+            print(f"A database error occurred while searching movies: {e}")
+            return []
+
+
+    def _select_fields(self, model, fields, *required_fields):
+        """
+        Builds a select() of the model that only loads the given columns plus the required ones.
+
+        Raises:
+            ValueError: If a field is not a column of the model.
+        """
+        if fields is None:
+            return select(model)
+        self._check_fields(model, fields)
+        return select(model).options(load_only(*(getattr(model, field) for field in {*fields, *required_fields})))
+
+    def _check_fields(self, model, fields):
+        """
+        Checks the names of the columns a caller asked for.
+
+        Raises:
+            ValueError: If a field is not a column of the model.
+        """
+        unknown_fields = set(fields or ()) - set(model.__table__.columns.keys())
+        if unknown_fields:
+            raise ValueError(f"Unknown fields: {', '.join(sorted(unknown_fields))}")
+
+    def _select_user_movies(self, user_id, fields=None, *required_fields):
+        """
+        Builds a select() of a user's movies as rows with the Movie columns, the user's overrides merged
+        over the shared movie with one outer join. Only the given fields plus the required ones and the ID
+        are selected if fields is given.
+
+        Raises:
+            ValueError: If a field is not a column of Movie.
+        """
+        column_names = Movie.__table__.columns.keys()
+        if fields is not None:
+            self._check_fields(Movie, fields)
+            column_names = [name for name in column_names if name in {"id", *fields, *required_fields}]
+        columns = [func.coalesce(getattr(MovieOverride, name), getattr(Movie, name)).label(name)
+                   if name in OVERRIDE_FIELDS else getattr(Movie, name) for name in column_names]
+        return select(*columns).select_from(Movie) \
+            .join(user_movie_association, user_movie_association.c.movie_id == Movie.id) \
+            .outerjoin(MovieOverride, (MovieOverride.user_id == user_movie_association.c.user_id)
+                       & (MovieOverride.movie_id == Movie.id)) \
+            .where(user_movie_association.c.user_id == user_id)
+
+    def _add_local_movie(self, user_id, movie_name):
+        """
+        Assigns a movie of the local library with the same words, which needs no OMDb request at all,
+        or queues the lookup in background mode.
+
+        Returns:
+            str: A message which will be displayed on user_favourites.html, or None if OMDb has to be asked.
+        """
+        local_movie = self._find_local_movie(movie_name)
+        if local_movie:
+            return self._assign_existing_movie(user_id, local_movie.id, local_movie.title)
+        if self.lookup_queue is not None:
+            return self._queue_movie_for_user(user_id, movie_name)
+        return None
+
+    def _queue_movie_for_user(self, user_id, movie_name):
+        """
+        Assigns a pending placeholder movie whose OMDb lookup is queued.
+
+        Returns:
+            str: A message which will be displayed on user_favourites.html .
+        """
+        placeholder = Movie(
+            title = movie_name,
+            director = "",
+            publication_year = 0,
+            lookup_status = "pending"
+        )
+        twin = self._insert_movies_once([placeholder]).get(placeholder.title_normalized)
+        if twin is not None:
+            # Another request queued or added the title since _find_local_movie
+            return self._assign_existing_movie(user_id, twin.id, twin.title)
+        self._assign_movie(user_id, placeholder.id)
+        self.lookup_queue.enqueue(self.db.session, placeholder.id, movie_name)
+        self.db.session.commit()
+        self.lookup_queue.notify()
+        return f"Movie {movie_name} is being looked up and will appear in your list shortly."
+
+    def _assign_existing_movie(self, user_id, movie_id, title):
+        """
+        Assigns a movie that is already in the database and commits.
+
+        Returns:
+            str: A message which will be displayed on user_favourites.html .
+        """
+        if self._assign_movie(user_id, movie_id):
+            self.db.session.commit()
+            return f"Movie {title} successfully assigned to your list."
+        return f"Movie {title} is already in your list."
+
+    def _find_local_movie(self, movie_name):
+        """
+        Finds a ready or pending movie whose title consists of the same words as movie_name,
+        ignoring case, accents and punctuation, with the full-text index.
+
+        Returns:
+            Row: The movie's id and title, or None.
+        """
+        if self.read_model is not None:
+            # The ID is written right away, so other processes' deletions must be seen
+            self.read_model.sync(force=True)
+            return self.read_model.find_local_movie(movie_name)
+        match = title_match_query(movie_name)
+        if match is None:
+            return None
+        words = search_words(movie_name)
+        candidates = self.db.session.execute(
+            select(Movie.id, Movie.title)
+            .join(movies_fts, movies_fts.c.rowid == Movie.id)
+            .where(text("movies_fts MATCH :match").bindparams(match=match))
+            .where(Movie.lookup_status != "failed")
+            .order_by(Movie.lookup_status.desc(), Movie.id)
+            .limit(20)
+        ).all()
+        for candidate in candidates:
+            if search_words(candidate.title) == words:
+                return candidate
+        return None
+
+    def _insert_movies_once(self, new_movies):
+        """
+        Adds new Movie objects and flushes, except those whose normalized title got a ready or pending movie
+        from a concurrent request since the caller looked, so racing requests never store a title twice.
+
+        Returns:
+            dict: The Movie that already exists per normalized title, these titles were not added.
+        """
+        if not new_movies:
+            return {}
+        keys = [movie.title_normalized for movie in new_movies]
+        self._lock_titles(keys)
+        twins = {}
+        for chunk in self._chunks(keys):
+            for movie in self.db.session.scalars(
+                    select(Movie)
+                    .where(Movie.title_normalized.in_(chunk))
+                    .where(Movie.lookup_status != "failed")
+                    .order_by(Movie.lookup_status.desc(), Movie.id)):
+                twins.setdefault(movie.title_normalized, movie)
+        self.db.session.add_all(movie for movie in new_movies if movie.title_normalized not in twins)
+        self.db.session.flush()
+        return twins
+
+    def _find_movie_id(self, title, exclude_id=None):
+        """Returns the ID of a ready or pending movie with the same normalized title, or None."""
+        query = select(Movie.id) \
+            .where(Movie.title_normalized == normalize_title(title)) \
+            .where(Movie.lookup_status != "failed")
+        if exclude_id is not None:
+            query = query.where(Movie.id != exclude_id)
+        return self.db.session.scalar(query.order_by(Movie.lookup_status.desc()).limit(1))
+
+    def _user_exists(self, user_id, session=None):
+        """Checks with a single EXISTS query whether a user with the ID exists, in the given or the primary session."""
+        return (session or self.db.session).scalar(select(exists().where(User.id == user_id)))
+
+    def _assign_movie(self, user_id, movie_id):
+        """
+        Adds a row to user_movie unless it is already there, without loading any collection.
+
+        Returns:
+            bool: True if the movie was newly assigned, False if it was already in the list.
+        """
+        return bool(self._assign_movies([(user_id, movie_id)]))
+
+    def _assign_movies(self, assignments):
+        """
+        Adds user_movie rows with set-based INSERT statements, skipping rows that already exist, without committing.
+
+        Returns:
+            set: The (user_id, movie_id) pairs that were newly assigned.
+        """
+        rows = [{"user_id": user_id, "movie_id": movie_id} for user_id, movie_id in dict.fromkeys(assignments)]
+        assigned = {(row.user_id, row.movie_id) for row in self._bulk_insert(
+            user_movie_association, rows,
+            (user_movie_association.c.user_id, user_movie_association.c.movie_id), skip_existing=True
+        )}
+        self._mark_pages_changed(*{f"user:{user_id}" for user_id, _ in assigned})
+        if assigned:
+            self._update_stats(added=self._load_favourites(assigned).values())
+        return assigned
+
+    def _unassign_movies(self, assignments):
+        """
+        Deletes user_movie rows with set-based DELETE statements and the movies no user references anymore,
+        without committing.
+
+        Returns:
+            set: The (user_id, movie_id) pairs that were in the lists.
+        """
+        pair = tuple_(user_movie_association.c.user_id, user_movie_association.c.movie_id)
+        favourites = self._load_favourites(assignments)
+        removed = set()
+        for chunk in self._chunks(list(dict.fromkeys(assignments))):
+            removed.update((row.user_id, row.movie_id) for row in self.db.session.execute(
+                delete(user_movie_association)
+                .where(pair.in_(chunk))
+                .returning(user_movie_association.c.user_id, user_movie_association.c.movie_id)
+            ))
+        self._mark_pages_changed(*{f"user:{user_id}" for user_id, _ in removed})
+        self._update_stats(removed=[favourites[pair] for pair in removed])
+        self._delete_movies({movie_id for _, movie_id in removed}, orphans_only=True)
+        return removed
+
+    def _delete_movies(self, movie_ids, orphans_only=False):
+        """
+        Deletes movies with their neighbours and favourite counts, without committing.
+
+        SQLite does not enforce the foreign keys and reuses the ID of a deleted last movie, so the rows
+        are deleted here instead of waiting for the next recommendation refresh.
+
+        Args:
+            movie_ids (iterable): The IDs of the movies.
+            orphans_only (bool): Only delete the movies that are in no user's list.
+        """
+        deleted_ids = []
+        for chunk in self._chunks(list(movie_ids)):
+            query = delete(Movie).where(Movie.id.in_(chunk))
+            if orphans_only:
+                query = query.where(~exists().where(user_movie_association.c.movie_id == Movie.id))
+            deleted_ids.extend(self.db.session.scalars(
+                query.returning(Movie.id).execution_options(synchronize_session=False)
+            ))
+        for chunk in self._chunks(deleted_ids):
+            self.db.session.execute(delete(MovieNeighbour).where(
+                MovieNeighbour.movie_id.in_(chunk) | MovieNeighbour.neighbour_id.in_(chunk)
+            ))
+            self.db.session.execute(delete(MovieFavouriteCount).where(MovieFavouriteCount.movie_id.in_(chunk)))
+
+    def _load_favourites(self, assignments):
+        """
+        Loads the (user_id, movie_id) pairs that are in the users' lists with IN queries.
+
+        Returns:
+            dict: Rows of user_id, movie_id, director, publication_year, rating (as the user sees them)
+                  and lookup_status by pair.
+        """
+        pair = tuple_(user_movie_association.c.user_id, user_movie_association.c.movie_id)
+        favourites = {}
+        for chunk in self._chunks(list(dict.fromkeys(assignments))):
+            favourites.update(((row.user_id, row.movie_id), row) for row in self.db.session.execute(
+                select(user_movie_association.c.user_id, user_movie_association.c.movie_id,
+                       *(func.coalesce(getattr(MovieOverride, field), getattr(Movie, field)).label(field)
+                         for field in ("director", "publication_year", "rating")),
+                       Movie.lookup_status)
+                .join(Movie, Movie.id == user_movie_association.c.movie_id)
+                .outerjoin(MovieOverride, (MovieOverride.user_id == user_movie_association.c.user_id)
+                           & (MovieOverride.movie_id == user_movie_association.c.movie_id))
+                .where(pair.in_(chunk))
+            ))
+        return favourites
+
+    def _update_stats(self, added=(), removed=()):
+        """Counts added and removed favourites in the stats tables, without committing."""
+        if apply_stats_changes(self.db.session, added, removed):
+            self._mark_pages_changed("stats")
+
+    def _import_batch(self, user_id, batch, summary):
+        """Writes one batch of parsed records of import_user_movies, counts them in the summary and commits."""
+        # A title listed twice, the later record wins
+        records = {normalize_title(record[0]): record for record in batch}
+        self._lock_titles(records)
+        library_movies = {}
+        for chunk in self._chunks(list(records)):
+            for movie in self.db.session.execute(
+                    select(Movie.id, Movie.title_normalized, *(getattr(Movie, field) for field in OVERRIDE_FIELDS))
+                    .where(Movie.title_normalized.in_(chunk))
+                    .where(Movie.lookup_status == "ready")
+                    .order_by(Movie.id)):
+                library_movies.setdefault(movie.title_normalized, movie)
+        movie_ids = {key: movie.id for key, movie in library_movies.items()}
+        new_movies = [{"title": title, "title_normalized": key, "director": director, "publication_year": publication_year,
+                       "rating": rating, "poster_url": poster_url}
+                      for key, (title, director, publication_year, rating, poster_url) in records.items()
+                      if key not in library_movies]
+        movie_ids.update((movie.title_normalized, movie.id) for movie in self._bulk_insert(
+            Movie.__table__, new_movies, (Movie.__table__.c.id, Movie.__table__.c.title_normalized)
+        ))
+
+        assigned = self._assign_movies([(user_id, movie_id) for movie_id in movie_ids.values()])
+        for key, movie_id in movie_ids.items():
+            if (user_id, movie_id) not in assigned:
+                summary["already_in_list"] += 1
+            elif key in library_movies:
+                summary["assigned"] += 1
+            else:
+                summary["added"] += 1
+        new_values = {(user_id, movie.id): records[key][:len(OVERRIDE_FIELDS)] for key, movie in library_movies.items()}
+        self._override_movies({movie.id: movie for movie in library_movies.values()}, new_values,
+                              self._load_favourites(list(new_values)))
+        self.db.session.commit()
+
+    def _override_movies(self, movies, new_values, favourites):
+        """
+        Stores new values of movies in users' lists as their overrides and moves the stats along, without committing.
+
+        Args:
+            movies (dict): Rows of the ID and the OVERRIDE_FIELDS of the shared movies by ID.
+            new_values (dict): The new values of the OVERRIDE_FIELDS by (user_id, movie_id).
+            favourites (dict): The pairs as loaded by _load_favourites, all of new_values must be in it.
+        """
+        overrides, updated_favourites = {}, {}
+        for pair, values in new_values.items():
+            movie = movies[pair[1]]
+            overrides[pair] = {field: value if value != getattr(movie, field) else None
+                               for field, value in zip(OVERRIDE_FIELDS, values)}
+            _, new_director, new_publication_year, new_rating = values
+            updated_favourites[pair] = (*pair, new_director, new_publication_year, new_rating,
+                                        favourites[pair].lookup_status)
+        self._save_overrides(overrides)
+        self._update_stats(added=updated_favourites.values(),
+                           removed=[favourites[pair] for pair in updated_favourites])
+
+    def _save_overrides(self, overrides):
+        """
+        Upserts the overrides given as {(user_id, movie_id): {field: value or None}} with set-based statements
+        and deletes the ones without any changed field, without committing.
+        """
+        changed = [{"user_id": user_id, "movie_id": movie_id, **values}
+                   for (user_id, movie_id), values in overrides.items()
+                   if any(value is not None for value in values.values())]
+        cleared = [pair for pair, values in overrides.items() if all(value is None for value in values.values())]
+        for chunk in self._chunks(changed):
+            statement = self._insert(MovieOverride).values(chunk)
+            self.db.session.execute(statement.on_conflict_do_update(
+                index_elements=["user_id", "movie_id"],
+                set_={field: statement.excluded[field] for field in OVERRIDE_FIELDS}
+            ))
+        for chunk in self._chunks(cleared):
+            self.db.session.execute(
+                delete(MovieOverride).where(tuple_(MovieOverride.user_id, MovieOverride.movie_id).in_(chunk))
+            )
+        self._mark_pages_changed(*{f"user:{user_id}" for user_id, _ in overrides})
+
+    def _find_movies_and_users(self, assignments):
+        """
+        Loads the movies and users of (user_id, movie_id) pairs with IN queries.
+
+        Returns:
+            tuple: A dict of the found movies (rows of the ID and the OVERRIDE_FIELDS) by ID and a set of the found user IDs.
+        """
+        movies, user_ids = {}, set()
+        for chunk in self._chunks(list({movie_id for _, movie_id in assignments})):
+            movies.update((movie.id, movie) for movie in self.db.session.execute(
+                select(Movie.id, *(getattr(Movie, field) for field in OVERRIDE_FIELDS)).where(Movie.id.in_(chunk))
+            ))
+        for chunk in self._chunks(list({user_id for user_id, _ in assignments})):
+            user_ids.update(self.db.session.scalars(select(User.id).where(User.id.in_(chunk))))
+        return movies, user_ids
+
+    def _check_assignments(self, assignments, movies, user_ids):
+        """
+        Starts the report of a batch method with one entry per pair, pairs of a missing movie or user
+        already get the status "not_found".
+        """
+        report = []
+        for user_id, movie_id in assignments:
+            entry = {"user_id": user_id, "movie_id": movie_id}
+            if movie_id not in movies:
+                entry["status"] = "not_found"
+                entry["message"] = f"Movie with ID {movie_id} not found."
+            elif user_id not in user_ids:
+                entry["status"] = "not_found"
+                entry["message"] = f"User with ID {user_id} not found."
+            report.append(entry)
+        return report
+
+    def _parse_movie_update(self, update_data):
+        """
+        Converts and validates the new values of an update_movies entry.
+
+        Returns:
+            tuple: title, director, publication year (int) and rating (float).
+
+        Raises:
+            TypeError: If the input data is not of the expected type.
+            ValueError: If the publication year or rating is not a number.
+        """
+        new_title, new_director = update_data["title"], update_data["director"]
+        new_rating = float(update_data["rating"])
+        new_publication_year = int(update_data["publication_year"])
+        if self._input_not_string(new_title):
+            raise TypeError("Title must be a string.")
+        if self._input_not_string(new_director):
+            raise TypeError("Director must be a string.")
+        if self._input_not_int(new_publication_year):
+            raise TypeError("Publication year must be an integer.")
+        if self._input_not_float_or_None(new_rating):
+            raise TypeError("Rating must be a float.")
+        return new_title, new_director, new_publication_year, new_rating
+
+    def _report_message(self, report, success_status):
+        """Returns the message of a single-entry batch report on success, otherwise prints it and returns None."""
+        if report == "error":
+            return None
+        entry = report[0]
+        if entry["status"] == success_status:
+            return entry["message"]
+        print(entry["message"])
+        return None
+
+    def _insert(self, table):
+        """Returns an INSERT of the database's dialect, which supports ON CONFLICT clauses and RETURNING."""
+        return sqlite_insert(table)
+
+    def _bulk_insert(self, table, rows, returning=(), skip_existing=False):
+        """
+        Inserts rows with set-based multi-row INSERT statements, without committing.
+
+        Without returning columns, the rows are sent with executemany instead: one statement compiled once,
+        compiling a multi-row INSERT per chunk takes longer than the driver needs for the rows.
+
+        Args:
+            table (Table): The table.
+            rows (list): The rows as dicts with the same keys.
+            returning (tuple): Columns of the inserted rows to return.
+            skip_existing (bool): Skip rows that conflict with an existing row.
+
+        Returns:
+            list: The returning columns of the inserted rows.
+        """
+        if not rows:
+            return []
+        if not returning:
+            statement = self._insert(table)
+            if skip_existing:
+                statement = statement.on_conflict_do_nothing()
+            self.db.session.execute(statement, rows)
+            return []
+        inserted = []
+        for chunk in self._chunks(rows):
+            statement = self._insert(table).values(chunk)
+            if skip_existing:
+                statement = statement.on_conflict_do_nothing()
+            inserted.extend(self.db.session.execute(statement.returning(*returning)))
+        return inserted
+
+    def _lock_titles(self, keys):
+        """
+        Serializes the transactions that insert movies with these normalized titles until they commit.
+
+        SQLite has one writer at a time, so taking the write lock with an empty UPDATE is enough, after it
+        the transaction sees every movie committed before.
+        """
+        self.db.session.execute(text("UPDATE movies SET id = id WHERE 0"))
+
+    @contextmanager
+    def _read_session(self, *groups):
+        """
+        Yields the session a read method runs its queries in, the primary session here.
+
+        A backend with read replicas can answer from one, groups are the page groups of the read
+        (e.g. "user:3") so it can tell whether the data was just written. A replica session is closed
+        after the block, so a read method has to load everything its callers use inside it.
+        """
+        yield self.db.session
+
+    def _chunks(self, items):
+        """Splits a list into chunks of WRITE_BATCH_SIZE items."""
+        for start in range(0, len(items), self.WRITE_BATCH_SIZE):
+            yield items[start:start + self.WRITE_BATCH_SIZE]
+
+    def _mark_pages_changed(self, *groups):
+        """Remembers page cache groups to invalidate once the current transaction commits."""
+        if self.page_cache is not None:
+            self.db.session.info.setdefault(self._changed_pages_key, set()).update(groups)
+
+    def _invalidate_pages(self, session):
+        """Invalidates the page cache groups changed by the committed transaction."""
+        for group in session.info.pop(self._changed_pages_key, ()):
+            self.page_cache.invalidate(group)
+
+    def _discard_page_invalidations(self, session):
+        """Forgets the changed groups of a rolled back transaction."""
+        session.info.pop(self._changed_pages_key, None)
+
+    def _sync_read_model(self, session):
+        """Applies the committed writes to the read model, so the next read already sees them."""
+        self.read_model.sync(force=True)
+
     def _username_already_used(self, new_username):
         """Checks if the username is already taken."""
         existing_user = self.db.session.query(User).filter(User.name == new_username).first()
@@ -300,6 +1626,12 @@ class SQLiteDataManager(DataManagerInterface):
         else:
             return False
 
+    def _parse_rating(self, string_rating):
+        """Converts an OMDb rating like "7.5/10" to a float, None stays None."""
+        if string_rating is not None:
+            return float(string_rating.split("/")[0])
+        return None
+
     def _input_not_string(self, new_input):
         """Validates if the input is not a string."""
         if isinstance(new_input, str):
@@ -11,6 +11,15 @@ class DataManagerInterface(ABC):
         pass
 
 
+    @abstractmethod
+    def get_users_page(self, cursor=None, page_size=50, fields=None):
+        """Abstract method to get one page of users sorted by name, using keyset pagination.
+        Returns the users together with opaque cursors for the next and previous page.
+        If fields is given, only those columns are loaded.
+        """
+        pass
+
+
     @abstractmethod
     def get_all_movies(self):
         """Abstract method to get all movies from the database."""
@@ -23,6 +32,23 @@ class DataManagerInterface(ABC):
         pass
 
 
+    @abstractmethod
+    def get_user_movies_page(self, user_id, sort="title", cursor=None, page_size=24, fields=None):
+        """Abstract method to get one page of a user's movies sorted by title, year or rating,
+        using keyset pagination. Returns the movies together with opaque cursors for the next and previous page.
+        If fields is given, only those columns are loaded.
+        """
+        pass
+
+
+    @abstractmethod
+    def search_movies(self, query, user_id=None, limit=20):
+        """Abstract method to search movie titles and directors, best matches first.
+        Matches word prefixes and tolerates typos. If user_id is given, only that user's movies are searched.
+        """
+        pass
+
+
     @abstractmethod
     def add_user(self, input_name):
         """Abstract method to add a new user to the system. Takes username as input."""
@@ -30,8 +56,40 @@ class DataManagerInterface(ABC):
 
 
     @abstractmethod
-    def add_movie_to_user(self, user_id, movie_id):
-        """Abstract method to associate a movie with a user by their respective IDs"""
+    def add_movie_to_user(self, user_id, movie_id, api_data=None):
+        """Abstract method to associate a movie with a user by their respective IDs.
+        api_data is the OMDb result if the caller already looked the title up, e.g. asynchronously.
+        """
+        pass
+
+
+    @abstractmethod
+    def add_local_movie_to_user(self, user_id, movie_name):
+        """Abstract method to add a movie without an OMDb lookup, if the library already has it
+        or the lookup can be queued. Returns None if the movie needs an OMDb lookup first.
+        """
+        pass
+
+
+    @abstractmethod
+    def add_movies_to_user(self, user_id, movie_names):
+        """Abstract method to import many movies by name into a user's list at once.
+        Returns a result report with one entry per requested title.
+        """
+        pass
+
+
+    @abstractmethod
+    def assign_movies_to_users(self, assignments):
+        """Abstract method to assign many existing movies to users, given as (user_id, movie_id) pairs,
+        in one transaction. Returns a result report with one entry per pair.
+        """
+        pass
+
+
+    @abstractmethod
+    def apply_movie_lookup(self, movie_id, api_data):
+        """Abstract method to fill in a pending placeholder movie with the result of its background OMDb lookup."""
         pass
 
 
@@ -39,7 +97,17 @@ class DataManagerInterface(ABC):
     def update_movie(self, user_id, movie_id, new_title, new_director, new_publication_year, new_rating):
         """Abstract method to update a movie's details for a given user, if another user is using the movie it wont
         change his movie details.
-        It allows modification of the movie's title, director, publication year, and rating.
+        It allows modification of the movie's title, director, publication year, and rating,
+        which are kept as the user's override of the shared movie.
+        """
+        pass
+
+
+    @abstractmethod
+    def update_movies(self, updates):
+        """Abstract method to update many movies of users in one transaction, like update_movie.
+        Each update is a dict with user_id, movie_id, title, director, publication_year and rating.
+        Returns a result report with one entry per update.
         """
         pass
 
@@ -50,6 +118,64 @@ class DataManagerInterface(ABC):
         pass
 
 
+    @abstractmethod
+    def remove_movies_from_favourites(self, assignments):
+        """Abstract method to remove many movies, given as (user_id, movie_id) pairs, from the users' lists
+        in one transaction. Returns a result report with one entry per pair.
+        """
+        pass
+
+
+    @abstractmethod
+    def stream_user_movies(self, user_id, batch_size=500):
+        """Abstract method to stream the movies of a user, as they see them, for an export without
+        loading the whole list into memory.
+        """
+        pass
+
+
+    @abstractmethod
+    def import_user_movies(self, user_id, records, batch_size=500):
+        """Abstract method to import an exported list into a user's collection batch by batch.
+        Returns a summary with the number of added, assigned and invalid records.
+        """
+        pass
+
+
+    @abstractmethod
+    def rebuild_stats(self):
+        """Abstract method to recompute the statistics summary tables from all lists."""
+        pass
+
+
+    @abstractmethod
+    def get_user_stats(self, user_id, top=5):
+        """Abstract method to get a user's movie count, average rating and favourite directors and decades
+        from the precomputed statistics.
+        """
+        pass
+
+
+    @abstractmethod
+    def get_most_favourited_movies(self, limit=10):
+        """Abstract method to get the movies that are in the most users' lists."""
+        pass
+
+
+    @abstractmethod
+    def refresh_recommendations(self, full=False):
+        """Abstract method to recompute the stored neighbours of the movies whose lists changed,
+        or of all movies if full is True.
+        """
+        pass
+
+
+    @abstractmethod
+    def get_recommendations(self, user_id, limit=10):
+        """Abstract method to get the movies most similar to a user's list that are not in it yet."""
+        pass
+
+
     @abstractmethod
     def get_user(self, user_id):
         """Abstract method to get a user by their ID."""
@@ -57,8 +183,18 @@ class DataManagerInterface(ABC):
 
 
     @abstractmethod
-    def get_movie(self, movie_id):
-        """Abstract method to get a movie by its ID."""
+    def get_movie(self, movie_id, fields=None, user_id=None):
+        """Abstract method to get a movie by its ID. If fields is given, only those columns are loaded.
+        If user_id is given, the movie is returned as that user sees it, with their overrides.
+        """
+        pass
+
+
+    @abstractmethod
+    def compact_movies(self):
+        """Abstract method to fold movies duplicated by earlier edits back into canonical movies
+        with per-user overrides. Returns counts of the found groups, removed movies and created overrides.
+        """
         pass
 
 
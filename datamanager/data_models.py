@@ -1,4 +1,6 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.orm import validates
+from omdbapi.response_cache import normalize_title
 
 
 db = SQLAlchemy()
@@ -6,7 +8,8 @@ db = SQLAlchemy()
 user_movie_association  = db.Table(
     'user_movie',
     db.Column('user_id', db.Integer, db.ForeignKey('users.id'), primary_key=True),
-    db.Column('movie_id', db.Integer, db.ForeignKey('movies.id'), primary_key=True)
+    db.Column('movie_id', db.Integer, db.ForeignKey('movies.id'), primary_key=True),
+    db.Index('ix_user_movie_movie_id', 'movie_id', 'user_id')
 )
 
 class User(db.Model):
@@ -16,6 +19,11 @@ class User(db.Model):
     name = db.Column(db.String, nullable=False)
     movies = db.relationship('Movie', secondary=user_movie_association, back_populates='users')
 
+    # Unique user names, also used by the keyset pagination of the users list
+    __table_args__ = (
+        db.Index('ux_users_name', 'name', unique=True),
+    )
+
     def __str__(self):
         """Returns a string representation of the user."""
         return f"User(name = {self.name})"
@@ -31,8 +39,140 @@ class Movie(db.Model):
     publication_year = db.Column(db.Integer, nullable=False)
     rating = db.Column(db.Float, nullable=True)
     poster_url = db.Column(db.String, nullable=True)
+    title_normalized = db.Column(db.String, nullable=True)
+    # "ready", or "pending"/"failed" for placeholders filled in by the background lookup queue
+    lookup_status = db.Column(db.String, nullable=False, default='ready', server_default='ready')
     users = db.relationship('User', secondary=user_movie_association, back_populates='movies')
 
+    # Case-insensitive title lookups and the keyset pagination of the movie lists per sort order
+    __table_args__ = (
+        db.Index('ix_movies_title_normalized', 'title_normalized'),
+        db.Index('ix_movies_title_id', 'title', 'id'),
+        db.Index('ix_movies_year_id', 'publication_year', 'id'),
+        db.Index('ix_movies_rating_id', db.func.coalesce(rating, -1.0), 'id'),
+    )
+
+    @validates('title')
+    def _set_title_normalized(self, key, title):
+        """Keeps title_normalized in sync whenever the title is set."""
+        self.title_normalized = normalize_title(title) if title is not None else None
+        return title
+
     def __str__(self):
         """Returns a string representation of the movie."""
         return f"Movie(title = {self.title}, rating = {self.rating})"
+
+
+# Movie fields a user can change for themselves with a MovieOverride
+OVERRIDE_FIELDS = ("title", "director", "publication_year", "rating")
+
+
+class MovieOverride(db.Model):
+    """Fields a user changed on top of a shared Movie, NULL means the user sees the movie's own value"""
+    __tablename__ = 'movie_overrides'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    movie_id = db.Column(db.Integer, db.ForeignKey('movies.id'), primary_key=True)
+    title = db.Column(db.String, nullable=True)
+    director = db.Column(db.String, nullable=True)
+    publication_year = db.Column(db.Integer, nullable=True)
+    rating = db.Column(db.Float, nullable=True)
+
+    def __str__(self):
+        """Returns a string representation of the override."""
+        return f"MovieOverride(user_id = {self.user_id}, movie_id = {self.movie_id})"
+
+
+class UserStats(db.Model):
+    """Running totals of a user's ready movies, kept up to date by the data manager"""
+    __tablename__ = 'user_stats'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    movie_count = db.Column(db.Integer, nullable=False, default=0)
+    rated_count = db.Column(db.Integer, nullable=False, default=0)
+    rating_sum = db.Column(db.Float, nullable=False, default=0.0)
+
+
+class UserDirectorStats(db.Model):
+    """Number of a user's movies per director"""
+    __tablename__ = 'user_director_stats'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    director = db.Column(db.String, primary_key=True)
+    movie_count = db.Column(db.Integer, nullable=False, default=0)
+
+    # The user's favourite directors straight from the index
+    __table_args__ = (
+        db.Index('ix_user_director_stats_count', 'user_id', db.desc('movie_count'), 'director'),
+    )
+
+
+class UserDecadeStats(db.Model):
+    """Number of a user's movies per decade of publication"""
+    __tablename__ = 'user_decade_stats'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    decade = db.Column(db.Integer, primary_key=True)
+    movie_count = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        db.Index('ix_user_decade_stats_count', 'user_id', db.desc('movie_count'), 'decade'),
+    )
+
+
+class MovieFavouriteCount(db.Model):
+    """Number of users with a movie in their list, for the most favourited movies"""
+    __tablename__ = 'movie_favourite_counts'
+
+    movie_id = db.Column(db.Integer, db.ForeignKey('movies.id', ondelete='CASCADE'), primary_key=True)
+    user_count = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        db.Index('ix_movie_favourite_counts_count', db.desc('user_count'), 'movie_id'),
+    )
+
+
+class MovieNeighbour(db.Model):
+    """A movie often in the same lists as another, with the cosine similarity of their users, for the recommendations"""
+    __tablename__ = 'movie_neighbours'
+
+    movie_id = db.Column(db.Integer, db.ForeignKey('movies.id', ondelete='CASCADE'), primary_key=True)
+    neighbour_id = db.Column(db.Integer, db.ForeignKey('movies.id', ondelete='CASCADE'), primary_key=True)
+    score = db.Column(db.Float, nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_movie_neighbours_neighbour_id', 'neighbour_id'),
+    )
+
+
+class RecommendationChange(db.Model):
+    """A changed list (user_id and movie_id) or movie (movie_id), logged by triggers until the neighbours are refreshed"""
+    __tablename__ = 'recommendation_changes'
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    user_id = db.Column(db.Integer, nullable=True)
+    movie_id = db.Column(db.Integer, nullable=True)
+
+
+class MovieLookupJob(db.Model):
+    """Queued OMDb lookup that fills in a pending placeholder Movie"""
+    __tablename__ = 'movie_lookup_jobs'
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    movie_id = db.Column(db.Integer, db.ForeignKey('movies.id', ondelete='CASCADE'), nullable=False)
+    query = db.Column(db.String, nullable=False)
+    status = db.Column(db.String, nullable=False, default='queued')
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.Float, nullable=False)
+    available_at = db.Column(db.Float, nullable=False)
+    started_at = db.Column(db.Float, nullable=True)
+    finished_at = db.Column(db.Float, nullable=True)
+    error = db.Column(db.String, nullable=True)
+
+    __table_args__ = (
+        db.Index('ix_movie_lookup_jobs_status', 'status', 'available_at'),
+    )
+
+    def __str__(self):
+        """Returns a string representation of the job."""
+        return f"MovieLookupJob(query = {self.query}, status = {self.status})"
@@ -0,0 +1,115 @@
+import csv
+import io
+import json
+from omdbapi.poster_urls import is_poster_url
+
+
+# Columns of an exported list, the movies as the user sees them
+EXPORT_FIELDS = ("title", "director", "publication_year", "rating", "poster_url")
+# Format: (mimetype, file extension)
+EXPORT_FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "jsonl": ("application/x-ndjson", "jsonl"),
+}
+
+
+def write_records(rows, file_format, rows_per_chunk=500):
+    """
+    Serializes rows as CSV or JSON lines, a few hundred rows per yielded chunk.
+
+    Args:
+        rows (iterable): Rows with the EXPORT_FIELDS as attributes, consumed lazily.
+        file_format (str): "csv" or "jsonl".
+        rows_per_chunk (int): Rows per yielded string.
+
+    Yields:
+        str: The next chunk of the file, for CSV the header first.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer) if file_format == "csv" else None
+    if writer is not None:
+        writer.writerow(EXPORT_FIELDS)
+    buffered = 0
+    for row in rows:
+        values = [getattr(row, field) for field in EXPORT_FIELDS]
+        if writer is not None:
+            writer.writerow(values)
+        else:
+            buffer.write(json.dumps(dict(zip(EXPORT_FIELDS, values)), ensure_ascii=False) + "\n")
+        buffered += 1
+        if buffered >= rows_per_chunk:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            buffered = 0
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def read_records(binary_stream, file_format):
+    """
+    Parses an uploaded list file line by line, so it never has to fit into memory.
+
+    Args:
+        binary_stream: The file as a readable binary stream, e.g. an upload or the request body.
+        file_format (str): "csv" or "jsonl".
+
+    Yields:
+        tuple: The line number and the record as a dict, None for a line that is not a JSON object.
+    """
+    if not hasattr(binary_stream, "read1"):
+        # E.g. the raw request body
+        binary_stream = io.BufferedReader(binary_stream)
+    lines = io.TextIOWrapper(binary_stream, encoding="utf-8", errors="replace", newline="")
+    if file_format == "csv":
+        reader = csv.DictReader(lines)
+        for record in reader:
+            yield reader.line_num, record
+        return
+    for line_number, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            record = None
+        yield line_number, record if isinstance(record, dict) else None
+
+
+def parse_record(record):
+    """
+    Converts and validates a record of an imported list.
+
+    Args:
+        record (dict): The record, values may be strings (CSV) or JSON types. "year" is accepted
+                       for publication_year.
+
+    Returns:
+        tuple: title, director, publication year (int), rating (float or None) and poster URL,
+               "N/A" unless it is on one of the poster hosts.
+
+    Raises:
+        ValueError: If the title is missing or the year or rating is not a number.
+    """
+    if record is None:
+        raise ValueError("Not a JSON object.")
+    title = str(record.get("title") or "").strip()
+    if not title:
+        raise ValueError("The title is missing.")
+    director = str(record.get("director") or "").strip()
+    publication_year = record.get("publication_year", record.get("year"))
+    try:
+        publication_year = int(publication_year) if publication_year not in (None, "") else 0
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid publication year: {publication_year}")
+    rating = record.get("rating")
+    try:
+        rating = float(rating) if rating not in (None, "", "N/A") else None
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid rating: {rating}")
+    poster_url = str(record.get("poster_url") or "N/A").strip()
+    # The server downloads posters, so an imported list may only link them from the poster hosts
+    if not is_poster_url(poster_url):
+        poster_url = "N/A"
+    return title, director, publication_year, rating, poster_url
@@ -0,0 +1,250 @@
+import threading
+import time
+from collections import deque
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.exc import SQLAlchemyError
+from datamanager.data_models import MovieLookupJob
+from omdbapi.API_Movies import api_request_data
+
+
+class MovieLookupQueue:
+    """
+    SQLite-backed job queue with an in-process worker pool for OMDb lookups.
+
+    add_movie_to_user records a pending placeholder movie and a job in the same transaction
+    and returns immediately. Worker threads claim the jobs, call OMDb and hand the result to
+    a handler that fills in the placeholder. Jobs survive restarts because they live in the
+    movie_lookup_jobs table; jobs left "running" by a crashed process are re-queued on start.
+    """
+
+    def __init__(self, app, db, worker_count=2, poll_interval=0.5, max_attempts=3, retry_delay=30.0):
+        """
+        Initializes the queue without starting the workers.
+
+        Args:
+            app: The Flask app, needed for an app context in the worker threads.
+            db: The SQLAlchemy database object.
+            worker_count (int): Number of worker threads.
+            poll_interval (float): Seconds an idle worker waits before polling again.
+            max_attempts (int): Attempts of a job before network errors mark it as failed.
+            retry_delay (float): Seconds before a job that hit a network error is retried.
+        """
+        self.app = app
+        self.db = db
+        self.worker_count = worker_count
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self._handler = None
+        self._threads = []
+        self._stop = threading.Event()
+        self._wake_up = threading.Event()
+        self._lock = threading.Lock()
+        self._recent_waits = deque(maxlen=100)
+        self._recent_runtimes = deque(maxlen=100)
+        self._counters = {"completed": 0, "failed": 0, "retried": 0}
+
+
+    def enqueue(self, session, movie_id, query):
+        """
+        Adds a lookup job for a placeholder movie to the session's transaction, without committing.
+
+        Args:
+            session: The SQLAlchemy session of the caller.
+            movie_id (int): The ID of the pending placeholder movie.
+            query (str): The title to look up.
+        """
+        now = time.time()
+        session.execute(insert(MovieLookupJob).values(
+            movie_id=movie_id, query=query, status="queued", attempts=0, created_at=now, available_at=now
+        ))
+
+
+    def notify(self):
+        """Wakes up an idle worker after a new job was committed."""
+        self._wake_up.set()
+
+
+    def start(self, handler):
+        """
+        Re-queues jobs of a crashed process and starts the worker threads.
+
+        Args:
+            handler (callable): Called as handler(movie_id, api_data) inside an app context
+                                with the result of api_request_data for the job.
+        """
+        self._handler = handler
+        with self.app.app_context():
+            self.db.session.execute(
+                update(MovieLookupJob).where(MovieLookupJob.status == "running").values(status="queued")
+            )
+            self.db.session.commit()
+        self._stop.clear()
+        for number in range(self.worker_count):
+            thread = threading.Thread(target=self._work, name=f"movie-lookup-{number}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+
+    def stop(self, timeout=5.0):
+        """Stops the worker threads after their current job."""
+        self._stop.set()
+        self._wake_up.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+
+    def get_metrics(self):
+        """
+        Returns queue depth and latency metrics.
+
+        Returns:
+            dict: Number of queued, running and failed jobs, the age of the oldest queued job,
+                  average wait and run time of the last 100 jobs in seconds and job counters.
+        """
+        with self.app.app_context():
+            counts = dict(self.db.session.execute(
+                select(MovieLookupJob.status, func.count()).group_by(MovieLookupJob.status)
+            ).all())
+            oldest = self.db.session.scalar(
+                select(func.min(MovieLookupJob.created_at)).where(MovieLookupJob.status == "queued")
+            )
+        with self._lock:
+            waits, runtimes = list(self._recent_waits), list(self._recent_runtimes)
+            counters = dict(self._counters)
+        return {
+            "depth": counts.get("queued", 0),
+            "running": counts.get("running", 0),
+            "failed_jobs": counts.get("failed", 0),
+            "oldest_queued_age_seconds": time.time() - oldest if oldest else 0.0,
+            "average_wait_seconds": sum(waits) / len(waits) if waits else 0.0,
+            "average_runtime_seconds": sum(runtimes) / len(runtimes) if runtimes else 0.0,
+            "workers": len(self._threads),
+            **counters,
+        }
+
+
+    def _work(self):
+        """Worker loop: claims and runs jobs until the queue is stopped."""
+        with self.app.app_context():
+            while not self._stop.is_set():
+                try:
+                    job = self._claim_job()
+                except SQLAlchemyError as e:
+                    self.db.session.rollback()
+                    print(f"A database error occurred while claiming a lookup job: {e}")
+                    job = None
+                if job is None:
+                    self._wake_up.wait(self.poll_interval)
+                    self._wake_up.clear()
+                    continue
+                self._run_job(*job)
+                self.db.session.remove()
+
+
+    def _claim_job(self):
+        """
+        Marks the oldest available job as running.
+
+        Returns:
+            tuple: (job_id, movie_id, query, attempts, created_at), or None if no job is available.
+        """
+        now = time.time()
+        job = self.db.session.execute(
+            select(MovieLookupJob.id, MovieLookupJob.movie_id, MovieLookupJob.query,
+                   MovieLookupJob.attempts, MovieLookupJob.created_at)
+            .where(MovieLookupJob.status == "queued")
+            .where(MovieLookupJob.available_at <= now)
+            .order_by(MovieLookupJob.id)
+            .limit(1)
+        ).first()
+        if job is None:
+            self.db.session.rollback()
+            return None
+        claimed = self.db.session.execute(
+            update(MovieLookupJob)
+            .where(MovieLookupJob.id == job.id)
+            .where(MovieLookupJob.status == "queued")
+            .values(status="running", started_at=now, attempts=MovieLookupJob.attempts + 1)
+        )
+        self.db.session.commit()
+        if claimed.rowcount != 1:
+            return None
+        return job.id, job.movie_id, job.query, job.attempts + 1, job.created_at
+
+
+    def _run_job(self, job_id, movie_id, query, attempts, created_at):
+        """
+        Looks up the title, hands the result to the handler and records the outcome.
+
+        Any error of the lookup or the handler re-queues the job with backoff, or marks it as failed after
+        max_attempts, so the job never stays "running" and the worker thread keeps going.
+        """
+        started_at = time.time()
+        try:
+            api_data = api_request_data(query)
+            network_error = isinstance(api_data, str)
+            if network_error and attempts < self.max_attempts:
+                self.db.session.execute(
+                    update(MovieLookupJob).where(MovieLookupJob.id == job_id)
+                    .values(status="queued", available_at=time.time() + self.retry_delay * attempts, error=api_data)
+                )
+                self.db.session.commit()
+                counter = "retried"
+            else:
+                self._handler(movie_id, api_data)
+                status = "done" if isinstance(api_data, tuple) else "failed"
+                self.db.session.execute(
+                    update(MovieLookupJob).where(MovieLookupJob.id == job_id)
+                    .values(status=status, finished_at=time.time(), error=api_data if network_error else None)
+                )
+                self.db.session.commit()
+                counter = "completed" if status == "done" else "failed"
+        except Exception as e:
+            self.db.session.rollback()
+            print(f"An error occurred while running lookup job {job_id}: {e!r}")
+            counter = self._retry_or_fail(job_id, movie_id, attempts, repr(e))
+            if counter is None:
+                return
+        with self._lock:
+            self._counters[counter] += 1
+            self._recent_waits.append(started_at - created_at)
+            self._recent_runtimes.append(time.time() - started_at)
+
+
+    def _retry_or_fail(self, job_id, movie_id, attempts, error):
+        """
+        Re-queues a job whose run raised, with backoff, or marks it as failed after max_attempts.
+
+        A failed job hands its error to the handler in the same transaction, so the placeholder movie is
+        marked as failed like after a failed lookup instead of staying pending.
+
+        Returns:
+            str: The counter to increment, "retried" or "failed", or None if the job could not be updated.
+        """
+        if attempts < self.max_attempts:
+            values = {"status": "queued", "available_at": time.time() + self.retry_delay * attempts, "error": error}
+            return "retried" if self._update_job(job_id, values) else None
+        values = {"status": "failed", "finished_at": time.time(), "error": error}
+        try:
+            self._handler(movie_id, error)
+            self.db.session.execute(update(MovieLookupJob).where(MovieLookupJob.id == job_id).values(**values))
+            self.db.session.commit()
+            return "failed"
+        except Exception as e:
+            self.db.session.rollback()
+            print(f"An error occurred while failing the placeholder movie of lookup job {job_id}: {e!r}")
+        return "failed" if self._update_job(job_id, values) else None
+
+
+    def _update_job(self, job_id, values):
+        """Sets columns of a job and commits, returns False after a database error."""
+        try:
+            self.db.session.execute(update(MovieLookupJob).where(MovieLookupJob.id == job_id).values(**values))
+            self.db.session.commit()
+        except SQLAlchemyError as e:
+            self.db.session.rollback()
+            print(f"A database error occurred while finishing lookup job {job_id}: {e}")
+            return False
+        return True
@@ -0,0 +1,509 @@
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+from datamanager.stats import rebuild_stats
+from omdbapi.response_cache import normalize_title
+
+
+def _initial_schema(connection):
+    """Creates the original users, movies and user_movie tables."""
+    connection.execute(text(
+        "CREATE TABLE IF NOT EXISTS users ("
+        "id INTEGER NOT NULL, "
+        "name VARCHAR NOT NULL, "
+        "PRIMARY KEY (id))"
+    ))
+    connection.execute(text(
+        "CREATE TABLE IF NOT EXISTS movies ("
+        "id INTEGER NOT NULL, "
+        "title VARCHAR NOT NULL, "
+        "director VARCHAR NOT NULL, "
+        "publication_year INTEGER NOT NULL, "
+        "rating FLOAT, "
+        "poster_url VARCHAR, "
+        "PRIMARY KEY (id))"
+    ))
+    connection.execute(text(
+        "CREATE TABLE IF NOT EXISTS user_movie ("
+        "user_id INTEGER NOT NULL, "
+        "movie_id INTEGER NOT NULL, "
+        "PRIMARY KEY (user_id, movie_id), "
+        "FOREIGN KEY(user_id) REFERENCES users (id), "
+        "FOREIGN KEY(movie_id) REFERENCES movies (id))"
+    ))
+
+
+def _add_indexes_and_normalized_titles(connection):
+    """
+    Adds the lookup and pagination indexes, a unique user name and the normalized title column.
+
+    Duplicate user names from before the constraint existed are renamed to "name (id)".
+    """
+    duplicates = connection.execute(text(
+        "SELECT id, name FROM users WHERE id NOT IN (SELECT MIN(id) FROM users GROUP BY name)"
+    )).fetchall()
+    for user_id, name in duplicates:
+        print(f"Renaming duplicate user '{name}' (ID {user_id}) to keep user names unique.")
+        connection.execute(text("UPDATE users SET name = :name WHERE id = :id"),
+                           {"name": f"{name} ({user_id})", "id": user_id})
+    connection.execute(text("CREATE UNIQUE INDEX IF NOT EXISTS ux_users_name ON users (name)"))
+
+    connection.execute(text("ALTER TABLE movies ADD COLUMN title_normalized VARCHAR"))
+    movies = connection.execute(text("SELECT id, title FROM movies")).fetchall()
+    if movies:
+        connection.execute(text("UPDATE movies SET title_normalized = :title_normalized WHERE id = :id"),
+                           [{"title_normalized": normalize_title(title), "id": movie_id} for movie_id, title in movies])
+    connection.execute(text("CREATE INDEX IF NOT EXISTS ix_movies_title_normalized ON movies (title_normalized)"))
+    connection.execute(text("CREATE INDEX IF NOT EXISTS ix_movies_title_id ON movies (title, id)"))
+    connection.execute(text("CREATE INDEX IF NOT EXISTS ix_movies_year_id ON movies (publication_year, id)"))
+    connection.execute(text("CREATE INDEX IF NOT EXISTS ix_movies_rating_id ON movies (coalesce(rating, -1.0), id)"))
+
+    connection.execute(text("CREATE INDEX IF NOT EXISTS ix_user_movie_movie_id ON user_movie (movie_id, user_id)"))
+
+
+def _add_lookup_queue(connection):
+    """Adds the lookup status of movies and the table of the background OMDb lookup queue."""
+    connection.execute(text("ALTER TABLE movies ADD COLUMN lookup_status VARCHAR NOT NULL DEFAULT 'ready'"))
+    connection.execute(text(
+        "CREATE TABLE IF NOT EXISTS movie_lookup_jobs ("
+        "id INTEGER NOT NULL, "
+        "movie_id INTEGER NOT NULL, "
+        "query VARCHAR NOT NULL, "
+        "status VARCHAR NOT NULL, "
+        "attempts INTEGER NOT NULL, "
+        "created_at FLOAT NOT NULL, "
+        "available_at FLOAT NOT NULL, "
+        "started_at FLOAT, "
+        "finished_at FLOAT, "
+        "error VARCHAR, "
+        "PRIMARY KEY (id), "
+        "FOREIGN KEY(movie_id) REFERENCES movies (id))"
+    ))
+    connection.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_movie_lookup_jobs_status ON movie_lookup_jobs (status, available_at)"
+    ))
+
+
+def _add_movie_search(connection):
+    """
+    Adds the FTS5 full-text index over movie titles and directors.
+
+    movies_fts is an external content table: it only stores the index, the triggers keep it in
+    sync with every insert, update and delete on movies. movies_fts_vocab lists the indexed terms
+    for the typo-tolerant search.
+    """
+    connection.execute(text(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS movies_fts USING fts5("
+        "title, director, content='movies', content_rowid='id', tokenize='unicode61 remove_diacritics 2')"
+    ))
+    connection.execute(text("CREATE VIRTUAL TABLE IF NOT EXISTS movies_fts_vocab USING fts5vocab(movies_fts, 'row')"))
+    connection.execute(text(
+        "CREATE TRIGGER IF NOT EXISTS movies_fts_insert AFTER INSERT ON movies BEGIN "
+        "INSERT INTO movies_fts (rowid, title, director) VALUES (new.id, new.title, new.director); "
+        "END"
+    ))
+    connection.execute(text(
+        "CREATE TRIGGER IF NOT EXISTS movies_fts_delete AFTER DELETE ON movies BEGIN "
+        "INSERT INTO movies_fts (movies_fts, rowid, title, director) VALUES ('delete', old.id, old.title, old.director); "
+        "END"
+    ))
+    connection.execute(text(
+        "CREATE TRIGGER IF NOT EXISTS movies_fts_update AFTER UPDATE OF title, director ON movies BEGIN "
+        "INSERT INTO movies_fts (movies_fts, rowid, title, director) VALUES ('delete', old.id, old.title, old.director); "
+        "INSERT INTO movies_fts (rowid, title, director) VALUES (new.id, new.title, new.director); "
+        "END"
+    ))
+    connection.execute(text("INSERT INTO movies_fts (movies_fts) VALUES ('rebuild')"))
+
+
+def _add_movie_overrides(connection):
+    """
+    Adds the per-user movie overrides.
+
+    An override only holds the fields a user changed, the trigger removes it together with
+    the user_movie row it belongs to.
+    """
+    connection.execute(text(
+        "CREATE TABLE IF NOT EXISTS movie_overrides ("
+        "user_id INTEGER NOT NULL, "
+        "movie_id INTEGER NOT NULL, "
+        "title VARCHAR, "
+        "director VARCHAR, "
+        "publication_year INTEGER, "
+        "rating FLOAT, "
+        "PRIMARY KEY (user_id, movie_id), "
+        "FOREIGN KEY(user_id) REFERENCES users (id), "
+        "FOREIGN KEY(movie_id) REFERENCES movies (id))"
+    ))
+    connection.execute(text(
+        "CREATE TRIGGER IF NOT EXISTS user_movie_delete_override AFTER DELETE ON user_movie BEGIN "
+        "DELETE FROM movie_overrides WHERE user_id = old.user_id AND movie_id = old.movie_id; "
+        "END"
+    ))
+
+
+def _add_stats(connection):
+    """
+    Adds the summary tables of the statistics pages and fills them from the current lists.
+
+    The data manager keeps them up to date with every change of a list, rebuild_stats recomputes them.
+    """
+    connection.execute(text(
+        "CREATE TABLE IF NOT EXISTS user_stats ("
+        "user_id INTEGER NOT NULL, "
+        "movie_count INTEGER NOT NULL, "
+        "rated_count INTEGER NOT NULL, "
+        "rating_sum FLOAT NOT NULL, "
+        "PRIMARY KEY (user_id), "
+        "FOREIGN KEY(user_id) REFERENCES users (id))"
+    ))
+    connection.execute(text(
+        "CREATE TABLE IF NOT EXISTS user_director_stats ("
+        "user_id INTEGER NOT NULL, "
+        "director VARCHAR NOT NULL, "
+        "movie_count INTEGER NOT NULL, "
+        "PRIMARY KEY (user_id, director), "
+        "FOREIGN KEY(user_id) REFERENCES users (id))"
+    ))
+    connection.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_user_director_stats_count "
+        "ON user_director_stats (user_id, movie_count DESC, director)"
+    ))
+    connection.execute(text(
+        "CREATE TABLE IF NOT EXISTS user_decade_stats ("
+        "user_id INTEGER NOT NULL, "
+        "decade INTEGER NOT NULL, "
+        "movie_count INTEGER NOT NULL, "
+        "PRIMARY KEY (user_id, decade), "
+        "FOREIGN KEY(user_id) REFERENCES users (id))"
+    ))
+    connection.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_user_decade_stats_count ON user_decade_stats (user_id, movie_count DESC, decade)"
+    ))
+    connection.execute(text(
+        "CREATE TABLE IF NOT EXISTS movie_favourite_counts ("
+        "movie_id INTEGER NOT NULL, "
+        "user_count INTEGER NOT NULL, "
+        "PRIMARY KEY (movie_id), "
+        "FOREIGN KEY(movie_id) REFERENCES movies (id))"
+    ))
+    connection.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_movie_favourite_counts_count ON movie_favourite_counts (user_count DESC, movie_id)"
+    ))
+    rebuild_stats(connection)
+
+
+def _add_catalog_changes(connection):
+    """
+    Adds the change log of the in-memory read model: triggers record the user or movie of every written row,
+    so each process can refresh exactly those from the database.
+    """
+    connection.execute(text(
+        "CREATE TABLE IF NOT EXISTS catalog_changes ("
+        "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+        "user_id INTEGER, "
+        "movie_id INTEGER)"
+    ))
+    # Table: the logged (user_id, movie_id) of a row, a list or override change refreshes the whole user
+    logged_columns = {
+        "users": ("{row}.id", "NULL"),
+        "movies": ("NULL", "{row}.id"),
+        "user_movie": ("{row}.user_id", "NULL"),
+        "movie_overrides": ("{row}.user_id", "NULL"),
+    }
+    for table, (user_id, movie_id) in logged_columns.items():
+        for operation, row in (("insert", "new"), ("update", "new"), ("delete", "old")):
+            connection.execute(text(
+                f"CREATE TRIGGER IF NOT EXISTS {table}_catalog_{operation} AFTER {operation.upper()} ON {table} BEGIN "
+                f"INSERT INTO catalog_changes (user_id, movie_id) "
+                f"VALUES ({user_id.format(row=row)}, {movie_id.format(row=row)}); "
+                "END"
+            ))
+
+
+def _add_recommendations(connection):
+    """
+    Adds the top neighbours per movie of the recommendations and a log of the list changes since they were computed.
+
+    Triggers log every added or removed favourite and every movie whose lookup status changes,
+    so a refresh only recomputes the movies that share users with a change.
+    """
+    connection.execute(text(
+        "CREATE TABLE IF NOT EXISTS movie_neighbours ("
+        "movie_id INTEGER NOT NULL, "
+        "neighbour_id INTEGER NOT NULL, "
+        "score FLOAT NOT NULL, "
+        "PRIMARY KEY (movie_id, neighbour_id), "
+        "FOREIGN KEY(movie_id) REFERENCES movies (id) ON DELETE CASCADE, "
+        "FOREIGN KEY(neighbour_id) REFERENCES movies (id) ON DELETE CASCADE) "
+        # The neighbours of a movie are stored together in the primary key's B-tree
+        "WITHOUT ROWID"
+    ))
+    connection.execute(text(
+        "CREATE TABLE IF NOT EXISTS recommendation_changes ("
+        "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+        "user_id INTEGER, "
+        "movie_id INTEGER)"
+    ))
+    for operation, row in (("insert", "new"), ("delete", "old")):
+        connection.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS user_movie_recommendation_{operation} AFTER {operation.upper()} ON user_movie "
+            f"BEGIN INSERT INTO recommendation_changes (user_id, movie_id) VALUES ({row}.user_id, {row}.movie_id); END"
+        ))
+    connection.execute(text(
+        "CREATE TRIGGER IF NOT EXISTS movies_recommendation_update AFTER UPDATE OF lookup_status ON movies "
+        "WHEN old.lookup_status IS NOT new.lookup_status "
+        "BEGIN INSERT INTO recommendation_changes (movie_id) VALUES (new.id); END"
+    ))
+
+
+def _postgresql_schema(connection):
+    """
+    Creates the schema of version 7 on an empty PostgreSQL database.
+
+    The tables are those of migrations 1 to 6 as they stood at version 7, written out so later
+    model changes need a migration of their own. What SQLite does with FTS5 and triggers is built
+    in here: a generated tsvector column with a GIN index for the search, title words weighted higher,
+    and a foreign key that deletes an override together with its user_movie row. PostgreSQL
+    enforces foreign keys, so the counts and lookup jobs of a movie are deleted with it.
+    The read model's change log is not created, the read model only runs on SQLite.
+    """
+    connection.execute(text(
+        "CREATE TABLE IF NOT EXISTS users ("
+        "id SERIAL NOT NULL, "
+        "name VARCHAR NOT NULL, "
+        "PRIMARY KEY (id))"
+    ))
+    connection.execute(text("CREATE UNIQUE INDEX IF NOT EXISTS ux_users_name ON users (name)"))
+    connection.execute(text(
+        "CREATE TABLE IF NOT EXISTS movies ("
+        "id SERIAL NOT NULL, "
+        "title VARCHAR NOT NULL, "
+        "director VARCHAR NOT NULL, "
+        "publication_year INTEGER NOT NULL, "
+        "rating FLOAT, "
+        "poster_url VARCHAR, "
+        "title_normalized VARCHAR, "
+        "lookup_status VARCHAR NOT NULL DEFAULT 'ready', "
+        "search_vector tsvector GENERATED ALWAYS AS ("
+        "setweight(to_tsvector('simple', title), 'A') || setweight(to_tsvector('simple', director), 'B')) STORED, "
+        "PRIMARY KEY (id))"
+    ))
+    connection.execute(text("CREATE INDEX IF NOT EXISTS ix_movies_title_normalized ON movies (title_normalized)"))
+    connection.execute(text("CREATE INDEX IF NOT EXISTS ix_movies_title_id ON movies (title, id)"))
+    connection.execute(text("CREATE INDEX IF NOT EXISTS ix_movies_year_id ON movies (publication_year, id)"))
+    connection.execute(text("CREATE INDEX IF NOT EXISTS ix_movies_rating_id ON movies (coalesce(rating, -1.0), id)"))
+    connection.execute(text("CREATE INDEX IF NOT EXISTS ix_movies_search ON movies USING gin (search_vector)"))
+    connection.execute(text(
+        "CREATE TABLE IF NOT EXISTS user_movie ("
+        "user_id INTEGER NOT NULL, "
+        "movie_id INTEGER NOT NULL, "
+        "PRIMARY KEY (user_id, movie_id), "
+        "FOREIGN KEY(user_id) REFERENCES users (id), "
+        "FOREIGN KEY(movie_id) REFERENCES movies (id))"
+    ))
+    connection.execute(text("CREATE INDEX IF NOT EXISTS ix_user_movie_movie_id ON user_movie (movie_id, user_id)"))
+    connection.execute(text(
+        "CREATE TABLE IF NOT EXISTS movie_lookup_jobs ("
+        "id SERIAL NOT NULL, "
+        "movie_id INTEGER NOT NULL, "
+        "query VARCHAR NOT NULL, "
+        "status VARCHAR NOT NULL, "
+        "attempts INTEGER NOT NULL, "
+        "created_at FLOAT NOT NULL, "
+        "available_at FLOAT NOT NULL, "
+        "started_at FLOAT, "
+        "finished_at FLOAT, "
+        "error VARCHAR, "
+        "PRIMARY KEY (id), "
+        "FOREIGN KEY(movie_id) REFERENCES movies (id) ON DELETE CASCADE)"
+    ))
+    connection.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_movie_lookup_jobs_status ON movie_lookup_jobs (status, available_at)"
+    ))
+    connection.execute(text(
+        "CREATE TABLE IF NOT EXISTS movie_overrides ("
+        "user_id INTEGER NOT NULL, "
+        "movie_id INTEGER NOT NULL, "
+        "title VARCHAR, "
+        "director VARCHAR, "
+        "publication_year INTEGER, "
+        "rating FLOAT, "
+        "PRIMARY KEY (user_id, movie_id), "
+        "FOREIGN KEY(user_id) REFERENCES users (id), "
+        "FOREIGN KEY(movie_id) REFERENCES movies (id), "
+        "CONSTRAINT fk_movie_overrides_user_movie FOREIGN KEY(user_id, movie_id) "
+        "REFERENCES user_movie (user_id, movie_id) ON DELETE CASCADE)"
+    ))
+    connection.execute(text(
+        "CREATE TABLE IF NOT EXISTS user_stats ("
+        "user_id INTEGER NOT NULL, "
+        "movie_count INTEGER NOT NULL, "
+        "rated_count INTEGER NOT NULL, "
+        "rating_sum FLOAT NOT NULL, "
+        "PRIMARY KEY (user_id), "
+        "FOREIGN KEY(user_id) REFERENCES users (id))"
+    ))
+    connection.execute(text(
+        "CREATE TABLE IF NOT EXISTS user_director_stats ("
+        "user_id INTEGER NOT NULL, "
+        "director VARCHAR NOT NULL, "
+        "movie_count INTEGER NOT NULL, "
+        "PRIMARY KEY (user_id, director), "
+        "FOREIGN KEY(user_id) REFERENCES users (id))"
+    ))
+    connection.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_user_director_stats_count "
+        "ON user_director_stats (user_id, movie_count DESC, director)"
+    ))
+    connection.execute(text(
+        "CREATE TABLE IF NOT EXISTS user_decade_stats ("
+        "user_id INTEGER NOT NULL, "
+        "decade INTEGER NOT NULL, "
+        "movie_count INTEGER NOT NULL, "
+        "PRIMARY KEY (user_id, decade), "
+        "FOREIGN KEY(user_id) REFERENCES users (id))"
+    ))
+    connection.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_user_decade_stats_count ON user_decade_stats (user_id, movie_count DESC, decade)"
+    ))
+    connection.execute(text(
+        "CREATE TABLE IF NOT EXISTS movie_favourite_counts ("
+        "movie_id INTEGER NOT NULL, "
+        "user_count INTEGER NOT NULL, "
+        "PRIMARY KEY (movie_id), "
+        "FOREIGN KEY(movie_id) REFERENCES movies (id) ON DELETE CASCADE)"
+    ))
+    connection.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_movie_favourite_counts_count ON movie_favourite_counts (user_count DESC, movie_id)"
+    ))
+
+
+def _add_postgresql_recommendations(connection):
+    """Adds the recommendation tables of version 8 and the triggers logging the list changes, see _add_recommendations."""
+    connection.execute(text(
+        "CREATE TABLE IF NOT EXISTS movie_neighbours ("
+        "movie_id INTEGER NOT NULL, "
+        "neighbour_id INTEGER NOT NULL, "
+        "score FLOAT NOT NULL, "
+        "PRIMARY KEY (movie_id, neighbour_id), "
+        "FOREIGN KEY(movie_id) REFERENCES movies (id) ON DELETE CASCADE, "
+        "FOREIGN KEY(neighbour_id) REFERENCES movies (id) ON DELETE CASCADE)"
+    ))
+    connection.execute(text(
+        "CREATE TABLE IF NOT EXISTS recommendation_changes ("
+        "id SERIAL NOT NULL, "
+        "user_id INTEGER, "
+        "movie_id INTEGER, "
+        "PRIMARY KEY (id))"
+    ))
+    connection.execute(text(
+        "CREATE OR REPLACE FUNCTION log_recommendation_change() RETURNS trigger AS $$ BEGIN "
+        "IF TG_TABLE_NAME = 'movies' THEN "
+        "INSERT INTO recommendation_changes (movie_id) VALUES (NEW.id); "
+        "ELSIF TG_OP = 'DELETE' THEN "
+        "INSERT INTO recommendation_changes (user_id, movie_id) VALUES (OLD.user_id, OLD.movie_id); "
+        "ELSE "
+        "INSERT INTO recommendation_changes (user_id, movie_id) VALUES (NEW.user_id, NEW.movie_id); "
+        "END IF; "
+        "RETURN NULL; "
+        "END $$ LANGUAGE plpgsql"
+    ))
+    connection.execute(text(
+        "CREATE TRIGGER user_movie_recommendation_change AFTER INSERT OR DELETE ON user_movie "
+        "FOR EACH ROW EXECUTE FUNCTION log_recommendation_change()"
+    ))
+    connection.execute(text(
+        "CREATE TRIGGER movies_recommendation_change AFTER UPDATE OF lookup_status ON movies "
+        "FOR EACH ROW WHEN (OLD.lookup_status IS DISTINCT FROM NEW.lookup_status) "
+        "EXECUTE FUNCTION log_recommendation_change()"
+    ))
+
+
+def _add_neighbour_index(connection):
+    """
+    Indexes the movie neighbours by neighbour, so a deleted movie's rows are found without a scan, and deletes
+    the neighbours and favourite counts of movies deleted before the data manager removed them as well.
+    SQLite does not enforce the foreign keys, and a reused movie ID would otherwise inherit them.
+    """
+    connection.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_movie_neighbours_neighbour_id ON movie_neighbours (neighbour_id)"
+    ))
+    connection.execute(text(
+        "DELETE FROM movie_neighbours WHERE movie_id NOT IN (SELECT id FROM movies) "
+        "OR neighbour_id NOT IN (SELECT id FROM movies)"
+    ))
+    connection.execute(text("DELETE FROM movie_favourite_counts WHERE movie_id NOT IN (SELECT id FROM movies)"))
+
+
+# Ordered list of (version, description, function), only ever append new migrations
+MIGRATIONS = [
+    (1, "initial schema", _initial_schema),
+    (2, "indexes, unique user names and normalized movie titles", _add_indexes_and_normalized_titles),
+    (3, "background lookup queue", _add_lookup_queue),
+    (4, "full-text movie search", _add_movie_search),
+    (5, "per-user movie overrides", _add_movie_overrides),
+    (6, "statistics summary tables", _add_stats),
+    (7, "change log of the read model", _add_catalog_changes),
+    (8, "movie neighbours of the recommendations", _add_recommendations),
+    (9, "index of the movie neighbours by neighbour", _add_neighbour_index),
+]
+
+# A PostgreSQL database starts at the schema of version 7, later migrations are appended to both lists
+POSTGRESQL_MIGRATIONS = [
+    (7, "schema of version 7 for PostgreSQL", _postgresql_schema),
+    (8, "movie neighbours of the recommendations", _add_postgresql_recommendations),
+    (9, "index of the movie neighbours by neighbour", _add_neighbour_index),
+]
+
+
+def get_schema_version(connection):
+    """
+    Returns the highest applied migration version.
+
+    Args:
+        connection: An open SQLAlchemy connection.
+
+    Returns:
+        int: The version, 0 for an empty database.
+    """
+    connection.execute(text(
+        "CREATE TABLE IF NOT EXISTS schema_migrations ("
+        "version INTEGER PRIMARY KEY, "
+        "description VARCHAR NOT NULL, "
+        "applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)"
+    ))
+    return connection.execute(text("SELECT COALESCE(MAX(version), 0) FROM schema_migrations")).scalar()
+
+
+def apply_migrations(engine):
+    """
+    Brings the database schema up to the latest version.
+
+    Every migration runs in its own transaction together with its row in schema_migrations.
+    The row is inserted first, so a second process migrating at the same time waits for the
+    write lock and then skips the migration. PostgreSQL databases use POSTGRESQL_MIGRATIONS.
+
+    Args:
+        engine: The SQLAlchemy engine of the database.
+
+    Returns:
+        list: The versions that were applied.
+    """
+    with engine.begin() as connection:
+        current_version = get_schema_version(connection)
+
+    applied = []
+    migrations = POSTGRESQL_MIGRATIONS if engine.dialect.name == "postgresql" else MIGRATIONS
+    for version, description, migrate in migrations:
+        if version <= current_version:
+            continue
+        try:
+            with engine.begin() as connection:
+                connection.execute(text("INSERT INTO schema_migrations (version, description) VALUES (:v, :d)"),
+                                   {"v": version, "d": description})
+                migrate(connection)
+        except IntegrityError:
+            continue
+        print(f"Applied database migration {version}: {description}")
+        applied.append(version)
+    return applied
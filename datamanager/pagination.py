@@ -0,0 +1,144 @@
+import base64
+import binascii
+import json
+from bisect import bisect_left, bisect_right
+from sqlalchemy import tuple_
+
+
+def encode_cursor(sort, key_values, direction):
+    """
+    Encodes the sort key of a boundary row into an opaque, URL-safe cursor.
+
+    Args:
+        sort (str): Name of the sort order the cursor belongs to.
+        key_values (list): The sort key values of the boundary row, the row ID last.
+        direction (str): "next" for the page after the row, "prev" for the page before it.
+
+    Returns:
+        str: The cursor.
+    """
+    payload = json.dumps({"s": sort, "k": list(key_values), "d": direction}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor, sort, key_length=None):
+    """
+    Decodes a cursor created by encode_cursor.
+
+    Args:
+        cursor (str): The cursor, or None for the first page.
+        sort (str): The sort order the cursor has to belong to.
+        key_length (int): The number of key values the sort order has, not checked if None.
+
+    Returns:
+        tuple: The key values (None for the first page) and whether the page lies before them.
+
+    Raises:
+        ValueError: If the cursor is malformed, belongs to another sort order or its key values do not fit it.
+    """
+    if not cursor:
+        return None, False
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        key_values, direction = payload["k"], payload["d"]
+        if payload["s"] != sort or direction not in ("next", "prev") or not isinstance(key_values, list):
+            raise ValueError
+        if key_length is not None and len(key_values) != key_length:
+            raise ValueError
+        if not all(value is None or isinstance(value, (str, int, float)) for value in key_values):
+            raise ValueError
+    except (binascii.Error, UnicodeError, KeyError, TypeError, ValueError):
+        raise ValueError(f"Invalid page cursor: {cursor}")
+    return key_values, direction == "prev"
+
+
+def keyset_page(session, query, sort, key_columns, key_function, descending, cursor, page_size, as_rows=False):
+    """
+    Runs a keyset (seek) paginated query instead of using OFFSET.
+
+    Args:
+        session: The SQLAlchemy session.
+        query: A select() statement without ORDER BY or LIMIT.
+        sort (str): Name of the sort order, stored inside the cursors.
+        key_columns (list): Column expressions forming a unique sort key, the ID last.
+        key_function (callable): Returns the key values of a result row in the same order.
+        descending (bool): Whether the sort order is descending.
+        cursor (str): Cursor of the requested page, or None for the first page.
+        page_size (int): Maximum number of rows on the page.
+        as_rows (bool): Return the result rows of a query of several columns instead of ORM objects.
+
+    Returns:
+        dict: "items" (list), "next_cursor" and "prev_cursor" (str or None).
+
+    Raises:
+        ValueError: If the cursor is invalid.
+    """
+    key_values, backwards = decode_cursor(cursor, sort, len(key_columns))
+    seek_descending = descending != backwards
+    if key_values is not None:
+        if seek_descending:
+            query = query.where(tuple_(*key_columns) < tuple_(*key_values))
+        else:
+            query = query.where(tuple_(*key_columns) > tuple_(*key_values))
+    order = [column.desc() if seek_descending else column.asc() for column in key_columns]
+    result = session.execute(query.order_by(*order).limit(page_size + 1))
+    rows = result.all() if as_rows else list(result.scalars())
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    if backwards:
+        rows.reverse()
+    return _page_result(rows, [key_function(row) for row in rows[:1] + rows[-1:]], sort, key_values, backwards, has_more)
+
+
+def sorted_page(keys, items, sort, descending, cursor, page_size):
+    """
+    Keyset pagination over an in-memory list, with the same cursors as keyset_page.
+
+    Args:
+        keys (list): The unique sort key of every item (a list of values, the ID last), ascending.
+        items (list): The items in the order of keys.
+        sort (str): Name of the sort order, stored inside the cursors.
+        descending (bool): Whether the sort order is descending.
+        cursor (str): Cursor of the requested page, or None for the first page.
+        page_size (int): Maximum number of items on the page.
+
+    Returns:
+        dict: "items" (list), "next_cursor" and "prev_cursor" (str or None).
+
+    Raises:
+        ValueError: If the cursor is invalid.
+    """
+    key_values, backwards = decode_cursor(cursor, sort, len(keys[0]) if keys else None)
+    seek_descending = descending != backwards
+    start, stop = 0, len(keys)
+    try:
+        if key_values is not None and seek_descending:
+            stop = bisect_left(keys, key_values)
+        elif key_values is not None:
+            start = bisect_right(keys, key_values)
+    except TypeError:
+        raise ValueError(f"Invalid page cursor: {cursor}")
+    if seek_descending:
+        indexes = list(range(stop - 1, max(start, stop - page_size - 1) - 1, -1))
+    else:
+        indexes = list(range(start, min(stop, start + page_size + 1)))
+    has_more = len(indexes) > page_size
+    indexes = indexes[:page_size]
+    if backwards:
+        indexes.reverse()
+    return _page_result([items[index] for index in indexes], [keys[index] for index in indexes[:1] + indexes[-1:]],
+                        sort, key_values, backwards, has_more)
+
+
+def _page_result(rows, boundary_keys, sort, key_values, backwards, has_more):
+    """Builds the page dict with the cursors next to the first and last row, boundary_keys are their sort keys."""
+    # Coming from a cursor means there are rows on the other side of it
+    more_after = key_values is not None if backwards else has_more
+    more_before = has_more if backwards else key_values is not None
+    next_cursor = prev_cursor = None
+    if rows and more_after:
+        next_cursor = encode_cursor(sort, boundary_keys[-1], "next")
+    if rows and more_before:
+        prev_cursor = encode_cursor(sort, boundary_keys[0], "prev")
+    return {"items": rows, "next_cursor": next_cursor, "prev_cursor": prev_cursor}
@@ -0,0 +1,433 @@
+import os
+import pickle
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from collections import namedtuple
+from sqlalchemy import bindparam, text
+from sqlalchemy.exc import SQLAlchemyError
+from datamanager.data_models import OVERRIDE_FIELDS
+from datamanager.search import search_words
+
+
+# Bump when the layout of the snapshot file changes, older snapshots are then ignored
+SNAPSHOT_FORMAT = 1
+MOVIE_COLUMNS = ("id", "title", "director", "publication_year", "rating", "poster_url", "lookup_status")
+
+# The data of the read model. A sync builds a new Catalog and swaps it in with one assignment, so readers
+# take it once and never see dicts that change while they iterate them
+Catalog = namedtuple("Catalog", ["users", "movies", "user_movies", "overrides", "titles", "users_version"])
+
+
+class UserRecord:
+    """A user of the read model."""
+    __slots__ = ("id", "name")
+
+    def __init__(self, id, name):
+        self.id = id
+        self.name = name
+
+
+class MovieRecord:
+    """A movie of the read model, with the columns of Movie."""
+    __slots__ = MOVIE_COLUMNS
+
+    def __init__(self, id, title, director, publication_year, rating, poster_url, lookup_status):
+        self.id = id
+        self.title = title
+        self.director = director
+        self.publication_year = publication_year
+        self.rating = rating
+        self.poster_url = poster_url
+        self.lookup_status = lookup_status
+
+    def as_tuple(self):
+        """Returns the values in the order of MOVIE_COLUMNS."""
+        return tuple(getattr(self, column) for column in MOVIE_COLUMNS)
+
+    def merged(self, override):
+        """Returns the movie as a user sees it, override holds their values of OVERRIDE_FIELDS (None for unchanged)."""
+        values = dict(zip(MOVIE_COLUMNS, self.as_tuple()))
+        values.update((field, value) for field, value in zip(OVERRIDE_FIELDS, override) if value is not None)
+        return MovieRecord(**values)
+
+
+class CatalogReadModel:
+    """
+    In-process copy of the users, movies, lists and overrides that answers the hot reads without SQL or ORM objects.
+
+    Users and movies are slotted records, every list is a sorted array of movie IDs and a title index finds
+    movies by their words. The model follows the database through the catalog_changes log the triggers fill on
+    every write: the data manager syncs it after each commit, writes of other processes are picked up at most
+    check_interval seconds later. A snapshot file lets the next start skip reading all tables.
+    """
+
+    # A sync with more changes than this reloads all tables instead
+    MAX_INCREMENTAL_CHANGES = 50_000
+    # IDs per IN list of the refresh queries
+    CHUNK_SIZE = 400
+
+    def __init__(self, engine, snapshot_path=None, check_interval=1.0, keep_changes=100_000):
+        """
+        Initializes an empty model, call load() before serving reads.
+
+        Args:
+            engine: The SQLAlchemy engine of the database.
+            snapshot_path (str): File of the snapshot, None disables snapshots.
+            check_interval (float): Seconds between two checks for writes of other processes.
+            keep_changes (int): Number of change log rows kept for processes catching up.
+        """
+        self.engine = engine
+        self.snapshot_path = snapshot_path
+        self.check_interval = check_interval
+        self.keep_changes = keep_changes
+        self._catalog = Catalog({}, {}, {}, {}, {}, 0)
+        self._users_by_name = (None, [], [])
+        self._last_change_id = 0
+        self._pruned_at = 0
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+
+
+    def load(self):
+        """
+        Fills the model from the snapshot and the changes since, or from the tables without a usable snapshot.
+
+        Returns:
+            str: "snapshot" or "database", where the model was loaded from.
+        """
+        with self._lock:
+            loaded_from = "snapshot" if self._load_snapshot() else "database"
+            with self.engine.connect() as connection:
+                if loaded_from == "database":
+                    self._load_tables(connection)
+                else:
+                    self._apply_changes(connection)
+        if loaded_from == "database":
+            self.save_snapshot()
+        catalog = self._catalog
+        print(f"Loaded the read model from the {loaded_from}: {len(catalog.users)} users, {len(catalog.movies)} movies")
+        return loaded_from
+
+
+    def sync(self, force=False):
+        """
+        Applies the writes logged since the last sync.
+
+        Args:
+            force (bool): Wait for a running sync and check right away, instead of at most every check_interval.
+        """
+        if not force and time.monotonic() < self._next_check:
+            return
+        if not self._lock.acquire(blocking=force):
+            return
+        try:
+            self._next_check = time.monotonic() + self.check_interval
+            with self.engine.connect() as connection:
+                self._apply_changes(connection)
+                if self._last_change_id - self._pruned_at > 2 * self.keep_changes:
+                    self._prune_changes(connection)
+
+        except SQLAlchemyError as e:
+            self._next_check = 0.0
+            print(f"A database error occurred while syncing the read model: {e}")
+        finally:
+            self._lock.release()
+
+
+    def save_snapshot(self):
+        """
+        Writes the model to the snapshot file and prunes the change log.
+
+        Returns:
+            bool: True if a snapshot was written.
+        """
+        if not self.snapshot_path:
+            return False
+        with self._lock:
+            catalog = self._catalog
+            snapshot = {
+                "format": SNAPSHOT_FORMAT,
+                "database": str(self.engine.url),
+                "last_change_id": self._last_change_id,
+                "users": [(user.id, user.name) for user in catalog.users.values()],
+                "movies": [movie.as_tuple() for movie in catalog.movies.values()],
+                "user_movies": catalog.user_movies,
+                "overrides": catalog.overrides,
+            }
+            try:
+                temporary_path = self.snapshot_path + ".tmp"
+                with open(temporary_path, "wb") as snapshot_file:
+                    pickle.dump(snapshot, snapshot_file, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(temporary_path, self.snapshot_path)
+                with self.engine.connect() as connection:
+                    self._prune_changes(connection)
+                return True
+
+            except OSError as e:
+                print(f"The read model snapshot could not be written: {e}")
+            except SQLAlchemyError as e:
+                print(f"A database error occurred while pruning the change log: {e}")
+            return False
+
+
+    def get_user(self, user_id):
+        """Returns the UserRecord, or None if the user does not exist."""
+        self.sync()
+        return self._catalog.users.get(user_id)
+
+
+    def get_all_users(self):
+        """Returns all users as UserRecords."""
+        self.sync()
+        return list(self._catalog.users.values())
+
+
+    def get_users_by_name(self):
+        """
+        Returns the users sorted by name and ID.
+
+        Returns:
+            tuple: The sort keys ([name, id] lists) and the UserRecords in the same order.
+        """
+        self.sync()
+        catalog = self._catalog
+        # Tagged with the version of the users it was sorted from, a sync that changes users bumps the version
+        version, keys, users = self._users_by_name
+        if version != catalog.users_version:
+            version = catalog.users_version
+            users = sorted(catalog.users.values(), key=lambda user: (user.name, user.id))
+            keys = [[user.name, user.id] for user in users]
+            self._users_by_name = (version, keys, users)
+        return keys, users
+
+
+    def get_all_movies(self):
+        """Returns all movies as MovieRecords."""
+        self.sync()
+        return list(self._catalog.movies.values())
+
+
+    def get_movie(self, movie_id, user_id=None):
+        """
+        Returns a MovieRecord, or None if it does not exist.
+
+        Args:
+            movie_id (int): The ID of the movie.
+            user_id (int): If given, the movie as this user sees it, None if it is not in their list.
+        """
+        self.sync()
+        catalog = self._catalog
+        movie = catalog.movies.get(movie_id)
+        if movie is None or user_id is None:
+            return movie
+        movie_ids = catalog.user_movies.get(user_id, ())
+        index = bisect_left(movie_ids, movie_id)
+        if index == len(movie_ids) or movie_ids[index] != movie_id:
+            return None
+        return self._merge(movie, catalog.overrides.get(user_id, {}))
+
+
+    def get_user_movies(self, user_id):
+        """Returns the movies of a user as MovieRecords with their overrides merged in, or None for an unknown user."""
+        self.sync()
+        catalog = self._catalog
+        if user_id not in catalog.users:
+            return None
+        overrides = catalog.overrides.get(user_id, {})
+        movies = (catalog.movies.get(movie_id) for movie_id in catalog.user_movies.get(user_id, ()))
+        return [self._merge(movie, overrides) for movie in movies if movie is not None]
+
+
+    def find_local_movie(self, movie_name):
+        """
+        Finds a ready or pending movie whose title consists of the same words as movie_name with the title index.
+
+        Returns:
+            MovieRecord: The movie, ready ones first, or None.
+        """
+        self.sync()
+        catalog = self._catalog
+        words = " ".join(search_words(movie_name))
+        candidates = [catalog.movies.get(movie_id) for movie_id in catalog.titles.get(words, ())] if words else []
+        candidates = [movie for movie in candidates if movie is not None and movie.lookup_status != "failed"]
+        if not candidates:
+            return None
+        return min(candidates, key=lambda movie: (movie.lookup_status != "ready", movie.id))
+
+
+    def _merge(self, movie, overrides):
+        """Applies the user's override of the movie, if they have one."""
+        override = overrides.get(movie.id)
+        return movie.merged(override) if override is not None else movie
+
+    def _load_snapshot(self):
+        """Fills the model from the snapshot file, returns False if there is none or it does not fit the database."""
+        if not self.snapshot_path or not os.path.exists(self.snapshot_path):
+            return False
+        try:
+            with open(self.snapshot_path, "rb") as snapshot_file:
+                snapshot = pickle.load(snapshot_file)
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ValueError) as e:
+            print(f"The read model snapshot could not be read: {e}")
+            return False
+        if not isinstance(snapshot, dict) or snapshot.get("format") != SNAPSHOT_FORMAT \
+                or snapshot.get("database") != str(self.engine.url):
+            return False
+        last_change_id = snapshot["last_change_id"]
+        with self.engine.connect() as connection:
+            newest, oldest = connection.execute(text("SELECT max(id), min(id) FROM catalog_changes")).one()
+        # A replaced database or pruned changes the snapshot never saw
+        if (newest or 0) < last_change_id or (oldest is not None and oldest > last_change_id + 1):
+            return False
+        self._fill(snapshot["users"], snapshot["movies"], snapshot["user_movies"], snapshot["overrides"],
+                   last_change_id)
+        return True
+
+    def _load_tables(self, connection):
+        """Fills the model from the tables with one query per table."""
+        # Read first, changes committed while the tables are read are applied again by the next sync
+        last_change_id = connection.execute(text("SELECT coalesce(max(id), 0) FROM catalog_changes")).scalar()
+        users = connection.execute(text("SELECT id, name FROM users")).all()
+        movies = connection.execute(text(f"SELECT {', '.join(MOVIE_COLUMNS)} FROM movies")).all()
+        user_movies = self._group_lists(connection.execute(
+            text("SELECT user_id, movie_id FROM user_movie ORDER BY user_id, movie_id")
+        ))
+        overrides = self._group_overrides(connection.execute(
+            text(f"SELECT user_id, movie_id, {', '.join(OVERRIDE_FIELDS)} FROM movie_overrides")
+        ))
+        self._fill(users, movies, user_movies, overrides, last_change_id)
+
+    def _fill(self, users, movies, user_movies, overrides, last_change_id):
+        """Replaces the whole model."""
+        movie_records = {movie[0]: MovieRecord(*movie) for movie in movies}
+        titles = {}
+        for movie in movie_records.values():
+            titles.setdefault(self._title_key(movie), []).append(movie.id)
+        self._catalog = Catalog({user_id: UserRecord(user_id, name) for user_id, name in users}, movie_records,
+                                user_movies, overrides, {key: tuple(movie_ids) for key, movie_ids in titles.items()},
+                                self._catalog.users_version + 1)
+        self._last_change_id = last_change_id
+
+    def _apply_changes(self, connection):
+        """
+        Refreshes the users and movies of the logged changes since the last sync from the tables.
+
+        The refresh works on copies of the dicts it changes, the new Catalog replaces the old one at the end.
+        """
+        changes = connection.execute(
+            text("SELECT id, user_id, movie_id FROM catalog_changes WHERE id > :last_id ORDER BY id LIMIT :limit"),
+            {"last_id": self._last_change_id, "limit": self.MAX_INCREMENTAL_CHANGES + 1}
+        ).all()
+        if not changes:
+            return
+        # Log IDs have no gaps, unless the changes were pruned before this process saw them
+        if changes[0].id != self._last_change_id + 1 or len(changes) > self.MAX_INCREMENTAL_CHANGES:
+            self._load_tables(connection)
+            return
+        users, movies, user_movies, overrides, titles, users_version = self._catalog
+        movie_ids = sorted({change.movie_id for change in changes} - {None})
+        if movie_ids:
+            movies, titles = dict(movies), dict(titles)
+            self._refresh_movies(connection, movie_ids, movies, titles)
+        user_ids = sorted({change.user_id for change in changes} - {None})
+        if user_ids:
+            users, user_movies, overrides = dict(users), dict(user_movies), dict(overrides)
+            if self._refresh_users(connection, user_ids, users, user_movies, overrides):
+                users_version += 1
+        self._catalog = Catalog(users, movies, user_movies, overrides, titles, users_version)
+        self._last_change_id = changes[-1].id
+
+    def _refresh_movies(self, connection, movie_ids, movies, titles):
+        """Reloads movies and their title index entries into the given dicts, deleted ones are dropped."""
+        for chunk in self._chunks(movie_ids):
+            rows = {row.id: row for row in connection.execute(
+                text(f"SELECT {', '.join(MOVIE_COLUMNS)} FROM movies WHERE id IN :ids")
+                .bindparams(bindparam("ids", expanding=True)), {"ids": chunk}
+            )}
+            for movie_id in chunk:
+                old_movie = movies.get(movie_id)
+                if old_movie is not None:
+                    key = self._title_key(old_movie)
+                    remaining = tuple(other_id for other_id in titles.get(key, ()) if other_id != movie_id)
+                    if remaining:
+                        titles[key] = remaining
+                    else:
+                        titles.pop(key, None)
+                if movie_id not in rows:
+                    movies.pop(movie_id, None)
+                    continue
+                movie = MovieRecord(*rows[movie_id])
+                movies[movie_id] = movie
+                key = self._title_key(movie)
+                titles[key] = titles.get(key, ()) + (movie_id,)
+
+    def _refresh_users(self, connection, user_ids, users, user_movies, overrides):
+        """
+        Reloads users with their lists and overrides into the given dicts, deleted ones are dropped.
+
+        Returns:
+            bool: True if a user was added, renamed or deleted.
+        """
+        users_changed = False
+        for chunk in self._chunks(user_ids):
+            ids = {"ids": chunk}
+            names = dict(connection.execute(
+                text("SELECT id, name FROM users WHERE id IN :ids").bindparams(bindparam("ids", expanding=True)), ids
+            ).all())
+            lists = self._group_lists(connection.execute(
+                text("SELECT user_id, movie_id FROM user_movie WHERE user_id IN :ids ORDER BY user_id, movie_id")
+                .bindparams(bindparam("ids", expanding=True)), ids
+            ))
+            user_overrides = self._group_overrides(connection.execute(
+                text(f"SELECT user_id, movie_id, {', '.join(OVERRIDE_FIELDS)} FROM movie_overrides "
+                     "WHERE user_id IN :ids").bindparams(bindparam("ids", expanding=True)), ids
+            ))
+            for user_id in chunk:
+                old_user = users.get(user_id)
+                if user_id not in names:
+                    users.pop(user_id, None)
+                    user_movies.pop(user_id, None)
+                    overrides.pop(user_id, None)
+                    users_changed = True
+                    continue
+                if old_user is None or old_user.name != names[user_id]:
+                    users[user_id] = UserRecord(user_id, names[user_id])
+                    users_changed = True
+                user_movies[user_id] = lists.get(user_id, array("q"))
+                overrides[user_id] = user_overrides.get(user_id, {})
+        return users_changed
+
+    def _prune_changes(self, connection):
+        """Deletes all but the newest keep_changes rows of the change log."""
+        connection.execute(text("DELETE FROM catalog_changes WHERE id <= :last_id"),
+                           {"last_id": self._last_change_id - self.keep_changes})
+        connection.commit()
+        self._pruned_at = self._last_change_id
+
+    def _group_lists(self, rows):
+        """Groups (user_id, movie_id) rows sorted by user and movie into an array of movie IDs per user."""
+        user_movies = {}
+        for user_id, movie_id in rows:
+            movie_ids = user_movies.get(user_id)
+            if movie_ids is None:
+                movie_ids = user_movies[user_id] = array("q")
+            movie_ids.append(movie_id)
+        return user_movies
+
+    def _group_overrides(self, rows):
+        """Groups override rows into {user_id: {movie_id: values of OVERRIDE_FIELDS}}."""
+        overrides = {}
+        for user_id, movie_id, *values in rows:
+            overrides.setdefault(user_id, {})[movie_id] = tuple(values)
+        return overrides
+
+    def _title_key(self, movie):
+        """Returns the key of a movie in the title index, its title's words."""
+        return " ".join(search_words(movie.title or ""))
+
+    def _chunks(self, items):
+        """Splits a list into chunks of CHUNK_SIZE items."""
+        for start in range(0, len(items), self.CHUNK_SIZE):
+            yield items[start:start + self.CHUNK_SIZE]
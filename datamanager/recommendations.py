@@ -0,0 +1,105 @@
+from collections import namedtuple
+from itertools import chain
+import numpy as np
+from scipy import sparse
+from sqlalchemy import text
+
+
+# The favourites the recommendations learn from, only ready movies count
+FAVOURITE_PAIRS_QUERY = text(
+    "SELECT user_movie.user_id, user_movie.movie_id FROM user_movie "
+    "JOIN movies ON movies.id = user_movie.movie_id "
+    "WHERE movies.lookup_status = 'ready'"
+)
+
+# matrix: users x movies, 1.0 where a movie is in a user's list. user_ids and movie_ids: the sorted IDs of the
+# rows and columns.
+FavouritesMatrix = namedtuple("FavouritesMatrix", ("matrix", "user_ids", "movie_ids"))
+
+
+def load_favourites_matrix(connection, chunk_size=100_000):
+    """
+    Loads all favourites into a sparse users x movies matrix.
+
+    Args:
+        connection: An open SQLAlchemy connection or session.
+        chunk_size (int): Rows fetched and converted at a time.
+
+    Returns:
+        FavouritesMatrix: The matrix in CSC format and the user and movie IDs of its rows and columns.
+    """
+    # np.fromiter over the flat IDs, np.array converts result rows one by one and is slower by far
+    chunks = [np.fromiter(chain.from_iterable(rows), dtype=np.int64, count=2 * len(rows)).reshape(-1, 2)
+              for rows in connection.execute(FAVOURITE_PAIRS_QUERY).partitions(chunk_size)]
+    pairs = np.concatenate(chunks) if chunks else np.empty((0, 2), dtype=np.int64)
+    user_ids, rows = np.unique(pairs[:, 0], return_inverse=True)
+    movie_ids, columns = np.unique(pairs[:, 1], return_inverse=True)
+    matrix = sparse.csc_matrix((np.ones(len(pairs), dtype=np.float32), (rows, columns)),
+                               shape=(len(user_ids), len(movie_ids)))
+    return FavouritesMatrix(matrix, user_ids, movie_ids)
+
+
+def movies_of_users(favourites, user_ids):
+    """Returns the IDs of the movies in the lists of the given users, users not in the matrix are skipped."""
+    rows = _positions(favourites.user_ids, user_ids)
+    return favourites.movie_ids[np.unique(favourites.matrix.tocsr()[rows].indices)]
+
+
+def compute_neighbours(favourites, movie_ids=None, top_k=20, block_size=2000):
+    """
+    Computes the most similar movies of movies, block by block so memory stays bounded.
+
+    Two movies are similar when the same users have them, scored with the cosine similarity of their
+    columns: the number of shared users divided by the square root of the product of both user counts.
+    Every block multiplies its columns with the whole matrix in one sparse product and picks the
+    top_k per movie with one sort, there is no loop over single movies.
+
+    Args:
+        favourites (FavouritesMatrix): The matrix of load_favourites_matrix.
+        movie_ids (list): IDs of the movies to compute, all movies of the matrix if None. Movies without
+                          users are skipped.
+        top_k (int): Neighbours kept per movie.
+        block_size (int): Movies per sparse product.
+
+    Yields:
+        tuple: Per block, the computed movie IDs and three arrays with one entry per neighbour: the movie ID,
+               the neighbour ID and the score, best neighbours of a movie first.
+    """
+    matrix = favourites.matrix
+    if movie_ids is None:
+        columns = np.arange(len(favourites.movie_ids))
+    else:
+        columns = _positions(favourites.movie_ids, movie_ids)
+    if not len(columns):
+        return
+    norms = np.sqrt(np.asarray(matrix.sum(axis=0)).ravel())
+    by_movie = matrix.T.tocsr()
+
+    for start in range(0, len(columns), block_size):
+        block = columns[start:start + block_size]
+        # Shared users of every block movie with every movie, per movie ordered by neighbour
+        shared = (by_movie[block] @ matrix).tocsr()
+        shared.sort_indices()
+        shared = shared.tocoo()
+        rows, neighbours, counts = shared.row, shared.col, shared.data
+        other = block[rows] != neighbours
+        rows, neighbours, counts = rows[other], neighbours[other], counts[other]
+        scores = counts / (norms[block[rows]] * norms[neighbours])
+        # Per movie, best score first, ties by the lower neighbour ID. Scores are in (0, 1], so one stable
+        # sort of 2 * row - score orders by row and score and is much faster than np.lexsort.
+        order = np.argsort(rows * 2.0 - scores, kind="stable")
+        rows, neighbours, scores = rows[order], neighbours[order], scores[order]
+        row_lengths = np.bincount(rows, minlength=len(block))
+        row_starts = np.repeat(np.cumsum(row_lengths) - row_lengths, row_lengths)
+        keep = np.arange(len(rows)) - row_starts < top_k
+        yield (favourites.movie_ids[block], favourites.movie_ids[block[rows[keep]]],
+               favourites.movie_ids[neighbours[keep]], scores[keep])
+
+
+def _positions(sorted_ids, ids):
+    """Returns the sorted positions of the ids in the sorted array sorted_ids, ids it does not contain are skipped."""
+    ids = np.unique(np.asarray(list(ids), dtype=np.int64))
+    positions = np.searchsorted(sorted_ids, ids)
+    found = positions < len(sorted_ids)
+    positions, ids = positions[found], ids[found]
+    return positions[sorted_ids[positions] == ids]
@@ -0,0 +1,117 @@
+import difflib
+import re
+import unicodedata
+from sqlalchemy import column, func, literal_column, table, text
+
+
+# The FTS5 index created by the "full-text movie search" migration
+movies_fts = table("movies_fts", column("rowid"))
+
+# Title matches count ten times as much as director matches in the ranking
+RANK = text("bm25(movies_fts, 10.0, 1.0)")
+
+# The generated tsvector column of PostgreSQL databases, title words weighted A, director words B
+SEARCH_VECTOR = literal_column("movies.search_vector")
+
+MAX_QUERY_WORDS = 8
+MAX_CORRECTIONS = 3
+
+
+def search_words(value):
+    """
+    Splits a text into lower-case words without accents, the way the FTS5 tokenizer does.
+
+    Args:
+        value (str): E.g. a title or a search query.
+
+    Returns:
+        list: The words, e.g. ["amelie", "2001"] for "Amélie (2001)".
+    """
+    decomposed = unicodedata.normalize("NFKD", value.casefold())
+    return re.findall(r"[^\W_]+", "".join(char for char in decomposed if not unicodedata.combining(char)))
+
+
+def build_match_query(session, query):
+    """
+    Builds an FTS5 MATCH expression for a search query with prefix and typo-tolerant matching.
+
+    Every word matches as a prefix ("ali" finds "Alien"). A word that is not the prefix of any
+    indexed term is replaced by up to three similar terms of the index ("alein" finds "alien").
+
+    Args:
+        session: The SQLAlchemy session.
+        query (str): The search query as typed by the user.
+
+    Returns:
+        str: The MATCH expression, or None if the query contains no words.
+    """
+    words = search_words(query)[:MAX_QUERY_WORDS]
+    if not words:
+        return None
+    parts = []
+    for word in words:
+        alternatives = [f'"{word}"*']
+        if not _is_indexed_prefix(session, word):
+            alternatives.extend(f'"{term}"' for term in _similar_terms(session, word))
+        parts.append("(" + " OR ".join(alternatives) + ")")
+    return " AND ".join(parts)
+
+
+def title_match_query(title):
+    """
+    Builds an FTS5 MATCH expression for titles that start with the same words as the title.
+
+    Returns:
+        str: The MATCH expression, or None if the title contains no words.
+    """
+    words = search_words(title)
+    if not words:
+        return None
+    return 'title : ^"' + " ".join(words) + '"'
+
+
+def build_tsquery(query):
+    """
+    Builds a PostgreSQL tsquery for a search query, every word matches as a prefix.
+
+    There is no typo-tolerant matching, PostgreSQL has no vocabulary table like movies_fts_vocab.
+
+    Returns:
+        The to_tsquery() expression, or None if the query contains no words.
+    """
+    words = search_words(query)[:MAX_QUERY_WORDS]
+    if not words:
+        return None
+    return func.to_tsquery("simple", " & ".join(f"{word}:*" for word in words))
+
+
+def title_tsquery(title):
+    """
+    Builds a PostgreSQL tsquery for titles that contain the words of the title in a row.
+
+    Returns:
+        The to_tsquery() expression, or None if the title contains no words.
+    """
+    words = search_words(title)
+    if not words:
+        return None
+    return func.to_tsquery("simple", " <-> ".join(f"{word}:A" for word in words))
+
+
+def _is_indexed_prefix(session, word):
+    """Checks whether any indexed term starts with the word."""
+    return session.execute(
+        text("SELECT 1 FROM movies_fts_vocab WHERE term >= :word AND term < :word || char(1114111) LIMIT 1"),
+        {"word": word}
+    ).first() is not None
+
+
+def _similar_terms(session, word):
+    """Returns up to MAX_CORRECTIONS indexed terms that look like a misspelling of the word."""
+    if len(word) < 3:
+        return []
+    terms = session.scalars(
+        text("SELECT term FROM movies_fts_vocab WHERE length(term) BETWEEN :shortest AND :longest"),
+        {"shortest": len(word) - 2, "longest": len(word) + 2}
+    ).all()
+    return difflib.get_close_matches(word, terms, n=MAX_CORRECTIONS, cutoff=0.75)
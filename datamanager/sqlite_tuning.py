@@ -0,0 +1,72 @@
+import os
+import re
+from sqlalchemy import event
+
+
+# Production profile, every value can be overridden with the environment variable SQLITE_<PRAGMA>
+DEFAULT_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": "5000",
+    "cache_size": "-20000",
+    "mmap_size": "268435456",
+    "temp_store": "MEMORY",
+}
+
+_PRAGMA_VALUE = re.compile(r"^-?[A-Za-z0-9_]+$")
+
+
+def sqlite_pragmas_from_env():
+    """
+    Builds the pragma profile from DEFAULT_PRAGMAS and SQLITE_* environment variables.
+
+    Returns:
+        dict: Pragma name to value, e.g. {"journal_mode": "WAL", ...}.
+
+    Raises:
+        ValueError: If a value is not a plain keyword or number.
+    """
+    pragmas = {}
+    for pragma, default in DEFAULT_PRAGMAS.items():
+        value = os.getenv(f"SQLITE_{pragma.upper()}", default)
+        if not _PRAGMA_VALUE.match(value):
+            raise ValueError(f"Invalid value for SQLITE_{pragma.upper()}: {value}")
+        pragmas[pragma] = value
+    return pragmas
+
+
+def pool_options_from_env():
+    """
+    Builds the SQLAlchemy connection pool options from DB_POOL_* environment variables.
+
+    Returns:
+        dict: Keyword arguments for create_engine (SQLALCHEMY_ENGINE_OPTIONS).
+    """
+    return {
+        "pool_size": int(os.getenv("DB_POOL_SIZE", 5)),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", 10)),
+        "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", 30)),
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", 3600)),
+        "pool_pre_ping": True,
+    }
+
+
+def apply_sqlite_pragmas(engine, pragmas):
+    """
+    Registers a listener that runs the pragmas on every new DBAPI connection of the engine.
+
+    journal_mode is persistent in the database file, the other pragmas only last for the connection,
+    which is why they have to be applied on every connect.
+
+    Args:
+        engine: The SQLAlchemy engine of a SQLite database.
+        pragmas (dict): Pragma name to value.
+    """
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma, value in pragmas.items():
+                cursor.execute(f"PRAGMA {pragma} = {value}")
+        finally:
+            cursor.close()
@@ -0,0 +1,142 @@
+import re
+from sqlalchemy import text
+
+
+# The favourites as their users see them (overrides merged in), only ready movies count
+FAVOURITES_QUERY = (
+    "SELECT user_movie.user_id AS user_id, user_movie.movie_id AS movie_id, "
+    "coalesce(movie_overrides.director, movies.director) AS director, "
+    "coalesce(movie_overrides.publication_year, movies.publication_year) AS publication_year, "
+    "coalesce(movie_overrides.rating, movies.rating) AS rating "
+    "FROM user_movie "
+    "JOIN movies ON movies.id = user_movie.movie_id "
+    "LEFT OUTER JOIN movie_overrides ON movie_overrides.user_id = user_movie.user_id "
+    "AND movie_overrides.movie_id = user_movie.movie_id "
+    "WHERE movies.lookup_status = 'ready'"
+)
+
+UPSERT_USER_STATS = text(
+    "INSERT INTO user_stats (user_id, movie_count, rated_count, rating_sum) "
+    "VALUES (:user_id, :movie_count, :rated_count, :rating_sum) "
+    "ON CONFLICT (user_id) DO UPDATE SET "
+    "movie_count = user_stats.movie_count + excluded.movie_count, "
+    "rated_count = user_stats.rated_count + excluded.rated_count, "
+    "rating_sum = user_stats.rating_sum + excluded.rating_sum"
+)
+UPSERT_DIRECTOR_STATS = text(
+    "INSERT INTO user_director_stats (user_id, director, movie_count) VALUES (:user_id, :director, :movie_count) "
+    "ON CONFLICT (user_id, director) DO UPDATE SET movie_count = user_director_stats.movie_count + excluded.movie_count"
+)
+UPSERT_DECADE_STATS = text(
+    "INSERT INTO user_decade_stats (user_id, decade, movie_count) VALUES (:user_id, :decade, :movie_count) "
+    "ON CONFLICT (user_id, decade) DO UPDATE SET movie_count = user_decade_stats.movie_count + excluded.movie_count"
+)
+UPSERT_FAVOURITE_COUNTS = text(
+    "INSERT INTO movie_favourite_counts (movie_id, user_count) VALUES (:movie_id, :user_count) "
+    "ON CONFLICT (movie_id) DO UPDATE SET user_count = movie_favourite_counts.user_count + excluded.user_count"
+)
+
+
+# The first year of an OMDb Year value, e.g. "2008–2013" for a series
+LEADING_YEAR = re.compile(r"^\s*(\d{4})")
+
+
+def year_of(publication_year):
+    """Returns a publication year as int, the first year of a range like "2008–2013", or 0 if unknown."""
+    if isinstance(publication_year, int):
+        return publication_year
+    match = LEADING_YEAR.match(str(publication_year or ""))
+    return int(match.group(1)) if match else 0
+
+
+def decade_of(publication_year):
+    """Returns the decade of a publication year, e.g. 1990 for 1994, or None for an unknown year."""
+    publication_year = year_of(publication_year)
+    if publication_year <= 0:
+        return None
+    return publication_year // 10 * 10
+
+
+def apply_stats_changes(session, added=(), removed=()):
+    """
+    Adds favourites to and removes them from the summary tables with one upsert per table.
+
+    Counts that drop to 0 stay in the tables, the readers skip them.
+
+    Args:
+        session: The SQLAlchemy session (or connection) of the transaction that changes the lists.
+        added (list): (user_id, movie_id, director, publication_year, rating, lookup_status) of new favourites.
+        removed (list): The same tuples of removed favourites, with the values the user saw.
+
+    Returns:
+        bool: True if any count changed.
+    """
+    users, directors, decades, movies = {}, {}, {}, {}
+    for favourites, sign in ((added, 1), (removed, -1)):
+        for user_id, movie_id, director, publication_year, rating, lookup_status in favourites:
+            if lookup_status != "ready":
+                continue
+            totals = users.setdefault(user_id, {"user_id": user_id, "movie_count": 0,
+                                                "rated_count": 0, "rating_sum": 0.0})
+            totals["movie_count"] += sign
+            if rating is not None:
+                totals["rated_count"] += sign
+                totals["rating_sum"] += sign * rating
+            directors[(user_id, director)] = directors.get((user_id, director), 0) + sign
+            decade = decade_of(publication_year)
+            if decade is not None:
+                decades[(user_id, decade)] = decades.get((user_id, decade), 0) + sign
+            movies[movie_id] = movies.get(movie_id, 0) + sign
+
+    # Changes that cancel each other out need no write
+    users = [totals for totals in users.values()
+             if totals["movie_count"] or totals["rated_count"] or totals["rating_sum"]]
+    changes = (
+        (UPSERT_USER_STATS, users),
+        (UPSERT_DIRECTOR_STATS, [{"user_id": user_id, "director": director, "movie_count": count}
+                                 for (user_id, director), count in directors.items() if count]),
+        (UPSERT_DECADE_STATS, [{"user_id": user_id, "decade": decade, "movie_count": count}
+                               for (user_id, decade), count in decades.items() if count]),
+        (UPSERT_FAVOURITE_COUNTS, [{"movie_id": movie_id, "user_count": count}
+                                   for movie_id, count in movies.items() if count]),
+    )
+    changed = False
+    for statement, parameters in changes:
+        if parameters:
+            session.execute(statement, parameters)
+            changed = True
+    return changed
+
+
+def rebuild_stats(connection):
+    """
+    Recomputes all summary tables from the lists with aggregate queries, e.g. after a backfill.
+
+    Args:
+        connection: An open SQLAlchemy connection (or session) inside a transaction.
+
+    Returns:
+        dict: The number of rows of every summary table.
+    """
+    for table in ("user_stats", "user_director_stats", "user_decade_stats", "movie_favourite_counts"):
+        connection.execute(text(f"DELETE FROM {table}"))
+    connection.execute(text(
+        "INSERT INTO user_stats (user_id, movie_count, rated_count, rating_sum) "
+        f"SELECT user_id, count(*), count(rating), coalesce(sum(rating), 0.0) FROM ({FAVOURITES_QUERY}) AS favourites "
+        "GROUP BY user_id"
+    ))
+    connection.execute(text(
+        "INSERT INTO user_director_stats (user_id, director, movie_count) "
+        f"SELECT user_id, director, count(*) FROM ({FAVOURITES_QUERY}) AS favourites GROUP BY user_id, director"
+    ))
+    connection.execute(text(
+        "INSERT INTO user_decade_stats (user_id, decade, movie_count) "
+        f"SELECT user_id, publication_year / 10 * 10, count(*) FROM ({FAVOURITES_QUERY}) AS favourites "
+        "WHERE publication_year > 0 GROUP BY user_id, publication_year / 10 * 10"
+    ))
+    connection.execute(text(
+        "INSERT INTO movie_favourite_counts (movie_id, user_count) "
+        f"SELECT movie_id, count(*) FROM ({FAVOURITES_QUERY}) AS favourites GROUP BY movie_id"
+    ))
+    return {table: connection.execute(text(f"SELECT count(*) FROM {table}")).scalar()
+            for table in ("user_stats", "user_director_stats", "user_decade_stats", "movie_favourite_counts")}
@@ -0,0 +1,117 @@
+import time
+from flask import before_render_template, g, has_request_context, request, template_rendered
+from sqlalchemy import event
+from monitoring.metrics import MetricsRegistry
+from omdbapi.API_Movies import set_lookup_observer
+
+
+SQL_QUERY_BUCKETS = (1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+
+
+def init_instrumentation(app, db, server_timing=False):
+    """
+    Instruments the app and returns the registry that backs the /metrics endpoint.
+
+    Records per-route request latency, SQL query count and time per request (SQLAlchemy engine
+    events), OMDb lookup latency per outcome (of the shared client, see get_omdb_client) and template
+    render time. With server_timing the per-request numbers are also sent as a Server-Timing header.
+
+    Args:
+        app: The Flask app.
+        db: The SQLAlchemy database object, already initialized with the app.
+        server_timing (bool): Whether to add the Server-Timing header to every response.
+
+    Returns:
+        MetricsRegistry: The registry with all metrics.
+    """
+    registry = MetricsRegistry()
+    request_duration = registry.histogram(
+        "movieweb_request_duration_seconds", "Time spent handling a request.", ("route", "method", "status"))
+    request_queries = registry.histogram(
+        "movieweb_request_sql_queries", "SQL queries executed per request.", ("route",), SQL_QUERY_BUCKETS)
+    request_sql_duration = registry.histogram(
+        "movieweb_request_sql_duration_seconds", "Time spent in SQL queries per request.", ("route",))
+    sql_queries = registry.counter(
+        "movieweb_sql_queries_total", "SQL queries executed, including background work.")
+    omdb_duration = registry.histogram(
+        "movieweb_omdb_lookup_duration_seconds", "Duration of OMDb lookups by outcome.", ("outcome",))
+    template_duration = registry.histogram(
+        "movieweb_template_render_duration_seconds", "Time spent rendering templates.", ("template",))
+
+    @app.before_request
+    def _start_request_timing():
+        g.timing = {"start": time.perf_counter(), "sql_count": 0, "sql": 0.0, "omdb": 0.0, "template": 0.0}
+
+    @app.after_request
+    def _record_request_timing(response):
+        timing = g.pop("timing", None)
+        if timing is None:
+            return response
+        total = time.perf_counter() - timing["start"]
+        route = request.url_rule.rule if request.url_rule else "unmatched"
+        request_duration.observe(total, route=route, method=request.method, status=str(response.status_code))
+        request_queries.observe(timing["sql_count"], route=route)
+        request_sql_duration.observe(timing["sql"], route=route)
+        if server_timing:
+            response.headers["Server-Timing"] = ", ".join((
+                f'db;dur={timing["sql"] * 1000:.1f};desc="{timing["sql_count"]} queries"',
+                f'omdb;dur={timing["omdb"] * 1000:.1f}',
+                f'tmpl;dur={timing["template"] * 1000:.1f}',
+                f'total;dur={total * 1000:.1f}',
+            ))
+        return response
+
+    with app.app_context():
+        # The primary and, if configured, the read replica
+        engines = list(db.engines.values())
+
+    def _start_query_timing(connection, cursor, statement, parameters, context, executemany):
+        connection.info.setdefault("query_start", []).append(time.perf_counter())
+
+    def _record_query_timing(connection, cursor, statement, parameters, context, executemany):
+        query_starts = connection.info.get("query_start")
+        if not query_starts:
+            # The query started before the listeners were registered
+            return
+        duration = time.perf_counter() - query_starts.pop()
+        sql_queries.inc()
+        timing = _current_timing()
+        if timing is not None:
+            timing["sql_count"] += 1
+            timing["sql"] += duration
+
+    for engine in engines:
+        event.listen(engine, "before_cursor_execute", _start_query_timing)
+        event.listen(engine, "after_cursor_execute", _record_query_timing)
+
+    def _record_omdb_lookup(duration, outcome):
+        omdb_duration.observe(duration, outcome=outcome)
+        timing = _current_timing()
+        if timing is not None:
+            timing["omdb"] += duration
+
+    set_lookup_observer(_record_omdb_lookup)
+
+    def _start_template_timing(sender, template, context, **extra):
+        g.template_start = time.perf_counter()
+
+    def _record_template_timing(sender, template, context, **extra):
+        start = g.pop("template_start", None)
+        if start is None:
+            return
+        duration = time.perf_counter() - start
+        template_duration.observe(duration, template=template.name or "string")
+        timing = _current_timing()
+        if timing is not None:
+            timing["template"] += duration
+
+    before_render_template.connect(_start_template_timing, app, weak=False)
+    template_rendered.connect(_record_template_timing, app, weak=False)
+    return registry
+
+
+def _current_timing():
+    """Returns the timing dict of the current request, or None outside of a request."""
+    if has_request_context():
+        return g.get("timing")
+    return None
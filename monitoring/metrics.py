@@ -0,0 +1,151 @@
+import bisect
+import threading
+
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_labels(label_names, label_values, extra=()):
+    """Formats label names and values as a Prometheus label set, e.g. {route="home",le="0.1"}."""
+    pairs = list(zip(label_names, label_values)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value):
+    """Formats a sample value the way Prometheus expects it."""
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonically increasing value per label set."""
+
+    type_name = "counter"
+
+    def __init__(self, name, documentation, label_names=()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._values = {}
+        self._lock = threading.Lock()
+
+
+    def inc(self, amount=1, **labels):
+        """Increases the counter of the label set by amount."""
+        key = tuple(labels[name] for name in self.label_names)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+    def samples(self):
+        """Yields (name suffix, label values, extra labels, value) for the exposition format."""
+        with self._lock:
+            values = dict(self._values)
+        for key, value in sorted(values.items()):
+            yield "", key, (), value
+
+
+class Histogram:
+    """Distribution of observed values in cumulative buckets per label set."""
+
+    type_name = "histogram"
+
+    def __init__(self, name, documentation, label_names=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(sorted(buckets))
+        self._values = {}
+        self._lock = threading.Lock()
+
+
+    def observe(self, value, **labels):
+        """Records one observation for the label set."""
+        key = tuple(labels[name] for name in self.label_names)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.setdefault(key, [[0] * (len(self.buckets) + 1), 0.0])
+            state[0][index] += 1
+            state[1] += value
+
+
+    def samples(self):
+        """Yields (name suffix, label values, extra labels, value) for the exposition format."""
+        with self._lock:
+            values = {key: (list(bucket_counts), total) for key, (bucket_counts, total) in self._values.items()}
+        for key, (bucket_counts, total) in sorted(values.items()):
+            cumulative = 0
+            for upper_bound, bucket_count in zip(self.buckets + (float("inf"),), bucket_counts):
+                cumulative += bucket_count
+                yield "_bucket", key, (("le", _format_value(float(upper_bound))),), cumulative
+            yield "_sum", key, (), total
+            yield "_count", key, (), cumulative
+
+
+class Gauge:
+    """Value read from a callback when the metrics are scraped."""
+
+    type_name = "gauge"
+
+    def __init__(self, name, documentation, callback):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = ()
+        self.callback = callback
+
+
+    def samples(self):
+        """Yields (name suffix, label values, extra labels, value) for the exposition format."""
+        yield "", (), (), self.callback()
+
+
+class MetricsRegistry:
+    """Collection of metrics rendered in the Prometheus text exposition format."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+
+    def register(self, metric):
+        """Adds a metric, or returns the already registered metric with the same name."""
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+
+    def counter(self, name, documentation, label_names=()):
+        """Registers and returns a Counter."""
+        return self.register(Counter(name, documentation, label_names))
+
+
+    def histogram(self, name, documentation, label_names=(), buckets=DEFAULT_BUCKETS):
+        """Registers and returns a Histogram."""
+        return self.register(Histogram(name, documentation, label_names, buckets))
+
+
+    def gauge(self, name, documentation, callback):
+        """Registers and returns a Gauge that reads its value from callback()."""
+        return self.register(Gauge(name, documentation, callback))
+
+
+    def render(self):
+        """
+        Renders all metrics.
+
+        Returns:
+            str: The metrics in the Prometheus text exposition format (version 0.0.4).
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            for suffix, label_values, extra_labels, value in metric.samples():
+                labels = _format_labels(metric.label_names, label_values, extra_labels)
+                lines.append(f"{metric.name}{suffix}{labels} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
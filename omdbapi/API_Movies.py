@@ -1,57 +1,343 @@
 import os
+import random
+import threading
+import time
 from dotenv import load_dotenv
 import requests
+from requests.adapters import HTTPAdapter
+from omdbapi.catalog import OMDbCatalog
+from omdbapi.circuit_breaker import CircuitBreaker
+from omdbapi.response_cache import OMDbResponseCache, normalize_title
+from omdbapi.single_flight import SingleFlight
 
-# Load API Key from .env
-load_dotenv()
-API_KEY = os.getenv("API_KEY")
+# Cache and catalog files live in data/ unless configured otherwise, see get_omdb_client
+PROJECT_DIRECTORY = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
 
-def api_request_data(title: str):
+# The shared client, built on first use, and the on_lookup callback it gets (set_lookup_observer)
+_omdb_client = None
+_omdb_client_lock = threading.Lock()
+_on_lookup = None
+
+
+class OMDbClient:
     """
-    Fetches movie data from the OMDB API based on the provided movie title. (https://www.omdbapi.com/)
+    Client for the OMDb API (https://www.omdbapi.com/).
 
-    Parameters:
-        title (str): The title of the movie to search for.
+    Owns a pooled keep-alive session, applies connect/read timeouts, retries 5xx/429 answers and
+    connection errors with jittered exponential backoff and stops calling upstream while the
+    circuit breaker is open. Titles are resolved from the local catalog first and answered
+    from the response cache when possible. With a single flight, concurrent lookups of the same
+    title share one request.
+    """
 
-    Returns:
-        tuple: A tuple containing:
-            - title (str): The movie's title.
-            - year (str): The movie's release year.
-            - rating (str): The movie's rating, or a default message if not available.
-            - poster_url (str): The URL of the movie's poster.
-        False: If there was an issue with the request, missing data, or invalid response, the function returns `False`.
-
-    Exceptions:
-        requests.exceptions.RequestException: Raised if there is a network-related error.
-        KeyError: Raised if an expected key is missing in the API response.
-    """
-    try:
-        title_request = "&t=" + "+".join(title.split(" "))
-        api_response = requests.get(f"http://www.omdbapi.com/?apikey={API_KEY}{title_request}")
-        if api_response.status_code == 200:
-            movie_infos = api_response.json()
-            if "Title" in movie_infos and "Year" in movie_infos and "Poster" in movie_infos:
-                title = movie_infos["Title"]
-                year = movie_infos["Year"]
-                rating = movie_infos.get("Ratings", False)
-                rating = rating[0]["Value"] if rating else None
-                poster_url = movie_infos["Poster"]
-                director = movie_infos["Director"] if "Director" in movie_infos else "No director available"
-                return title, year, rating, poster_url, director
-            else:
-                print("Error: Missing expected data in the response")
-                return False
+    RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+    def __init__(self, api_key, cache=None, base_url="http://www.omdbapi.com/", connect_timeout=3.05,
+                 read_timeout=10.0, max_retries=2, backoff_factor=0.5, backoff_max=8.0, pool_size=10,
+                 circuit_breaker=None, catalog=None, single_flight=None):
+        """
+        Initializes the client and its HTTP session.
+
+        Parameters:
+            api_key (str): The OMDb API key.
+            cache (OMDbResponseCache): Cache for found and "not found" answers, or None.
+            base_url (str): The OMDb endpoint.
+            connect_timeout (float): Seconds to wait for the TCP connection.
+            read_timeout (float): Seconds to wait for the response.
+            max_retries (int): Retries after the first attempt for retryable failures.
+            backoff_factor (float): Base delay in seconds, doubled on every retry.
+            backoff_max (float): Upper bound for a single delay in seconds.
+            pool_size (int): Number of keep-alive connections kept open.
+            circuit_breaker (CircuitBreaker): Breaker guarding upstream, a default one if None.
+            catalog (OMDbCatalog): Local catalog asked before the cache and the network, or None.
+            single_flight (SingleFlight): Coalesces concurrent requests of the same title, or None.
+
+        The attribute on_lookup can be set to a callable on_lookup(duration, outcome) that is told
+        about every lookup, outcome being "catalog_hit", "cache_hit", "found", "not_found", "error"
+        or "coalesced" (shared the request of a concurrent lookup).
+        """
+        self.api_key = api_key
+        self.cache = cache
+        self.base_url = base_url
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.backoff_max = backoff_max
+        self.circuit_breaker = circuit_breaker or CircuitBreaker()
+        self.catalog = catalog
+        self.single_flight = single_flight
+        self.on_lookup = None
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+
+    def fetch_movie(self, title: str):
+        """
+        Fetches movie data for a title from the local catalog, the response cache or OMDb, in this order.
+
+        Found movies and "not found" answers are cached, network and parsing errors are not.
+
+        Parameters:
+            title (str): The title of the movie to search for.
+
+        Returns:
+            tuple: A tuple containing:
+                - title (str): The movie's title.
+                - year (str): The movie's release year.
+                - rating (str): The movie's rating, or None if not available.
+                - poster_url (str): The URL of the movie's poster.
+                - director (str): The movie's director.
+            False: If the movie was not found or the response was not usable.
+            str: An error message if there was a network or parsing error.
+        """
+        started_at = time.perf_counter()
+        local_result = self.lookup_locally(title, started_at)
+        if local_result is not OMDbResponseCache.MISSING:
+            return local_result
+        if self.single_flight is None:
+            result, cacheable = self._request_movie(title)
+            return self.finish_lookup(title, result, cacheable, started_at)
+        result, coalesced = self.single_flight.run(
+            normalize_title(title),
+            lambda: self._lookup_upstream(title, started_at),
+            lambda: self.lookup_locally(title, started_at)
+        )
+        if coalesced:
+            self._report_lookup(started_at, "coalesced")
+        return result
+
+
+    def lookup_locally(self, title: str, started_at):
+        """
+        Answers a lookup from the local catalog or the response cache, without any network I/O.
+
+        Parameters:
+            title (str): The title of the movie to search for.
+            started_at (float): time.perf_counter() at the start of the lookup, for on_lookup.
+
+        Returns:
+            tuple | False: The result described in fetch_movie.
+            OMDbResponseCache.MISSING: If OMDb has to be asked.
+        """
+        if self.catalog is not None:
+            cataloged = self.catalog.lookup(title)
+            if cataloged is not None:
+                self._report_lookup(started_at, "catalog_hit")
+                return cataloged
+        if self.cache is not None:
+            cached = self.cache.get(title)
+            if cached is not OMDbResponseCache.MISSING:
+                self._report_lookup(started_at, "cache_hit")
+                return cached
+        return OMDbResponseCache.MISSING
+
+
+    def finish_lookup(self, title: str, result, cacheable, started_at):
+        """
+        Caches the answer of an OMDb request if allowed and reports the lookup to on_lookup.
+
+        Returns:
+            tuple | False | str: The result, unchanged.
+        """
+        if cacheable and self.cache is not None:
+            self.cache.set(title, result)
+        if isinstance(result, tuple):
+            self._report_lookup(started_at, "found")
+        elif result is False:
+            self._report_lookup(started_at, "not_found")
         else:
-            print(f"Error: Received a non-OK status code: {api_response.status_code}")
-            return False
-    except requests.exceptions.RequestException as e:
-        return f"Network error occurred: {e}"
-    except ValueError as e:
-        return f"Error translation json response: {e}"
-    except KeyError as e:
-        return f"Key error, key nicht vorhanden: Missing {e} in the response"
+            self._report_lookup(started_at, "error")
+        return result
+
+
+    def close(self):
+        """Closes the pooled connections."""
+        self.session.close()
+
 
+    def _report_lookup(self, started_at, outcome):
+        """Passes the duration and outcome of a lookup to on_lookup, if set."""
+        if self.on_lookup is not None:
+            self.on_lookup(time.perf_counter() - started_at, outcome)
 
 
+    def _lookup_upstream(self, title: str, started_at):
+        """
+        Requests a title from OMDb for the single flight and finishes the lookup.
 
+        Returns:
+            tuple: The result described in fetch_movie and whether the lookup failed, a result that is not cached.
+        """
+        result, cacheable = self._request_movie(title)
+        return self.finish_lookup(title, result, cacheable, started_at), not cacheable
+
+
+    def _request_movie(self, title: str):
+        """
+        Requests a title from OMDb and parses the answer.
+
+        Returns:
+            tuple: The result described in fetch_movie and a flag telling whether it may be cached.
+        """
+        if not self.circuit_breaker.allow_request():
+            return "Network error occurred: OMDb is currently unavailable, please try again later.", False
+        try:
+            api_response = self._get_with_retries({"apikey": self.api_key, "t": title})
+        except requests.exceptions.RequestException as e:
+            self.circuit_breaker.record_failure()
+            return f"Network error occurred: {e}", False
+        return self.parse_movie_response(api_response)
+
+
+    def parse_movie_response(self, api_response):
+        """
+        Records the answer's status in the circuit breaker and parses the movie data.
+
+        Parameters:
+            api_response: The OMDb answer, a requests or httpx response.
+
+        Returns:
+            tuple: The result described in fetch_movie and a flag telling whether it may be cached.
+        """
+        if api_response.status_code >= 500 or api_response.status_code == 429:
+            self.circuit_breaker.record_failure()
+        else:
+            self.circuit_breaker.record_success()
 
+        try:
+            if api_response.status_code == 200:
+                movie_infos = api_response.json()
+                if "Title" in movie_infos and "Year" in movie_infos and "Poster" in movie_infos:
+                    title = movie_infos["Title"]
+                    year = movie_infos["Year"]
+                    rating = movie_infos.get("Ratings", False)
+                    rating = rating[0]["Value"] if rating else None
+                    poster_url = movie_infos["Poster"]
+                    director = movie_infos["Director"] if "Director" in movie_infos else "No director available"
+                    return (title, year, rating, poster_url, director), True
+                else:
+                    print("Error: Missing expected data in the response")
+                    # Only a real "not found" answer is cached, not e.g. an invalid API key
+                    return False, movie_infos.get("Error") == "Movie not found!"
+            else:
+                print(f"Error: Received a non-OK status code: {api_response.status_code}")
+                return False, False
+        except ValueError as e:
+            return f"Error translation json response: {e}", False
+        except KeyError as e:
+            return f"Key error, key nicht vorhanden: Missing {e} in the response", False
+
+
+    def _get_with_retries(self, params):
+        """
+        Sends the GET request and retries connection errors, timeouts and 5xx/429 answers.
+
+        Returns:
+            requests.Response: The last response received.
+
+        Raises:
+            requests.exceptions.RequestException: If the last attempt failed without a response.
+        """
+        for attempt in range(self.max_retries + 1):
+            last_attempt = attempt == self.max_retries
+            try:
+                api_response = self.session.get(self.base_url, params=params, timeout=self.timeout)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                if last_attempt:
+                    raise
+                time.sleep(self._backoff_delay(attempt))
+                continue
+            if api_response.status_code not in self.RETRY_STATUS_CODES or last_attempt:
+                return api_response
+            time.sleep(self._backoff_delay(attempt, api_response.headers.get("Retry-After")))
+
+
+    def _backoff_delay(self, attempt, retry_after=None):
+        """Returns a full-jitter exponential delay, at least as long as a numeric Retry-After header."""
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_factor * 2 ** attempt))
+        if retry_after and retry_after.isdigit():
+            delay = max(delay, float(retry_after))
+        return min(delay, self.backoff_max)
+
+
+def get_omdb_client():
+    """
+    Returns the OMDb client shared by the process, building it on the first call.
+
+    The .env file is loaded and the response cache, the catalog and the lookup leases are opened
+    only then, so importing this module reads no configuration and touches no files.
+
+    Returns:
+        OMDbClient: The shared client.
+    """
+    global _omdb_client
+    if _omdb_client is None:
+        with _omdb_client_lock:
+            if _omdb_client is None:
+                _omdb_client = _build_omdb_client()
+    return _omdb_client
+
+
+def set_lookup_observer(on_lookup):
+    """
+    Sets the on_lookup callback of the shared client, now or as soon as it is built.
+
+    Parameters:
+        on_lookup (callable): Called as on_lookup(duration, outcome), see OMDbClient.
+    """
+    global _on_lookup
+    with _omdb_client_lock:
+        _on_lookup = on_lookup
+        if _omdb_client is not None:
+            _omdb_client.on_lookup = on_lookup
+
+
+def _build_omdb_client():
+    """Builds the shared client from the environment and the .env file."""
+    load_dotenv()
+    # An empty OMDB_CACHE_PATH keeps only the in-process tier
+    cache_path = os.getenv("OMDB_CACHE_PATH", os.path.join(PROJECT_DIRECTORY, "data", "omdb_cache.sqlite"))
+    response_cache = OMDbResponseCache(
+        cache_path or None,
+        ttl=int(os.getenv("OMDB_CACHE_TTL", 7 * 24 * 3600)),
+        negative_ttl=int(os.getenv("OMDB_NEGATIVE_CACHE_TTL", 3600)),
+        max_entries=int(os.getenv("OMDB_CACHE_SIZE", 1024))
+    )
+    # Local catalog loaded from an OMDb/IMDb dump (flask import-catalog), an empty path disables it
+    catalog_path = os.getenv("OMDB_CATALOG_PATH", os.path.join(PROJECT_DIRECTORY, "data", "omdb_catalog.sqlite"))
+    # Concurrent lookups of a title share one OMDb request, across workers through leases in the response cache file
+    single_flight = SingleFlight(cache_path or None, lease_seconds=float(os.getenv("OMDB_LOOKUP_LEASE", 60)),
+                                 failure_seconds=float(os.getenv("OMDB_LOOKUP_FAILURE_TTL", 5)))
+    client = OMDbClient(
+        os.getenv("API_KEY"),
+        cache=response_cache,
+        connect_timeout=float(os.getenv("OMDB_CONNECT_TIMEOUT", 3.05)),
+        read_timeout=float(os.getenv("OMDB_READ_TIMEOUT", 10)),
+        max_retries=int(os.getenv("OMDB_MAX_RETRIES", 2)),
+        pool_size=int(os.getenv("OMDB_POOL_SIZE", 10)),
+        circuit_breaker=CircuitBreaker(
+            failure_threshold=int(os.getenv("OMDB_BREAKER_THRESHOLD", 5)),
+            reset_timeout=float(os.getenv("OMDB_BREAKER_RESET", 30))
+        ),
+        catalog=OMDbCatalog(catalog_path) if catalog_path else None,
+        single_flight=single_flight
+    )
+    client.on_lookup = _on_lookup
+    return client
+
+
+def api_request_data(title: str):
+    """
+    Fetches movie data from the OMDB API based on the provided movie title. (https://www.omdbapi.com/)
+
+    Thin wrapper around the module's shared OMDbClient (get_omdb_client), see OMDbClient.fetch_movie.
+
+    Parameters:
+        title (str): The title of the movie to search for.
+
+    Returns:
+        tuple | False | str: The movie data, False if not found, or an error message.
+    """
+    return get_omdb_client().fetch_movie(title)
@@ -0,0 +1,159 @@
+import asyncio
+import time
+import httpx
+from omdbapi.response_cache import OMDbResponseCache, normalize_title
+
+
+class AsyncOMDbClient:
+    """
+    Non-blocking counterpart of OMDbClient for the ASGI mode.
+
+    Shares the configuration, circuit breaker, response cache, catalog and on_lookup callback of
+    a synchronous OMDbClient, but sends the requests with an httpx.AsyncClient. A lookup waiting
+    on OMDb only holds a coroutine instead of a thread, so one process can keep hundreds of slow
+    lookups open. The SQLite based catalog and cache are asked in a worker thread. Concurrent
+    lookups of the same title share one task, and the client's single flight lease across workers.
+    """
+
+    def __init__(self, client, max_connections=200):
+        """
+        Initializes the client and its connection pool.
+
+        Parameters:
+            client (OMDbClient): The synchronous client whose configuration and caches are used.
+            max_connections (int): Maximum number of concurrent connections to OMDb.
+        """
+        self.client = client
+        connect_timeout, read_timeout = client.timeout
+        self.session = httpx.AsyncClient(
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=min(max_connections, 20))
+        )
+        self._in_flight = {}
+
+
+    async def fetch_movie(self, title: str):
+        """
+        Fetches movie data for a title, see OMDbClient.fetch_movie.
+
+        Parameters:
+            title (str): The title of the movie to search for.
+
+        Returns:
+            tuple | False | str: The movie data, False if not found, or an error message.
+        """
+        started_at = time.perf_counter()
+        local_result = await asyncio.to_thread(self.client.lookup_locally, title, started_at)
+        if local_result is not OMDbResponseCache.MISSING:
+            return local_result
+        single_flight = self.client.single_flight
+        if single_flight is None:
+            return await self._lookup(title, started_at)
+        key = normalize_title(title)
+        task = self._in_flight.get(key)
+        if task is not None:
+            single_flight.count("coalesced")
+            # A cancelled caller must not cancel the lookup the others are waiting for
+            result = await asyncio.shield(task)
+            self.client._report_lookup(started_at, "coalesced")
+            return result
+        single_flight.count("lookups")
+        task = asyncio.ensure_future(self._lookup_leased(key, title, started_at))
+        self._in_flight[key] = task
+        task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        return await asyncio.shield(task)
+
+
+    async def close(self):
+        """Closes the pooled connections."""
+        await self.session.aclose()
+
+
+    async def _lookup(self, title: str, started_at):
+        """Requests a title from OMDb and stores the answer like OMDbClient.finish_lookup."""
+        result, _ = await self._lookup_upstream(title, started_at)
+        return result
+
+
+    async def _lookup_upstream(self, title: str, started_at):
+        """
+        Requests a title from OMDb and finishes the lookup, see OMDbClient._lookup_upstream.
+
+        Returns:
+            tuple: The result described in OMDbClient.fetch_movie and whether the lookup failed.
+        """
+        result, cacheable = await self._request_movie(title)
+        return await asyncio.to_thread(self.client.finish_lookup, title, result, cacheable, started_at), not cacheable
+
+
+    async def _lookup_leased(self, key, title: str, started_at):
+        """
+        Runs _lookup while holding the single flight lease of the title, or answers from
+        the cache once the worker holding it is done, or with the result of its failed lookup.
+        """
+        single_flight = self.client.single_flight
+        token = await asyncio.to_thread(single_flight.acquire_lease, key)
+        waited = token is None
+        if waited:
+            single_flight.count("waited_for_worker")
+        while token is None:
+            failure = await asyncio.to_thread(single_flight.lease_failure, key)
+            if failure is not OMDbResponseCache.MISSING:
+                return failure
+            await asyncio.sleep(single_flight.poll_interval)
+            token = await asyncio.to_thread(single_flight.acquire_lease, key)
+        failed = False
+        try:
+            if waited:
+                cached = await asyncio.to_thread(self.client.lookup_locally, title, started_at)
+                if cached is not OMDbResponseCache.MISSING:
+                    return cached
+            result, failed = await self._lookup_upstream(title, started_at)
+            if failed:
+                await asyncio.to_thread(single_flight.fail_lease, key, token, result)
+            return result
+        finally:
+            if not failed:
+                await asyncio.to_thread(single_flight.release_lease, key, token)
+
+
+    async def _request_movie(self, title: str):
+        """
+        Requests a title from OMDb and parses the answer.
+
+        Returns:
+            tuple: The result described in OMDbClient.fetch_movie and a flag telling whether it may be cached.
+        """
+        if not self.client.circuit_breaker.allow_request():
+            return "Network error occurred: OMDb is currently unavailable, please try again later.", False
+        try:
+            api_response = await self._get_with_retries({"apikey": self.client.api_key, "t": title})
+        except httpx.HTTPError as e:
+            self.client.circuit_breaker.record_failure()
+            return f"Network error occurred: {e}", False
+        return self.client.parse_movie_response(api_response)
+
+
+    async def _get_with_retries(self, params):
+        """
+        Sends the GET request and retries connection errors, timeouts and 5xx/429 answers.
+
+        Returns:
+            httpx.Response: The last response received.
+
+        Raises:
+            httpx.HTTPError: If the last attempt failed without a response.
+        """
+        max_retries = self.client.max_retries
+        for attempt in range(max_retries + 1):
+            last_attempt = attempt == max_retries
+            try:
+                api_response = await self.session.get(self.client.base_url, params=params)
+            except httpx.TransportError:
+                if last_attempt:
+                    raise
+                await asyncio.sleep(self.client._backoff_delay(attempt))
+                continue
+            if api_response.status_code not in self.client.RETRY_STATUS_CODES or last_attempt:
+                return api_response
+            await asyncio.sleep(self.client._backoff_delay(attempt, api_response.headers.get("Retry-After")))
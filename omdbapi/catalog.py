@@ -0,0 +1,263 @@
+import csv
+import gzip
+import io
+import json
+import os
+import sqlite3
+import threading
+import time
+from omdbapi.response_cache import normalize_title
+
+
+# Accepted column names per catalog field: OMDb JSON answers, IMDb datasets and plain names
+FIELD_ALIASES = {
+    "imdb_id": ("imdbID", "tconst", "imdb_id"),
+    "title": ("Title", "primaryTitle", "title"),
+    "year": ("Year", "startYear", "year"),
+    "rating": ("imdbRating", "averageRating", "rating"),
+    "poster_url": ("Poster", "poster_url", "poster"),
+    "director": ("Director", "director", "directors"),
+    "votes": ("imdbVotes", "numVotes", "votes"),
+}
+
+
+class OMDbCatalog:
+    """
+    Local catalog of movies bulk-loaded from an OMDb/IMDb-style dump file.
+
+    Titles are resolved from the catalog before OMDb is asked, so environments with a slow
+    or rate-limited API key only go upstream for titles the dump does not contain. If a
+    title exists several times (remakes), the entry with the most votes wins.
+    """
+
+    def __init__(self, db_path):
+        """
+        Opens the catalog file and creates its table.
+
+        Parameters:
+            db_path (str): Path of the SQLite file.
+        """
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.db_path = db_path
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0}
+        connection = self._connection()
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS catalog ("
+            "id INTEGER PRIMARY KEY, "
+            "imdb_id TEXT UNIQUE, "
+            "title TEXT NOT NULL, "
+            "title_normalized TEXT NOT NULL, "
+            "year TEXT, "
+            "rating REAL, "
+            "poster_url TEXT, "
+            "director TEXT, "
+            "votes INTEGER NOT NULL DEFAULT 0)"
+        )
+        connection.execute(
+            "CREATE INDEX IF NOT EXISTS ix_catalog_title ON catalog (title_normalized, votes DESC)"
+        )
+        connection.commit()
+
+
+    def lookup(self, title: str):
+        """
+        Resolves a title from the catalog.
+
+        Parameters:
+            title (str): The title as entered by the user.
+
+        Returns:
+            tuple: (title, year, rating, poster_url, director) like OMDbClient.fetch_movie, or None on a miss.
+        """
+        row = self._connection().execute(
+            "SELECT title, year, rating, poster_url, director FROM catalog "
+            "WHERE title_normalized = ? ORDER BY votes DESC LIMIT 1",
+            (normalize_title(title),)
+        ).fetchone()
+        with self._lock:
+            self.stats["hits" if row else "misses"] += 1
+        if row is None:
+            return None
+        title, year, rating, poster_url, director = row
+        return (title, year or "", f"{rating}/10" if rating is not None else None,
+                poster_url or "N/A", director or "No director available")
+
+
+    def import_file(self, path, file_format=None, batch_size=5000, progress=None):
+        """
+        Streams a dump file into the catalog with batched inserts, one transaction per batch.
+
+        Rows are read one at a time, so the file never has to fit into memory. Rows with the
+        same IMDb ID replace each other, so a newer dump can be loaded over an older one.
+
+        Parameters:
+            path (str): The dump file, .jsonl, .csv or .tsv, optionally gzipped (.gz).
+            file_format (str): "jsonl", "csv" or "tsv", taken from the file name if None.
+            batch_size (int): Rows per INSERT batch and transaction.
+            progress (callable): Called as progress(rows_imported) after every batch.
+
+        Returns:
+            dict: Number of imported and skipped rows, the duration in seconds and rows per second.
+
+        Raises:
+            ValueError: If the file format is unknown.
+        """
+        file_format = file_format or self._format_from_name(path)
+        if file_format not in ("jsonl", "csv", "tsv"):
+            raise ValueError(f"Unknown dump format: {file_format}")
+
+        started_at = time.perf_counter()
+        imported = skipped = 0
+        batch = []
+        connection = self._connection()
+        with self._open(path) as dump:
+            for record in self._read_records(dump, file_format):
+                row = self._catalog_row(record)
+                if row is None:
+                    skipped += 1
+                    continue
+                batch.append(row)
+                if len(batch) >= batch_size:
+                    imported += self._insert_batch(connection, batch)
+                    batch = []
+                    if progress is not None:
+                        progress(imported)
+            if batch:
+                imported += self._insert_batch(connection, batch)
+        connection.execute("ANALYZE catalog")
+        connection.commit()
+        duration = time.perf_counter() - started_at
+        return {
+            "imported": imported,
+            "skipped": skipped,
+            "seconds": duration,
+            "rows_per_second": imported / duration if duration else 0.0,
+        }
+
+
+    def count_known_titles(self, titles):
+        """
+        Counts how many of the titles the catalog resolves, e.g. the titles of the current library.
+
+        Parameters:
+            titles (iterable): The titles to check.
+
+        Returns:
+            tuple: The number of distinct titles found in the catalog and of distinct titles checked.
+        """
+        keys = list({normalize_title(title) for title in titles})
+        known = 0
+        connection = self._connection()
+        # Chunks stay below SQLite's limit of bound parameters
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            known += connection.execute(
+                f"SELECT COUNT(DISTINCT title_normalized) FROM catalog "
+                f"WHERE title_normalized IN ({', '.join('?' * len(chunk))})",
+                chunk
+            ).fetchone()[0]
+        return known, len(keys)
+
+
+    def count(self):
+        """Returns the number of movies in the catalog."""
+        return self._connection().execute("SELECT COUNT(*) FROM catalog").fetchone()[0]
+
+
+    def get_stats(self):
+        """
+        Returns the lookup counters of this process.
+
+        Returns:
+            dict: Hits, misses and the hit rate.
+        """
+        with self._lock:
+            stats = dict(self.stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+
+    def _insert_batch(self, connection, batch):
+        """Inserts one batch of rows in its own transaction."""
+        with connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO catalog "
+                "(imdb_id, title, title_normalized, year, rating, poster_url, director, votes) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                batch
+            )
+        return len(batch)
+
+
+    def _catalog_row(self, record):
+        """Maps a record of the dump to a catalog row, or returns None if it has no title."""
+        # IMDb's title.basics also lists series, episodes and shorts
+        if record.get("titleType") not in (None, "movie", "tvMovie"):
+            return None
+        values = {}
+        for field, aliases in FIELD_ALIASES.items():
+            present = (record[alias] for alias in aliases if record.get(alias) not in (None, "", "N/A", "\\N"))
+            values[field] = next(present, None)
+        if values["title"] is None:
+            return None
+        if values["rating"] is None and record.get("Ratings"):
+            values["rating"] = str(record["Ratings"][0].get("Value", "")).split("/")[0]
+        try:
+            rating = float(values["rating"]) if values["rating"] is not None else None
+        except ValueError:
+            rating = None
+        try:
+            votes = int(str(values["votes"]).replace(",", "")) if values["votes"] is not None else 0
+        except ValueError:
+            votes = 0
+        title = str(values["title"])
+        return (values["imdb_id"], title, normalize_title(title),
+                str(values["year"]) if values["year"] is not None else None,
+                rating, values["poster_url"], values["director"], votes)
+
+
+    def _read_records(self, dump, file_format):
+        """Yields the records of the dump as dicts."""
+        if file_format == "jsonl":
+            for line in dump:
+                line = line.strip()
+                if line:
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        print(f"Skipping invalid JSON line: {line[:80]}")
+        else:
+            delimiter = "\t" if file_format == "tsv" else ","
+            # IMDb's TSV files are not quoted
+            quoting = csv.QUOTE_NONE if file_format == "tsv" else csv.QUOTE_MINIMAL
+            yield from csv.DictReader(dump, delimiter=delimiter, quoting=quoting)
+
+
+    def _open(self, path):
+        """Opens the dump as text, decompressing .gz files on the fly."""
+        if path.endswith(".gz"):
+            return io.TextIOWrapper(gzip.open(path, "rb"), encoding="utf-8", newline="")
+        return open(path, encoding="utf-8", newline="")
+
+
+    def _format_from_name(self, path):
+        """Returns the dump format from the file extension, e.g. "csv" for "movies.csv.gz"."""
+        name = path[:-3] if path.endswith(".gz") else path
+        extension = os.path.splitext(name)[1].lstrip(".").lower()
+        return "jsonl" if extension in ("json", "ndjson") else extension
+
+
+    def _connection(self):
+        """Returns the SQLite connection of the current thread."""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.db_path, timeout=10)
+            connection.execute("PRAGMA journal_mode = WAL")
+            connection.execute("PRAGMA synchronous = NORMAL")
+            self._local.connection = connection
+        return connection
@@ -0,0 +1,68 @@
+import threading
+import time
+
+
+class CircuitBreaker:
+    """
+    Fails fast while an upstream service is down.
+
+    After `failure_threshold` consecutive failures the breaker opens and rejects calls for
+    `reset_timeout` seconds. Afterwards a single trial call is let through (half-open): a success
+    closes the breaker again, a failure re-opens it.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        """
+        Initializes a closed circuit breaker.
+
+        Parameters:
+            failure_threshold (int): Consecutive failures after which the breaker opens.
+            reset_timeout (float): Seconds the breaker stays open before a trial call is allowed.
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+
+    def allow_request(self):
+        """
+        Tells whether a call may go upstream right now.
+
+        Returns:
+            bool: False while the breaker is open or another trial call is running.
+        """
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+            if self.state == self.HALF_OPEN and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+
+    def record_success(self):
+        """Closes the breaker and resets the failure count."""
+        with self._lock:
+            self.state = self.CLOSED
+            self._failures = 0
+            self._trial_running = False
+
+
+    def record_failure(self):
+        """Counts a failure and opens the breaker when the threshold is reached or a trial call failed."""
+        with self._lock:
+            self._failures += 1
+            self._trial_running = False
+            if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
@@ -0,0 +1,216 @@
+import hashlib
+import io
+import os
+import tempfile
+import threading
+import requests
+import urllib3
+from omdbapi.poster_urls import is_poster_url
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow is optional, without it the original poster is served
+    Image = None
+
+
+class PosterCache:
+    """
+    Content-addressed on-disk cache for movie posters and their resized thumbnails.
+
+    Each poster is downloaded once. The original and every thumbnail are stored under the SHA-256
+    of the original bytes, so identical posters share their files. Files are touched on every
+    read and the least recently used ones are deleted when the cache grows beyond max_bytes.
+    """
+
+    WIDTHS = (200, 400)
+    MAX_DOWNLOAD_BYTES = 5 * 1024 * 1024
+    FORMATS = {"webp": ("WEBP", "image/webp"), "jpeg": ("JPEG", "image/jpeg")}
+
+    def __init__(self, cache_dir, max_bytes=200 * 1024 * 1024, session=None, timeout=(3.05, 10)):
+        """
+        Initializes the cache directory and measures its current size.
+
+        Parameters:
+            cache_dir (str): Directory for the cached files.
+            max_bytes (int): Size cap of the cache directory.
+            session (requests.Session): Session used for downloads, a new one if None.
+            timeout (tuple): Connect and read timeout of a download in seconds.
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.session = session or requests.Session()
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        os.makedirs(os.path.join(cache_dir, "urls"), exist_ok=True)
+        os.makedirs(os.path.join(cache_dir, "files"), exist_ok=True)
+        self._size = sum(size for _, size, _ in self._cached_files())
+
+
+    def supports(self, image_format):
+        """Tells whether thumbnails can be produced in the format ("webp" or "jpeg")."""
+        if Image is None:
+            return False
+        return self.FORMATS[image_format][0] in Image.registered_extensions().values()
+
+
+    def get_thumbnail(self, poster_url, width, image_format="jpeg"):
+        """
+        Returns a cached thumbnail of the poster, downloading and resizing it on first use.
+
+        Parameters:
+            poster_url (str): The poster URL as stored on the movie.
+            width (int): Requested width, snapped to the nearest width in WIDTHS.
+            image_format (str): "webp" or "jpeg".
+
+        Returns:
+            tuple: (path, mimetype, etag) of the file to serve.
+            None: If the poster could not be downloaded.
+        """
+        content_hash = self._content_hash_for(poster_url)
+        if content_hash is None:
+            return None
+        original_path = self._file_path(content_hash, "orig")
+        if not self.supports(image_format):
+            self._touch(original_path)
+            return original_path, "image/jpeg", content_hash
+
+        width = min(self.WIDTHS, key=lambda allowed: abs(allowed - width))
+        suffix = f"{width}.{image_format}"
+        thumbnail_path = self._file_path(content_hash, suffix)
+        if not os.path.exists(thumbnail_path):
+            try:
+                with open(original_path, "rb") as original:
+                    image = Image.open(original)
+                    image = image.convert("RGB")
+                    if image.width > width:
+                        image = image.resize((width, round(image.height * width / image.width)), Image.LANCZOS)
+                    output = io.BytesIO()
+                    image.save(output, self.FORMATS[image_format][0], quality=80)
+            except OSError as e:
+                # UnidentifiedImageError is an OSError: a broken original is dropped and downloaded again next time
+                print(f"Error: Poster {poster_url} could not be resized: {e}")
+                self._remove(original_path)
+                return None
+            self._write(thumbnail_path, output.getvalue())
+        else:
+            self._touch(thumbnail_path)
+        return thumbnail_path, self.FORMATS[image_format][1], f"{content_hash}-{suffix}"
+
+
+    def _content_hash_for(self, poster_url):
+        """Returns the content hash of the poster, downloading it if the URL is not cached yet."""
+        url_path = os.path.join(self.cache_dir, "urls", hashlib.sha256(poster_url.encode("utf-8")).hexdigest())
+        try:
+            with open(url_path, "r") as url_file:
+                content_hash = url_file.read().strip()
+            if os.path.exists(self._file_path(content_hash, "orig")):
+                return content_hash
+        except FileNotFoundError:
+            pass
+
+        if not is_poster_url(poster_url):
+            print(f"Error: Poster {poster_url} is not on a poster host")
+            return None
+        try:
+            # Closing the streamed response returns its connection to the session's pool on every path,
+            # redirects are not followed so a poster host cannot send the download elsewhere
+            with self.session.get(poster_url, timeout=self.timeout, stream=True, allow_redirects=False) as response:
+                if response.status_code != 200:
+                    print(f"Error: Received a non-OK status code for poster {poster_url}: {response.status_code}")
+                    return None
+                content = response.raw.read(self.MAX_DOWNLOAD_BYTES + 1, decode_content=True)
+                if len(content) > self.MAX_DOWNLOAD_BYTES:
+                    print(f"Error: Poster {poster_url} is larger than {self.MAX_DOWNLOAD_BYTES} bytes")
+                    return None
+                content_type = response.headers.get("Content-Type", "")
+        except (requests.exceptions.RequestException, urllib3.exceptions.HTTPError) as e:
+            # Reading the raw stream raises urllib3's errors, e.g. when the body ends early
+            print(f"Network error occurred while downloading poster {poster_url}: {e}")
+            return None
+        if not self._is_image(content, content_type):
+            print(f"Error: Poster {poster_url} is not an image")
+            return None
+
+        content_hash = hashlib.sha256(content).hexdigest()
+        original_path = self._file_path(content_hash, "orig")
+        if not os.path.exists(original_path):
+            self._write(original_path, content)
+        self._write(url_path, content_hash.encode("ascii"), count=False)
+        return content_hash
+
+
+    def _is_image(self, content, content_type):
+        """Checks downloaded bytes with Pillow, or without Pillow by the Content-Type header."""
+        if Image is None:
+            return content_type.startswith("image/")
+        try:
+            Image.open(io.BytesIO(content)).verify()
+            return True
+        except (OSError, SyntaxError, ValueError):
+            return False
+
+
+    def _file_path(self, content_hash, suffix):
+        """Returns the path of a cached file, sharded by the first two hash characters."""
+        return os.path.join(self.cache_dir, "files", content_hash[:2], f"{content_hash}-{suffix}")
+
+
+    def _write(self, path, content, count=True):
+        """Writes a file atomically and evicts old files if the cache is over its size cap."""
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        file_descriptor, temporary_path = tempfile.mkstemp(dir=directory)
+        with os.fdopen(file_descriptor, "wb") as temporary_file:
+            temporary_file.write(content)
+        os.replace(temporary_path, path)
+        if count:
+            with self._lock:
+                self._size += len(content)
+                if self._size > self.max_bytes:
+                    self._evict()
+
+
+    def _touch(self, path):
+        """Marks a file as recently used."""
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+
+
+    def _remove(self, path):
+        """Deletes a cached file and subtracts its size."""
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+        except FileNotFoundError:
+            return
+        with self._lock:
+            self._size -= size
+
+
+    def _cached_files(self):
+        """Yields (path, size, last use) for every cached poster file."""
+        for directory, _, file_names in os.walk(os.path.join(self.cache_dir, "files")):
+            for file_name in file_names:
+                path = os.path.join(directory, file_name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                yield path, stat.st_size, stat.st_mtime
+
+
+    def _evict(self):
+        """Deletes the least recently used files until the cache is at 90 % of its size cap."""
+        files = sorted(self._cached_files(), key=lambda cached_file: cached_file[2])
+        self._size = sum(size for _, size, _ in files)
+        target = self.max_bytes * 0.9
+        for path, size, _ in files:
+            if self._size <= target:
+                break
+            try:
+                os.remove(path)
+                self._size -= size
+            except FileNotFoundError:
+                pass
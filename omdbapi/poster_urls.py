@@ -0,0 +1,28 @@
+from urllib.parse import urlsplit
+
+
+# Hosts OMDb links its posters from, the server never downloads a poster from anywhere else
+POSTER_HOSTS = frozenset({
+    "m.media-amazon.com", "images-na.ssl-images-amazon.com", "ia.media-imdb.com", "img.omdbapi.com",
+})
+
+
+def is_poster_url(url):
+    """
+    Tells whether a poster URL may be downloaded by the server: http(s) on one of the POSTER_HOSTS
+    and their default port.
+
+    Parameters:
+        url (str): The poster URL, e.g. of an imported list.
+
+    Returns:
+        bool: True if the URL points to a poster host.
+    """
+    if not isinstance(url, str):
+        return False
+    try:
+        parts = urlsplit(url.strip())
+        port = parts.port
+    except ValueError:
+        return False
+    return parts.scheme in ("http", "https") and port is None and parts.hostname in POSTER_HOSTS
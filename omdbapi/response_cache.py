@@ -0,0 +1,186 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+def normalize_title(title: str):
+    """
+    Normalizes a movie title so that lookups differing only in case or whitespace share a cache entry.
+
+    Parameters:
+        title (str): The title as entered by the user.
+
+    Returns:
+        str: The lower-cased title with collapsed whitespace.
+    """
+    return " ".join(title.split()).casefold()
+
+
+class OMDbResponseCache:
+    """
+    Two-tier cache for OMDb lookups: an in-process LRU in front of a persistent SQLite table.
+
+    Found movies and "not found" answers are stored with separate TTLs, so repeated misses
+    don't go upstream either. Entries are keyed by the normalized title.
+    """
+
+    MISSING = object()
+
+    def __init__(self, db_path, ttl=7 * 24 * 3600, negative_ttl=3600, max_entries=1024):
+        """
+        Initializes the cache and creates the SQLite table if it does not exist.
+
+        Parameters:
+            db_path (str): Path of the SQLite file, or None to keep only the in-process tier.
+            ttl (int): Seconds a found movie stays valid.
+            negative_ttl (int): Seconds a "not found" answer stays valid.
+            max_entries (int): Maximum number of entries in the in-process LRU.
+        """
+        self.db_path = db_path
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._connection = None
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "negative_hits": 0, "misses": 0, "evictions": 0,
+                      "expired": 0}
+        if db_path:
+            directory = os.path.dirname(db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._connection = sqlite3.connect(db_path, check_same_thread=False)
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS omdb_cache ("
+                "normalized_title TEXT PRIMARY KEY, "
+                "payload TEXT, "
+                "expires_at REAL NOT NULL)"
+            )
+            self._connection.commit()
+
+
+    def get(self, title: str):
+        """
+        Looks up a title in memory first and then on disk.
+
+        Parameters:
+            title (str): The title to look up.
+
+        Returns:
+            tuple: The cached movie data.
+            False: If the title is cached as "not found".
+            OMDbResponseCache.MISSING: If nothing valid is cached.
+        """
+        key = normalize_title(title)
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self._count_hit("memory_hits", value)
+                    return value
+                del self._memory[key]
+                self.stats["expired"] += 1
+
+            if self._connection is not None:
+                row = self._connection.execute(
+                    "SELECT payload, expires_at FROM omdb_cache WHERE normalized_title = ?", (key,)
+                ).fetchone()
+                if row:
+                    payload, expires_at = row
+                    if expires_at > now:
+                        value = tuple(json.loads(payload)) if payload is not None else False
+                        self._remember(key, value, expires_at)
+                        self._count_hit("disk_hits", value)
+                        return value
+                    self._connection.execute("DELETE FROM omdb_cache WHERE normalized_title = ?", (key,))
+                    self._connection.commit()
+                    self.stats["expired"] += 1
+
+            self.stats["misses"] += 1
+            return self.MISSING
+
+
+    def set(self, title: str, value):
+        """
+        Stores a lookup result in both tiers.
+
+        Parameters:
+            title (str): The title that was looked up.
+            value (tuple | False): The movie data, or False for a "not found" answer.
+        """
+        key = normalize_title(title)
+        ttl = self.ttl if value else self.negative_ttl
+        expires_at = time.time() + ttl
+        payload = json.dumps(list(value)) if value else None
+        with self._lock:
+            self._remember(key, value, expires_at)
+            if self._connection is not None:
+                self._connection.execute(
+                    "INSERT OR REPLACE INTO omdb_cache (normalized_title, payload, expires_at) VALUES (?, ?, ?)",
+                    (key, payload, expires_at)
+                )
+                self._connection.commit()
+
+
+    def purge_expired(self):
+        """
+        Deletes expired rows from the persistent table.
+
+        Returns:
+            int: Number of rows deleted.
+        """
+        if self._connection is None:
+            return 0
+        with self._lock:
+            cursor = self._connection.execute("DELETE FROM omdb_cache WHERE expires_at <= ?", (time.time(),))
+            self._connection.commit()
+            return cursor.rowcount
+
+
+    def clear(self):
+        """Removes every entry from both tiers and resets the counters."""
+        with self._lock:
+            self._memory.clear()
+            if self._connection is not None:
+                self._connection.execute("DELETE FROM omdb_cache")
+                self._connection.commit()
+            for counter in self.stats:
+                self.stats[counter] = 0
+
+
+    def get_stats(self):
+        """
+        Returns the hit/miss/eviction counters together with the derived upstream savings.
+
+        Returns:
+            dict: The counters, the current LRU size and the hit rate.
+        """
+        with self._lock:
+            stats = dict(self.stats)
+            stats["memory_entries"] = len(self._memory)
+        hits = stats["memory_hits"] + stats["disk_hits"]
+        lookups = hits + stats["misses"]
+        stats["hit_rate"] = hits / lookups if lookups else 0.0
+        return stats
+
+
+    def _remember(self, key, value, expires_at):
+        """Puts an entry into the in-process LRU and evicts the least recently used ones."""
+        self._memory[key] = (value, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.stats["evictions"] += 1
+
+
+    def _count_hit(self, tier, value):
+        """Counts a hit on the given tier and, for "not found" answers, a negative hit."""
+        self.stats[tier] += 1
+        if value is False:
+            self.stats["negative_hits"] += 1
@@ -0,0 +1,232 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from omdbapi.response_cache import OMDbResponseCache
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent lookups of the same title into one upstream call.
+
+    Inside a process, the first thread looking up a normalized title runs the lookup and every thread
+    asking for the same title meanwhile waits for it and shares its result. Across worker processes,
+    a lease row in a shared SQLite file (the response cache's) lets only one worker ask OMDb; the others
+    wait until the lease is released and then find the answer in the shared response cache. A failed
+    lookup is not cached, so its worker keeps the lease for failure_seconds with the result on it: the
+    waiting workers return that result right away instead of asking OMDb one after another.
+    """
+
+    def __init__(self, db_path=None, lease_seconds=60.0, poll_interval=0.05, failure_seconds=5.0):
+        """
+        Initializes the coalescing and creates the lease table if it does not exist.
+
+        Parameters:
+            db_path (str): Path of the SQLite file shared by the workers, or None to coalesce inside the process only.
+            lease_seconds (float): Seconds after which the lease of a crashed worker is taken over,
+                                   longer than a lookup with all its retries.
+            poll_interval (float): Seconds between two attempts to take a lease held by another worker.
+            failure_seconds (float): Seconds the result of a failed lookup is handed to the lookups of the same title.
+        """
+        self.db_path = db_path
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.failure_seconds = failure_seconds
+        self._calls = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.stats = {"lookups": 0, "coalesced": 0, "waited_for_worker": 0, "shared_failures": 0}
+        if db_path:
+            directory = os.path.dirname(db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = self._connection()
+            with connection:
+                connection.execute(
+                    "CREATE TABLE IF NOT EXISTS lookup_leases ("
+                    "lookup_key TEXT PRIMARY KEY, "
+                    "token TEXT NOT NULL, "
+                    "expires_at REAL NOT NULL)"
+                )
+                # Lease tables created before failures were shared lack the column
+                columns = [row[1] for row in connection.execute("PRAGMA table_info(lookup_leases)")]
+                if "failure" not in columns:
+                    connection.execute("ALTER TABLE lookup_leases ADD COLUMN failure TEXT")
+
+
+    def run(self, key, lookup, recheck):
+        """
+        Runs lookup once for all threads of the process asking for the same key at the same time.
+
+        Parameters:
+            key (str): The normalized title.
+            lookup (callable): Asks upstream and stores the answer in the shared cache, returns the result
+                               and whether the lookup failed (its result was not cached).
+            recheck (callable): Returns the cached result, or OMDbResponseCache.MISSING, after another worker
+                                held the lease.
+
+        Returns:
+            tuple: The result of lookup (or recheck), the same object for every waiting thread, and whether
+                   it was shared from another thread's lookup.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = self._calls[key] = {"done": threading.Event(), "result": None, "error": None}
+                self.stats["lookups"] += 1
+                leader = True
+            else:
+                self.stats["coalesced"] += 1
+                leader = False
+        if not leader:
+            call["done"].wait()
+            if call["error"] is not None:
+                raise call["error"]
+            return call["result"], True
+
+        try:
+            call["result"] = self._run_leased(key, lookup, recheck)
+            return call["result"], False
+        except Exception as e:
+            call["error"] = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call["done"].set()
+
+
+    def acquire_lease(self, key):
+        """
+        Takes the lease of a key for this worker unless another worker holds it, expired leases are taken over.
+
+        Parameters:
+            key (str): The normalized title.
+
+        Returns:
+            str: The token to release the lease with, None if another worker holds it. Without db_path always a token.
+        """
+        token = uuid.uuid4().hex
+        if not self.db_path:
+            return token
+        connection = self._connection()
+        now = time.time()
+        with connection:
+            connection.execute("DELETE FROM lookup_leases WHERE lookup_key = ? AND expires_at <= ?", (key, now))
+            cursor = connection.execute(
+                "INSERT OR IGNORE INTO lookup_leases (lookup_key, token, expires_at) VALUES (?, ?, ?)",
+                (key, token, now + self.lease_seconds)
+            )
+        return token if cursor.rowcount == 1 else None
+
+
+    def release_lease(self, key, token):
+        """Releases a lease taken with acquire_lease."""
+        if not self.db_path:
+            return
+        connection = self._connection()
+        with connection:
+            connection.execute("DELETE FROM lookup_leases WHERE lookup_key = ? AND token = ?", (key, token))
+
+
+    def fail_lease(self, key, token, result):
+        """
+        Keeps a lease taken with acquire_lease for failure_seconds and stores the result of the failed lookup on it,
+        see lease_failure.
+
+        Parameters:
+            key (str): The normalized title.
+            token (str): The token acquire_lease returned.
+            result (str | bool): The result of the failed lookup, an error message or False.
+        """
+        if not self.db_path:
+            return
+        connection = self._connection()
+        with connection:
+            connection.execute(
+                "UPDATE lookup_leases SET failure = ?, expires_at = ? WHERE lookup_key = ? AND token = ?",
+                (json.dumps(result), time.time() + self.failure_seconds, key, token)
+            )
+
+
+    def lease_failure(self, key):
+        """
+        Returns the result of a lookup of the key that failed within the last failure_seconds.
+
+        Parameters:
+            key (str): The normalized title.
+
+        Returns:
+            str | bool: The result stored with fail_lease, or OMDbResponseCache.MISSING.
+        """
+        if not self.db_path:
+            return OMDbResponseCache.MISSING
+        row = self._connection().execute(
+            "SELECT failure FROM lookup_leases WHERE lookup_key = ? AND expires_at > ? AND failure IS NOT NULL",
+            (key, time.time())
+        ).fetchone()
+        if row is None:
+            return OMDbResponseCache.MISSING
+        self.count("shared_failures")
+        return json.loads(row[0])
+
+
+    def get_stats(self):
+        """
+        Returns the coalescing counters.
+
+        Returns:
+            dict: "lookups" (run by this process), "coalesced" (lookups that shared a running one of the process)
+                  "waited_for_worker" (lookups that waited for the lease of another worker) and "shared_failures"
+                  (lookups answered with the result of another worker's failed lookup).
+        """
+        with self._lock:
+            return dict(self.stats)
+
+
+    def count(self, counter):
+        """Increments one of the counters of get_stats, for callers coalescing on their own like the async client."""
+        with self._lock:
+            self.stats[counter] += 1
+
+
+    def _run_leased(self, key, lookup, recheck):
+        """
+        Runs lookup while holding the lease of the key, or answers from the cache once another worker is done,
+        or with the result of another worker's lookup that failed.
+        """
+        token = self.acquire_lease(key)
+        waited = token is None
+        if waited:
+            self.count("waited_for_worker")
+        while token is None:
+            failure = self.lease_failure(key)
+            if failure is not OMDbResponseCache.MISSING:
+                return failure
+            time.sleep(self.poll_interval)
+            token = self.acquire_lease(key)
+        failed = False
+        try:
+            if waited:
+                # The other worker stored its answer before releasing the lease
+                cached = recheck()
+                if cached is not OMDbResponseCache.MISSING:
+                    return cached
+            result, failed = lookup()
+            if failed:
+                self.fail_lease(key, token, result)
+            return result
+        finally:
+            if not failed:
+                self.release_lease(key, token)
+
+    def _connection(self):
+        """Returns the SQLite connection of the current thread."""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.db_path, timeout=5)
+            connection.execute("PRAGMA journal_mode = WAL")
+            self._local.connection = connection
+        return connection
@@ -0,0 +1,229 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from flask import Response, request
+
+
+# A cached page: body (bytes), mimetype, ETag and the time of the group's last change
+CachedPage = namedtuple("CachedPage", ["body", "mimetype", "etag", "last_modified"])
+
+
+def make_etag(body):
+    """Returns a strong ETag value for a response body."""
+    return hashlib.sha1(body).hexdigest()
+
+
+class MemoryPageCache:
+    """
+    In-process cache for rendered pages, invalidated per group through generation counters.
+
+    Pages are grouped (e.g. "users" or "user:3") and stored per variant (e.g. the query string).
+    invalidate(group) bumps the group's generation, which makes all of its variants stale at once.
+    Only suitable for a single worker process, see SQLitePageCache for multi-worker setups.
+    """
+
+    def __init__(self, max_entries=512):
+        """
+        Initializes an empty cache.
+
+        Args:
+            max_entries (int): Maximum number of cached pages, least recently used ones are evicted.
+        """
+        self.max_entries = max_entries
+        self._pages = OrderedDict()
+        self._generations = {}
+        self._lock = threading.Lock()
+
+
+    def get(self, group, variant):
+        """
+        Looks up a page.
+
+        Args:
+            group (str): The invalidation group of the page.
+            variant (str): The variant of the page inside the group.
+
+        Returns:
+            tuple: The CachedPage or None, and the group's generation to pass to set().
+        """
+        with self._lock:
+            generation, _ = self._generation(group)
+            entry = self._pages.get((group, variant))
+            if entry is not None and entry[0] == generation:
+                self._pages.move_to_end((group, variant))
+                return entry[1], generation
+            return None, generation
+
+
+    def set(self, group, variant, generation, body, mimetype):
+        """
+        Stores a rendered page, unless the group changed since get() returned the generation.
+
+        Returns:
+            CachedPage: The page with its ETag and Last-Modified time.
+        """
+        with self._lock:
+            current_generation, modified_at = self._generation(group)
+            page = CachedPage(body, mimetype, make_etag(body), modified_at)
+            if generation == current_generation:
+                self._pages[(group, variant)] = (generation, page)
+                self._pages.move_to_end((group, variant))
+                while len(self._pages) > self.max_entries:
+                    self._pages.popitem(last=False)
+            return page
+
+
+    def invalidate(self, group):
+        """Marks every cached page of the group as stale."""
+        with self._lock:
+            generation, _ = self._generation(group)
+            self._generations[group] = (generation + 1, time.time())
+
+
+    def _generation(self, group):
+        """Returns (generation, modified_at) of the group, registering unknown groups."""
+        return self._generations.setdefault(group, (0, time.time()))
+
+
+class SQLitePageCache:
+    """
+    Page cache stored in a local SQLite file shared by all worker processes of a host.
+
+    Works like MemoryPageCache, but generations and pages live in the file, so an invalidation
+    in one worker is seen by all others.
+    """
+
+    def __init__(self, db_path, max_entries=5000):
+        """
+        Opens the cache file and creates its tables.
+
+        Args:
+            db_path (str): Path of the SQLite file.
+            max_entries (int): Maximum number of cached pages.
+        """
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self._local = threading.local()
+        connection = self._connection()
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS page_generations ("
+            "page_group TEXT PRIMARY KEY, generation INTEGER NOT NULL, modified_at REAL NOT NULL)"
+        )
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            "page_group TEXT NOT NULL, variant TEXT NOT NULL, generation INTEGER NOT NULL, "
+            "body BLOB NOT NULL, mimetype TEXT NOT NULL, etag TEXT NOT NULL, used_at REAL NOT NULL, "
+            "PRIMARY KEY (page_group, variant))"
+        )
+        connection.commit()
+
+
+    def get(self, group, variant):
+        """See MemoryPageCache.get."""
+        connection = self._connection()
+        generation, modified_at = self._generation(connection, group)
+        row = connection.execute(
+            "SELECT body, mimetype, etag FROM pages WHERE page_group = ? AND variant = ? AND generation = ?",
+            (group, variant, generation)
+        ).fetchone()
+        if row is None:
+            return None, generation
+        return CachedPage(row[0], row[1], row[2], modified_at), generation
+
+
+    def set(self, group, variant, generation, body, mimetype):
+        """See MemoryPageCache.set."""
+        connection = self._connection()
+        current_generation, modified_at = self._generation(connection, group)
+        page = CachedPage(body, mimetype, make_etag(body), modified_at)
+        if generation == current_generation:
+            with connection:
+                connection.execute(
+                    "INSERT OR REPLACE INTO pages (page_group, variant, generation, body, mimetype, etag, used_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (group, variant, generation, body, mimetype, page.etag, time.time())
+                )
+                connection.execute("DELETE FROM pages WHERE page_group = ? AND generation < ?", (group, generation))
+                connection.execute(
+                    "DELETE FROM pages WHERE rowid IN (SELECT rowid FROM pages ORDER BY used_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,)
+                )
+        return page
+
+
+    def invalidate(self, group):
+        """See MemoryPageCache.invalidate."""
+        connection = self._connection()
+        with connection:
+            connection.execute(
+                "INSERT INTO page_generations (page_group, generation, modified_at) VALUES (?, 1, ?) "
+                "ON CONFLICT(page_group) DO UPDATE SET generation = generation + 1, modified_at = excluded.modified_at",
+                (group, time.time())
+            )
+
+
+    def _generation(self, connection, group):
+        """Returns (generation, modified_at) of the group, registering unknown groups."""
+        row = connection.execute(
+            "SELECT generation, modified_at FROM page_generations WHERE page_group = ?", (group,)
+        ).fetchone()
+        if row is not None:
+            return row
+        with connection:
+            connection.execute(
+                "INSERT OR IGNORE INTO page_generations (page_group, generation, modified_at) VALUES (?, 0, ?)",
+                (group, time.time())
+            )
+        return connection.execute(
+            "SELECT generation, modified_at FROM page_generations WHERE page_group = ?", (group,)
+        ).fetchone()
+
+
+    def _connection(self):
+        """Returns the SQLite connection of the current thread."""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.db_path, timeout=5)
+            connection.execute("PRAGMA journal_mode = WAL")
+            connection.execute("PRAGMA synchronous = NORMAL")
+            self._local.connection = connection
+        return connection
+
+
+def cached_response(page_cache, group, variant, render_page, mimetype="text/html"):
+    """
+    Serves a response from the page cache, rendering and storing it on a miss.
+
+    Responses carry an ETag (and Last-Modified when cached), so clients revalidate with a cheap 304.
+    Without a page cache the ETag is still computed from the rendered body.
+
+    Args:
+        page_cache (MemoryPageCache | SQLitePageCache): The cache, or None.
+        group (str): The invalidation group of the page, e.g. "users" or "user:3".
+        variant (str): The variant of the page inside the group, e.g. the query string.
+        render_page (callable): Renders the page, returns (body, status code).
+        mimetype (str): The mimetype of the rendered body.
+    """
+    if page_cache is None:
+        body, status_code = render_page()
+        if status_code != 200:
+            return body, status_code
+        page = CachedPage(body.encode("utf-8"), mimetype, make_etag(body.encode("utf-8")), None)
+    else:
+        page, generation = page_cache.get(group, variant)
+        if page is None:
+            body, status_code = render_page()
+            if status_code != 200:
+                return body, status_code
+            page = page_cache.set(group, variant, generation, body.encode("utf-8"), mimetype)
+    response = Response(page.body, mimetype=page.mimetype)
+    response.set_etag(page.etag)
+    response.last_modified = page.last_modified
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
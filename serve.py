@@ -0,0 +1,24 @@
+import os
+import uvicorn
+
+
+def main():
+    """
+    Production launcher: serves the ASGI application (asgi.py) with uvicorn.
+
+    Configured with HOST, PORT, WEB_CONCURRENCY (worker processes) and LOG_LEVEL. With more than
+    one worker process use PAGE_CACHE=sqlite, so all workers see the same page invalidations.
+    """
+    uvicorn.run(
+        "asgi:application",
+        host=os.getenv("HOST", "127.0.0.1"),
+        port=int(os.getenv("PORT", 8000)),
+        workers=int(os.getenv("WEB_CONCURRENCY", 1)),
+        log_level=os.getenv("LOG_LEVEL", "info"),
+        proxy_headers=True,
+        lifespan="on",
+    )
+
+
+if __name__ == "__main__":
+    main()
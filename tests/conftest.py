@@ -0,0 +1,81 @@
+import os
+from contextlib import contextmanager
+import pytest
+from sqlalchemy import event
+
+# The shared OMDb client reads these when it is built, the tests never touch the caches in data/
+os.environ["OMDB_CACHE_PATH"] = ""
+os.environ["OMDB_CATALOG_PATH"] = ""
+os.environ.setdefault("API_KEY", "test")
+
+from app import create_app, db  # noqa: E402
+
+
+@pytest.fixture
+def app(tmp_path):
+    """An app on a fresh SQLite database in tmp_path, warmed up so the schema check is not counted."""
+    app = create_app({
+        "TESTING": True,
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'library.sqlite'}",
+        "DATABASE_REPLICA_URI": "",
+        "PAGE_CACHE": "off",
+        "READ_MODEL": "off",
+        "OMDB_LOOKUP_MODE": "sync",
+        "POSTER_CACHE_DIR": str(tmp_path / "posters"),
+        "SQLITE_TUNING": False,
+    })
+    app.extensions["movieweb"].warmup()
+    yield app
+    with app.app_context():
+        db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def data_manager(app):
+    return app.extensions["movieweb"].data_manager
+
+
+@pytest.fixture
+def count_queries(app):
+    """Returns a context manager that collects the SQL statements run inside it into a list."""
+    @contextmanager
+    def counter():
+        statements = []
+
+        def _count(connection, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        with app.app_context():
+            engine = db.engine
+        event.listen(engine, "before_cursor_execute", _count)
+        try:
+            yield statements
+        finally:
+            event.remove(engine, "before_cursor_execute", _count)
+
+    return counter
+
+
+def movie_data(title, year=2000, rating="7.0/10", director="Some Director"):
+    """An OMDb answer as returned by api_request_data."""
+    return title, str(year), rating, "N/A", director
+
+
+@pytest.fixture
+def add_user_with_movies(app, data_manager):
+    """Creates a user with the given number of movies, returns the user's ID."""
+    def add(name, movie_count):
+        with app.app_context():
+            data_manager.add_user(name)
+            user_id = next(user.id for user in data_manager.get_all_users() if user.name == name)
+            for number in range(movie_count):
+                data_manager.add_movie_to_user(user_id, f"{name} movie {number}",
+                                               movie_data(f"{name} movie {number}", 1950 + number))
+        return user_id
+
+    return add
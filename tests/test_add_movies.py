@@ -0,0 +1,48 @@
+from sqlalchemy import select
+from app import db
+from conftest import movie_data
+from datamanager import SQLite_data_manager
+from datamanager.data_models import Movie
+
+
+def add_placeholder(title, lookup_status):
+    placeholder = Movie(title=title, director="", publication_year=0, lookup_status=lookup_status)
+    db.session.add(placeholder)
+    db.session.commit()
+    return placeholder.id
+
+
+def test_a_bulk_add_skips_failed_placeholders(app, data_manager, add_user_with_movies, monkeypatch):
+    monkeypatch.setattr(SQLite_data_manager, "api_request_data", lambda title: movie_data(title, 1979))
+    user_id = add_user_with_movies("anna", 0)
+    with app.app_context():
+        failed_id = add_placeholder("Alien", "failed")
+        report = data_manager.add_movies_to_user(user_id, ["Alien"])
+        assert report[0]["status"] == "added"
+        movie = data_manager.get_user_movies(user_id)[0]
+        assert movie.id != failed_id
+        assert movie.lookup_status == "ready"
+
+
+def test_a_bulk_add_prefers_the_ready_movie(app, data_manager, add_user_with_movies, monkeypatch):
+    monkeypatch.setattr(SQLite_data_manager, "api_request_data", lambda title: movie_data(title, 1979))
+    user_id = add_user_with_movies("anna", 0)
+    with app.app_context():
+        pending_id = add_placeholder("Alien", "pending")
+        ready_id = add_placeholder("Alien", "ready")
+        assert data_manager.add_movies_to_user(user_id, ["Alien"])[0]["status"] == "assigned"
+        assert [movie.id for movie in data_manager.get_user_movies(user_id)] == [ready_id]
+        assert db.session.scalar(select(Movie.lookup_status).where(Movie.id == pending_id)) == "pending"
+
+
+def test_a_failed_lookup_returns_its_error_message(app, client, data_manager, add_user_with_movies, monkeypatch):
+    error = "Network error occurred: OMDb is currently unavailable, please try again later."
+    monkeypatch.setattr(SQLite_data_manager, "api_request_data", lambda title: error)
+    user_id = add_user_with_movies("anna", 0)
+    with app.app_context():
+        assert data_manager.add_movie_to_user(user_id, "Alien") == error
+        assert data_manager.add_movie_to_user(user_id, "Alien", error) == error
+    response = client.post(f"/api/v1/users/{user_id}/movies", json={"title": "Alien"})
+    assert (response.status_code, response.get_json()) == (200, {"message": error})
+    assert "OMDb+is+currently+unavailable" in client.post(f"/users/{user_id}/add_movie",
+                                                          data={"movie_name": "Alien"}).headers["Location"]
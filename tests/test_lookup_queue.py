@@ -0,0 +1,60 @@
+import pytest
+from sqlalchemy import select
+from app import create_app, db
+from conftest import movie_data
+from datamanager import lookup_queue as lookup_queue_module
+from datamanager.data_models import Movie, MovieLookupJob
+
+
+@pytest.fixture
+def queue_app(tmp_path):
+    """An app in background lookup mode without worker threads, the tests run the jobs themselves."""
+    app = create_app({
+        "TESTING": True,
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'library.sqlite'}",
+        "PAGE_CACHE": "off",
+        "READ_MODEL": "off",
+        "OMDB_LOOKUP_MODE": "background",
+        "OMDB_LOOKUP_WORKERS": 0,
+    })
+    app.extensions["movieweb"].warmup()
+    yield app
+    with app.app_context():
+        db.engine.dispose()
+
+
+def test_a_handler_raising_on_every_attempt_fails_the_placeholder(queue_app, monkeypatch):
+    services = queue_app.extensions["movieweb"]
+    data_manager, queue = services.data_manager, services.lookup_queue
+    handler = queue._handler
+
+    def raising_handler(movie_id, api_data):
+        if isinstance(api_data, tuple):
+            raise RuntimeError("handler bug")
+        handler(movie_id, api_data)
+
+    monkeypatch.setattr(queue, "_handler", raising_handler)
+    monkeypatch.setattr(queue, "retry_delay", 0.0)
+    monkeypatch.setattr(lookup_queue_module, "api_request_data", lambda query: movie_data("Alien", 1979))
+    with queue_app.app_context():
+        data_manager.add_user("anna")
+        user_id = data_manager.get_all_users()[0].id
+        assert "being looked up" in data_manager.add_local_movie_to_user(user_id, "Alien")
+        placeholder_id = db.session.scalar(select(Movie.id))
+        for _ in range(queue.max_attempts):
+            queue._run_job(*queue._claim_job())
+        assert queue._claim_job() is None
+
+        assert db.session.get(Movie, placeholder_id).lookup_status == "failed"
+        job = db.session.scalars(select(MovieLookupJob)).one()
+        assert (job.status, job.attempts) == ("failed", queue.max_attempts)
+        assert "handler bug" in job.error
+        assert queue.get_metrics()["failed"] == 1
+
+        # A later add of the title gets a new lookup instead of the dead placeholder
+        data_manager.add_user("bert")
+        other_user_id = next(user.id for user in data_manager.get_all_users() if user.name == "bert")
+        assert "being looked up" in data_manager.add_local_movie_to_user(other_user_id, "Alien")
+        movie = data_manager.get_user_movies(other_user_id)[0]
+        assert movie.id != placeholder_id
+        assert movie.lookup_status == "pending"
@@ -0,0 +1,34 @@
+import pytest
+from app import create_app
+
+
+@pytest.fixture
+def cached_client(tmp_path):
+    app = create_app({
+        "TESTING": True,
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'library.sqlite'}",
+        "PAGE_CACHE": "memory",
+        "READ_MODEL": "off",
+    })
+    services = app.extensions["movieweb"]
+    with app.app_context():
+        services.data_manager.add_user("anna")
+        user_id = services.data_manager.get_all_users()[0].id
+        services.data_manager.add_movie_to_user(user_id, "Alien", ("Alien", "1979", "8.5/10", "N/A", "Ridley Scott"))
+    return app.test_client(), user_id
+
+
+def test_pages_of_the_same_group_are_cached_separately(cached_client):
+    client, user_id = cached_client
+    movies_page = client.get(f"/users/{user_id}").data
+    stats_page = client.get(f"/users/{user_id}/stats").data
+    assert movies_page != stats_page
+    assert b"Favourite directors" in stats_page
+
+
+def test_removing_a_movie_invalidates_the_cached_list(cached_client):
+    client, user_id = cached_client
+    movie_id = client.get(f"/api/v1/users/{user_id}/movies").get_json()["items"][0]["id"]
+    assert b"Alien" in client.get(f"/users/{user_id}").data
+    client.post(f"/users/{user_id}/remove_movie/{movie_id}")
+    assert b"Alien" not in client.get(f"/users/{user_id}").data
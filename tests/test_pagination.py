@@ -0,0 +1,39 @@
+import base64
+import json
+import pytest
+from datamanager.pagination import decode_cursor, encode_cursor
+
+
+def make_cursor(payload):
+    return base64.urlsafe_b64encode(json.dumps(payload).encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor("name", ["Anna", 3], "prev")
+    assert decode_cursor(cursor, "name", 2) == (["Anna", 3], True)
+
+
+@pytest.mark.parametrize("payload", [
+    {"s": "name", "k": ["a"], "d": "next"},
+    {"s": "name", "k": [{"x": 1}, 2], "d": "next"},
+    {"s": "title", "k": ["a", 1], "d": "next"},
+    {"s": "name", "k": ["a", 1], "d": "sideways"},
+])
+def test_cursors_that_do_not_fit_the_sort_order_are_rejected(payload):
+    with pytest.raises(ValueError):
+        decode_cursor(make_cursor(payload), "name", 2)
+
+
+@pytest.mark.parametrize("path", ["/users", "/api/v1/users", "/users/1"])
+def test_bad_cursors_are_answered_with_400(client, add_user_with_movies, path):
+    add_user_with_movies("anna", 2)
+    response = client.get(path, query_string={"cursor": make_cursor({"s": "name", "k": ["a"], "d": "next"})})
+    assert response.status_code == 400
+
+
+def test_pages_follow_the_next_cursor(client, add_user_with_movies):
+    for name in ("anna", "bert", "carl"):
+        add_user_with_movies(name, 0)
+    first = client.get("/api/v1/users?page_size=2").get_json()
+    second = client.get("/api/v1/users", query_string={"page_size": 2, "cursor": first["next_cursor"]}).get_json()
+    assert [user["name"] for user in first["items"] + second["items"]] == ["anna", "bert", "carl"]
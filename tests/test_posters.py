@@ -0,0 +1,95 @@
+import pytest
+import requests
+import urllib3
+from datamanager.favourites_io import parse_record
+from omdbapi.poster_cache import PosterCache
+from omdbapi.poster_urls import is_poster_url
+
+AMAZON_POSTER = "https://m.media-amazon.com/images/M/MV5BMmQ2MmU3NzktZjAxOC00ZDZhLTk4YzEtMDMyMzcxY2IwMDAyXkEyXkFqcGdeQXVyNzkwMjQ5NzM@._V1_SX300.jpg"
+
+
+@pytest.mark.parametrize("url, allowed", [
+    (AMAZON_POSTER, True),
+    ("http://img.omdbapi.com/?i=tt0078748", True),
+    ("http://127.0.0.1:5000/metrics", False),
+    ("http://169.254.169.254/latest/meta-data/", False),
+    ("https://m.media-amazon.com:8443/x.jpg", False),
+    ("https://m.media-amazon.com@internal.example/x.jpg", False),
+    ("https://m.media-amazon.com.evil.example/x.jpg", False),
+    ("file:///etc/passwd", False),
+    ("N/A", False),
+    (None, False),
+])
+def test_is_poster_url(url, allowed):
+    assert is_poster_url(url) is allowed
+
+
+def test_imported_posters_off_the_poster_hosts_are_dropped():
+    assert parse_record({"title": "Alien", "poster_url": AMAZON_POSTER})[4] == AMAZON_POSTER
+    assert parse_record({"title": "Alien", "poster_url": "http://localhost:8080/admin"})[4] == "N/A"
+
+
+def test_the_poster_route_does_not_fetch_other_hosts(app, client, data_manager, add_user_with_movies, monkeypatch):
+    def no_requests(*args, **kwargs):
+        raise AssertionError("The poster was downloaded")
+
+    monkeypatch.setattr(requests.Session, "get", no_requests)
+    user_id = add_user_with_movies("anna", 0)
+    with app.app_context():
+        data_manager.add_movie_to_user(user_id, "Alien",
+                                       ("Alien", "1979", "8.5/10", "http://127.0.0.1:5000/metrics", "Ridley Scott"))
+        movie_id = data_manager.get_user_movies(user_id)[0].id
+    assert client.get(f"/posters/{movie_id}").status_code == 404
+
+
+class FakeResponse:
+    """A streamed response that records whether it was closed."""
+
+    def __init__(self, status_code, body=b"", error=None):
+        self.status_code = status_code
+        self.headers = {"Content-Type": "image/jpeg"}
+        self.closed = False
+        self._body, self._error = body, error
+        self.raw = self
+
+    def read(self, amount, decode_content=False):
+        if self._error is not None:
+            raise self._error
+        return self._body[:amount]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.closed = True
+
+
+class FakeSession:
+    def __init__(self, response):
+        self.response = response
+        self.requests = []
+
+    def get(self, url, **kwargs):
+        self.requests.append((url, kwargs))
+        return self.response
+
+
+@pytest.mark.parametrize("response", [
+    FakeResponse(404),
+    FakeResponse(200, b"x" * (5 * 1024 * 1024 + 1)),
+    FakeResponse(200, error=urllib3.exceptions.ProtocolError("Connection broken: IncompleteRead")),
+    FakeResponse(200, b"<html>not an image</html>"),
+])
+def test_failed_poster_downloads_close_the_response(tmp_path, response):
+    session = FakeSession(response)
+    poster_cache = PosterCache(str(tmp_path), session=session)
+    assert poster_cache.get_thumbnail(AMAZON_POSTER, 200) is None
+    assert response.closed
+    assert session.requests[0][1]["allow_redirects"] is False
+
+
+def test_posters_off_the_poster_hosts_are_not_downloaded(tmp_path):
+    session = FakeSession(FakeResponse(200, b"image"))
+    poster_cache = PosterCache(str(tmp_path), session=session)
+    assert poster_cache.get_thumbnail("http://10.0.0.1/poster.jpg", 200) is None
+    assert session.requests == []
@@ -0,0 +1,41 @@
+"""The list routes run a fixed number of queries, however long the list is."""
+
+
+def test_list_page_runs_a_constant_number_of_queries(client, add_user_with_movies, count_queries):
+    counts = []
+    for name, movie_count in (("short", 3), ("long", 30)):
+        user_id = add_user_with_movies(name, movie_count)
+        with count_queries() as statements:
+            response = client.get(f"/users/{user_id}")
+        assert response.status_code == 200
+        counts.append(len(statements))
+    assert counts[0] == counts[1]
+    assert counts[0] <= 3
+
+
+def test_users_page_runs_one_query(client, add_user_with_movies, count_queries):
+    add_user_with_movies("first", 1)
+    add_user_with_movies("second", 1)
+    with count_queries() as statements:
+        assert client.get("/users").status_code == 200
+    assert len(statements) == 1
+
+
+def test_removing_and_adding_a_movie_do_not_depend_on_the_list_length(client, app, data_manager,
+                                                                      add_user_with_movies, count_queries):
+    add_user_with_movies("library", 1)
+    remove_counts, add_counts = [], []
+    for name, movie_count in (("short", 3), ("long", 30)):
+        user_id = add_user_with_movies(name, movie_count)
+        with app.app_context():
+            movie_id = data_manager.get_user_movies(user_id)[0].id
+        with count_queries() as statements:
+            assert client.post(f"/users/{user_id}/remove_movie/{movie_id}").status_code == 302
+        remove_counts.append(len(statements))
+        # Found in the library, no OMDb lookup
+        with count_queries() as statements:
+            response = client.post(f"/users/{user_id}/add_movie", data={"movie_name": "library movie 0"})
+        assert "successfully+assigned" in response.headers["Location"]
+        add_counts.append(len(statements))
+    assert remove_counts[0] == remove_counts[1]
+    assert add_counts[0] == add_counts[1]
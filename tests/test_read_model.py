@@ -0,0 +1,49 @@
+import pytest
+from sqlalchemy import text
+from app import create_app, db
+from conftest import movie_data
+
+
+@pytest.fixture
+def read_model_app(tmp_path):
+    app = create_app({
+        "TESTING": True,
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'library.sqlite'}",
+        "PAGE_CACHE": "off",
+        "READ_MODEL": "memory",
+        "READ_MODEL_SNAPSHOT": "",
+        "READ_MODEL_CHECK_INTERVAL": 0.0,
+        "OMDB_LOOKUP_MODE": "sync",
+    })
+    app.extensions["movieweb"].warmup()
+    yield app
+    with app.app_context():
+        db.engine.dispose()
+
+
+def test_reads_in_the_middle_of_a_sync_see_the_previous_catalog(read_model_app, monkeypatch):
+    services = read_model_app.extensions["movieweb"]
+    data_manager, read_model = services.data_manager, services.read_model
+    with read_model_app.app_context():
+        data_manager.add_user("anna")
+        user_id = read_model.get_all_users()[0].id
+        data_manager.add_movie_to_user(user_id, "Alien", movie_data("Alien", 1979, "8.5/10"))
+        movie_id = read_model.find_local_movie("Alien").id
+
+        # A reader running while the sync refreshes the movie, between the steps of its title index update
+        seen_during_sync = []
+        title_key = read_model._title_key
+
+        def title_key_with_reads(movie):
+            seen_during_sync.append((read_model.find_local_movie("Alien"), len(read_model.get_user_movies(user_id))))
+            return title_key(movie)
+
+        monkeypatch.setattr(read_model, "_title_key", title_key_with_reads)
+        db.session.execute(text("UPDATE movies SET rating = 8.4 WHERE id = :id"), {"id": movie_id})
+        db.session.commit()
+        monkeypatch.undo()
+
+    assert seen_during_sync
+    assert all(movie is not None and movie.rating == 8.5 and movie_count == 1
+               for movie, movie_count in seen_during_sync)
+    assert read_model.find_local_movie("Alien").rating == 8.4
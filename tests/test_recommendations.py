@@ -0,0 +1,26 @@
+from sqlalchemy import select
+from app import db
+from conftest import movie_data
+from datamanager.data_models import MovieFavouriteCount, MovieNeighbour
+
+
+def test_deleted_movies_leave_no_neighbours_to_reused_ids(app, data_manager, add_user_with_movies):
+    anna_id = add_user_with_movies("anna", 2)
+    bob_id = add_user_with_movies("bob", 0)
+    with app.app_context():
+        kept_id, deleted_id = (movie.id for movie in data_manager.get_user_movies(anna_id))
+        data_manager.add_movie_to_user(bob_id, "anna movie 0", movie_data("anna movie 0", 1950))
+        db.session.add_all([
+            MovieNeighbour(movie_id=kept_id, neighbour_id=deleted_id, score=0.5),
+            MovieNeighbour(movie_id=deleted_id, neighbour_id=kept_id, score=0.5),
+        ])
+        db.session.commit()
+
+        assert "removed" in data_manager.remove_movie_from_favourites(deleted_id, anna_id)
+        assert db.session.scalars(select(MovieNeighbour.movie_id)).all() == []
+        assert db.session.get(MovieFavouriteCount, deleted_id) is None
+
+        # SQLite hands the ID of the deleted last movie to the next one
+        data_manager.add_movie_to_user(anna_id, "Unrelated", movie_data("Unrelated", 1990))
+        assert [movie.id for movie in data_manager.get_user_movies(anna_id)][-1] == deleted_id
+        assert data_manager.get_recommendations(bob_id) == []
@@ -0,0 +1,61 @@
+import sqlite3
+import threading
+import time
+from omdbapi.single_flight import SingleFlight
+from omdbapi.response_cache import OMDbResponseCache
+
+
+def missing():
+    return OMDbResponseCache.MISSING
+
+
+def test_workers_waiting_for_a_failed_lookup_share_its_result(tmp_path):
+    lease_path = str(tmp_path / "leases.sqlite")
+    first_worker, second_worker = SingleFlight(lease_path), SingleFlight(lease_path, failure_seconds=5.0)
+    lookup_started = threading.Event()
+    calls = []
+
+    def failing_lookup():
+        calls.append("first")
+        lookup_started.set()
+        time.sleep(0.3)
+        return "Network error occurred: timed out", True
+
+    def second_lookup():
+        calls.append("second")
+        return ("Alien", "1979", "8.5/10", "N/A", "Ridley Scott"), False
+
+    leader = threading.Thread(target=first_worker.run, args=("alien", failing_lookup, missing))
+    leader.start()
+    lookup_started.wait()
+    result, coalesced = second_worker.run("alien", second_lookup, missing)
+    leader.join()
+
+    assert result == "Network error occurred: timed out"
+    assert calls == ["first"]
+    assert second_worker.get_stats()["shared_failures"] == 1
+    # Until the failure expires, later lookups of the title get it right away as well
+    assert second_worker.run("alien", second_lookup, missing)[0] == "Network error occurred: timed out"
+    assert calls == ["first"]
+
+
+def test_an_expired_failure_is_looked_up_again(tmp_path):
+    lease_path = str(tmp_path / "leases.sqlite")
+    single_flight = SingleFlight(lease_path, failure_seconds=0.05)
+    assert single_flight.run("alien", lambda: (False, True), missing) == (False, False)
+    time.sleep(0.1)
+    found = ("Alien", "1979", "8.5/10", "N/A", "Ridley Scott")
+    assert single_flight.run("alien", lambda: (found, False), missing) == (found, False)
+    # A successful lookup releases its lease
+    assert single_flight.acquire_lease("alien") is not None
+
+
+def test_lease_tables_without_the_failure_column_are_upgraded(tmp_path):
+    lease_path = str(tmp_path / "leases.sqlite")
+    with sqlite3.connect(lease_path) as connection:
+        connection.execute(
+            "CREATE TABLE lookup_leases (lookup_key TEXT PRIMARY KEY, token TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+    single_flight = SingleFlight(lease_path)
+    assert single_flight.run("alien", lambda: ("Network error occurred", True), missing)[0] == "Network error occurred"
+    assert single_flight.lease_failure("alien") == "Network error occurred"
@@ -0,0 +1,25 @@
+import pytest
+from datamanager.stats import decade_of, year_of
+
+
+@pytest.mark.parametrize("value, year", [(1994, 1994), ("1994", 1994), ("2008–2013", 2008), ("2019–", 2019),
+                                         ("N/A", 0), ("", 0), (None, 0)])
+def test_year_of(value, year):
+    assert year_of(value) == year
+
+
+def test_decade_of_unknown_years_is_none():
+    assert decade_of("2008–2013") == 2000
+    assert decade_of(0) is None
+    assert decade_of("N/A") is None
+
+
+def test_adding_a_series_with_a_year_range(app, client, data_manager, add_user_with_movies):
+    user_id = add_user_with_movies("anna", 0)
+    with app.app_context():
+        result = data_manager.add_movie_to_user(user_id, "Breaking Bad",
+                                                ("Breaking Bad", "2008–2013", "9.5/10", "N/A", "Vince Gilligan"))
+        assert "successfully" in result
+        assert data_manager.get_user_movies(user_id)[0].publication_year == 2008
+    stats = client.get(f"/api/v1/users/{user_id}/stats").get_json()
+    assert stats["favourite_decades"] == [{"decade": 2000, "movie_count": 1}]